@@ -4,13 +4,26 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
 import pandas as pd
-from datetime import datetime, timezone
+from local_cache import sync_table
+from video_store import VideoDetailStore
+from ranking import build_video_ranking
+from metrics import engagement_for_row
+from shared_cache import SWRCache, make_backend
+import telemetry
 
 # --- .env 파일 로드 및 클라이언트 초기화 ---
 load_dotenv()
 
+@st.cache_resource # 프로세스당 1개: 스크립트가 다시 실행될 때마다 클라이언트를 새로 만들지 않음
+def get_supabase_client(url, key):
+    from supabase import create_client
+    return create_client(url, key)
+
+@st.cache_resource # 프로세스당 1회: METRICS_PORT가 설정되어 있으면 /metrics 엔드포인트 시작
+def start_metrics_server():
+    return telemetry.start_metrics_server_from_env()
+
 try:
     SUPABASE_URL = os.environ.get("SUPABASE_URL")
     SUPABASE_KEY = os.environ.get("SUPABASE_ANON_KEY")
@@ -20,7 +33,8 @@ try:
         st.error("필수 환경 변수가 .env 파일에 설정되지 않았습니다. (SUPABASE_URL, SUPABASE_KEY, STREAMLIT_APP_PASSWORD)")
         st.stop()
 
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase = get_supabase_client(SUPABASE_URL, SUPABASE_KEY)
+    start_metrics_server()
     
 except Exception as e:
     st.error(f"초기화 중 에러 발생: {e}")
@@ -54,104 +68,120 @@ def check_password():
     return False
 
 # --- 데이터 로딩 함수 ---
-@st.cache_data(ttl=600) # 10분 동안 캐시
+DETAIL_PREFETCH_TOP_N = 50 # 상세 정보를 미리 준비해 둘 랭킹 상위 영상 수
+
+RANKING_CACHE_TTL_SEC = 600 # 랭킹 데이터가 신선하다고 보는 시간 (10분)
+RANKING_REFRESH_AHEAD_SEC = 120 # 만료 2분 전부터 백그라운드에서 미리 갱신
+
+@st.cache_resource # 프로세스당 1개, 세션 간 공유
+def get_ranking_cache():
+    """
+    영상 랭킹용 공유 stale-while-revalidate 캐시를 만들고 백그라운드 갱신 스레드를 시작합니다.
+    같은 호스트의 레플리카들은 SQLite 백엔드로 결과를 공유합니다.
+    """
+    cache = SWRCache(get_shared_cache_backend(), 'video_ranking', load_video_ranking,
+                     fresh_sec=RANKING_CACHE_TTL_SEC, refresh_ahead_sec=RANKING_REFRESH_AHEAD_SEC)
+    cache.start_background_refresher()
+    return cache
+
+@st.cache_resource
+def get_channel_ranking_cache():
+    """채널 랭킹용 공유 stale-while-revalidate 캐시를 만들고 백그라운드 갱신 스레드를 시작합니다."""
+    cache = SWRCache(get_shared_cache_backend(), 'channel_ranking', load_channel_ranking,
+                     fresh_sec=RANKING_CACHE_TTL_SEC, refresh_ahead_sec=RANKING_REFRESH_AHEAD_SEC)
+    cache.start_background_refresher()
+    return cache
+
+@st.cache_resource
+def get_shared_cache_backend():
+    return make_backend()
+
 def fetch_video_ranking():
     """
-    DB에서 데이터를 가져와 다양한 지표를 계산하고 랭킹을 반환합니다.
+    공유 캐시에서 영상 랭킹을 즉시 반환합니다. (갱신은 백그라운드에서 진행되며 요청을 막지 않음)
     """
     try:
-        print("DB에서 종합 랭킹 데이터를 가져옵니다...")
-        # 1. 각 테이블에서 데이터 가져오기
-        videos_res = supabase.table('videos').select('video_id, channel_id, title, published_at, duration_sec, tags, thumbnail_url').execute()
-        stats_res = supabase.table('video_stats').select('video_id, view_count, like_count, comment_count, timestamp').execute()
-        channels_res = supabase.table('channels').select('channel_id, name').execute()
-
-        # 2. Pandas DataFrame으로 변환
-        videos_df = pd.DataFrame(videos_res.data)
-        stats_df = pd.DataFrame(stats_res.data)
-        channels_df = pd.DataFrame(channels_res.data)
-
-        if videos_df.empty or stats_df.empty or channels_df.empty:
-            st.warning("아직 데이터베이스에 분석할 데이터가 충분하지 않습니다.")
-            return pd.DataFrame()
-
-        # 각 video_id별 최신 통계만 유지
-        stats_df = stats_df.sort_values(by='timestamp', ascending=False).drop_duplicates(subset=['video_id'])
-
-        # 3. 모든 DataFrame 병합
-        df = pd.merge(videos_df, stats_df, on='video_id')
-        df = pd.merge(df, channels_df, on='channel_id')
-
-        # 4. 시간 관련 데이터 처리
-        df['published_at'] = pd.to_datetime(df['published_at'])
-        now_utc = datetime.now(timezone.utc)
-        df['hours_since_published'] = (now_utc - df['published_at']).dt.total_seconds() / 3600
-        
-        # 5. 신규 지표 계산 (0으로 나누기 방지)
-        df['VPH'] = (df['view_count'] / (df['hours_since_published'] + 1)).round(0).astype(int)
-        df['like_rate'] = ((df['like_count'] / (df['view_count'] + 1)) * 100).round(2)
-        df['comment_rate'] = ((df['comment_count'] / (df['view_count'] + 1)) * 100).round(2)
-        df['views_per_minute'] = (df['view_count'] / ((df['duration_sec'] / 60) + 0.01)).round(0).astype(int)
-
-        # 6. 화면에 표시할 컬럼 선택 및 이름 변경
-        result_df = df[[
-            'video_id', 'channel_id', 'title', 'name', 'VPH', 'like_rate', 'comment_rate', 
-            'views_per_minute', 'like_count', 'view_count', 'published_at', 'duration_sec', 'tags', 'thumbnail_url'
-        ]]
-        result_df.columns = [
-            'video_id', 'channel_id', '제목', '채널명', 'VPH', '좋아요율(%)', '댓글율(%)', 
-            '분당조회수', '좋아요', '총조회수', '게시일', '영상길이(초)', '태그', '썸네일URL'
-        ]
-        
-        # 7. VPH 기준으로 내림차순 정렬
-        result_df = result_df.sort_values(by='VPH', ascending=False)
-        
-        # 인덱스 리셋 (순위 표시용)
-        result_df = result_df.reset_index(drop=True)
-        result_df.index += 1
-
-        print("데이터 로딩 및 가공 완료.")
-        return result_df
-
+        ranking = get_ranking_cache().get()
     except Exception as e:
         st.error(f"데이터를 가져오는 중 오류가 발생했습니다: {e}")
         return pd.DataFrame()
+    if ranking.empty:
+        st.warning("아직 데이터베이스에 분석할 데이터가 충분하지 않습니다.")
+    return ranking
+
+def load_video_ranking():
+    """
+    DB에서 데이터를 가져와 다양한 지표를 계산하고 랭킹을 반환합니다. (공유 캐시의 loader, 백그라운드 스레드에서 실행)
+    """
+    print("DB에서 종합 랭킹 데이터를 가져옵니다...")
+    # 1. 로컬 Parquet 캐시를 읽고 마지막 동기화 이후 변경분만 DB에서 받아 합침
+    videos_df = sync_table(supabase, 'videos').drop(columns=['updated_at'])
+    # video_stats 전체 이력 대신 영상별 최신 스냅샷 테이블만 조회 (영상당 1행)
+    stats_df = sync_table(supabase, 'video_latest_stats')
+    channels_df = sync_table(supabase, 'channels')[['channel_id', 'name']]
+
+    # 2. 병합 및 지표 계산
+    with telemetry.span('ranking.build') as fields:
+        result_df = build_video_ranking(videos_df, stats_df, channels_df)
+        fields['rows'] = len(result_df)
+
+    print("데이터 로딩 및 가공 완료.")
+    return result_df
+
+@st.cache_resource(max_entries=1) # 랭킹 버전이 바뀔 때만 재생성, 세션 간 공유
+def get_video_detail_store(ranking_version, _ranking_df):
+    """
+    랭킹 데이터로 video_id 인덱스 기반 상세 정보 저장소를 만들어 반환합니다. (상위 영상은 미리 준비)
+    """
+    return VideoDetailStore(_ranking_df, prefetch_top_n=DETAIL_PREFETCH_TOP_N)
 
-@st.cache_data(ttl=600) # 10분 동안 캐시
 def fetch_video_details(video_id: str):
     """
-    특정 video_id에 대한 상세 정보를 DB에서 가져와 반환합니다.
+    특정 video_id에 대한 상세 정보를 반환합니다.
+    랭킹에 있는 영상은 메모리 저장소에서 바로 꺼내고, 없는 영상만 DB에서 조회합니다.
+    """
+    ranking_cache = get_ranking_cache()
+    ranking_df = ranking_cache.get()
+    store = get_video_detail_store(ranking_cache.version, ranking_df)
+    details = store.get(video_id)
+    if details is not None:
+        telemetry.record_cache('video_detail_store', 'hit')
+        return details
+    telemetry.record_cache('video_detail_store', 'miss')
+    details = fetch_video_details_from_db(video_id)
+    if details is not None:
+        # 랭킹과 같은 기준(같은 카테고리의 랭킹 영상 대비)으로 백분위를 붙임
+        details = {**details, **store.category_percentiles(details.get('category_id'), details)}
+    return details
+
+@st.cache_data(ttl=600) # 10분 동안 캐시
+def fetch_video_details_from_db(video_id: str):
+    """
+    랭킹에 없는 video_id의 상세 정보를 DB에서 한 번의 조인 쿼리로 가져와 반환합니다.
+    (videos + channels + video_latest_stats 외래 키 임베딩)
     """
     try:
         print(f"DB에서 video_id: {video_id} 에 대한 상세 데이터를 가져옵니다...")
-        
-        # 1. 각 테이블에서 데이터 가져오기
-        video_res = supabase.table('videos').select('video_id, channel_id, title, published_at, tags, duration_sec, thumbnail_url').eq('video_id', video_id).single().execute()
-        # 최신 통계만 가져오도록 수정
-        stats_res = supabase.table('video_stats').select('view_count, like_count, comment_count').eq('video_id', video_id).order('timestamp', desc=True).limit(1).execute()
-        channel_res = supabase.table('channels').select('name').eq('channel_id', video_res.data['channel_id']).single().execute()
 
-        video_data = video_res.data
-        stats_data = stats_res.data[0] if stats_res.data else {}
-        channel_data = channel_res.data
+        # 1. 영상, 채널명, 최신 통계를 한 번에 가져오기 (st.cache_data 미스일 때만 실행되므로 구간 횟수 = 미스 횟수)
+        with telemetry.span('db.query', query='video_detail'):
+            video_res = supabase.table('videos').select(
+                'video_id, channel_id, category_id, title, published_at, tags, duration_sec, thumbnail_url, '
+                'channels(name), video_latest_stats(view_count, like_count, comment_count)'
+            ).eq('video_id', video_id).limit(1).execute()
 
-        if not video_data:
+        if not video_res.data:
             st.warning(f"video_id: {video_id} 에 대한 데이터를 찾을 수 없습니다.")
             return None
 
-        # 데이터 병합
-        details = {**video_data, **stats_data, **channel_data}
+        # 데이터 병합 (임베딩 결과는 PostgREST 버전에 따라 객체 또는 리스트로 옴)
+        video_data = dict(video_res.data[0])
+        channel_data = _first_embedded(video_data.pop('channels', None))
+        stats_data = _first_embedded(video_data.pop('video_latest_stats', None))
+        details = {'view_count': 0, 'like_count': 0, 'comment_count': 0, **video_data, **stats_data, **channel_data}
 
-        # 2. 시간 관련 데이터 처리
-        details['published_at'] = pd.to_datetime(details['published_at'])
-        now_utc = datetime.now(timezone.utc)
-        details['hours_since_published'] = (now_utc - details['published_at']).total_seconds() / 3600
-        
-        # 3. 신규 지표 계산 (0으로 나누기 방지)
-        details['VPH'] = int(round(details['view_count'] / (details['hours_since_published'] + 1)))
-        details['like_rate'] = round((details['like_count'] / (details['view_count'] + 1)) * 100, 2)
-        details['comment_rate'] = round((details['comment_count'] / (details['view_count'] + 1)) * 100, 2)
-        details['views_per_minute'] = int(round(details['view_count'] / ((details['duration_sec'] / 60) + 0.01)))
+        # 2. 지표 계산 (랭킹과 같은 metrics.py 커널)
+        details = engagement_for_row(details)
 
         print(f"video_id: {video_id} 에 대한 상세 데이터 로딩 및 가공 완료.")
         return details
@@ -160,6 +190,201 @@ def fetch_video_details(video_id: str):
         st.error(f"video_id: {video_id} 상세 데이터를 가져오는 중 오류가 발생했습니다: {e}")
         return None
 
+def _first_embedded(value):
+    """PostgREST 임베딩 결과(객체/리스트/None)를 dict 하나로 정규화합니다."""
+    if isinstance(value, list):
+        return value[0] if value else {}
+    return value or {}
+
+
+def fetch_channel_ranking():
+    """
+    공유 캐시에서 채널 랭킹을 즉시 반환합니다. (갱신은 백그라운드에서 진행되며 요청을 막지 않음)
+    """
+    try:
+        return get_channel_ranking_cache().get()
+    except Exception as e:
+        st.error(f"채널 데이터를 가져오는 중 오류가 발생했습니다: {e}")
+        return pd.DataFrame()
+
+def load_channel_ranking():
+    """
+    channels 테이블에 저장된 성장 지표(collector.py 채널 수집 단계에서 계산)로 채널 랭킹을 반환합니다. (공유 캐시의 loader)
+    """
+    print("DB에서 채널 랭킹 데이터를 가져옵니다...")
+    channels_df = sync_table(supabase, 'channels')
+    if channels_df.empty:
+        return pd.DataFrame()
+
+    for column in ['subscriber_count', 'weekly_subscriber_growth', 'growth_acceleration']:
+        channels_df[column] = pd.to_numeric(channels_df[column], errors='coerce')
+    channels_df = channels_df.dropna(subset=['subscriber_count'])
+
+    # 주간 구독자 성장률 (%)
+    previous_subscribers = channels_df['subscriber_count'] - channels_df['weekly_subscriber_growth']
+    channels_df['weekly_growth_rate'] = (channels_df['weekly_subscriber_growth'] / (previous_subscribers + 1) * 100).round(2)
+
+    result_df = channels_df[[
+        'channel_id', 'thumbnail_url', 'name', 'subscriber_count', 'weekly_subscriber_growth', 'weekly_growth_rate', 'growth_acceleration'
+    ]]
+    result_df.columns = ['channel_id', '썸네일', '채널명', '구독자 수', '주간 구독자 성장수', '주간 성장률(%)', '성장 가속도']
+    result_df = result_df.sort_values(by=['주간 성장률(%)', '구독자 수'], ascending=False, na_position='last')
+    result_df = result_df.reset_index(drop=True)
+    result_df.index += 1
+
+    print("채널 랭킹 데이터 로딩 완료.")
+    return result_df
+
+
+# --- 키워드 기회 발굴 ---
+KEYWORD_STALE_DAYS = 2 # 이 기간 동안 지표가 갱신되지 않은 키워드(최근 영상에서 사라진 키워드)는 제외
+KEYWORD_TOP_N = 100
+KEYWORD_VIDEOS_LIMIT = 50
+KEYWORD_VIDEOS_WINDOW_DAYS = 14 # keyword_index.WINDOW_DAYS와 같게 (지표를 계산한 최근 영상만 표시)
+
+@st.cache_resource
+def get_keyword_cache():
+    """키워드 기회 랭킹용 공유 stale-while-revalidate 캐시를 만들고 백그라운드 갱신 스레드를 시작합니다."""
+    cache = SWRCache(get_shared_cache_backend(), 'keyword_opportunities', load_keyword_opportunities,
+                     fresh_sec=RANKING_CACHE_TTL_SEC, refresh_ahead_sec=RANKING_REFRESH_AHEAD_SEC)
+    cache.start_background_refresher()
+    return cache
+
+def fetch_keyword_opportunities():
+    """공유 캐시에서 키워드 기회 랭킹을 즉시 반환합니다."""
+    try:
+        return get_keyword_cache().get()
+    except Exception as e:
+        st.error(f"키워드 데이터를 가져오는 중 오류가 발생했습니다: {e}")
+        return pd.DataFrame()
+
+def load_keyword_opportunities():
+    """
+    keywords 테이블(collector.py 키워드 색인 단계에서 계산)로 기회 점수 순 키워드 랭킹을 반환합니다. (공유 캐시의 loader)
+    """
+    print("DB에서 키워드 지표를 가져옵니다...")
+    keywords_df = sync_table(supabase, 'keywords')
+    if keywords_df.empty:
+        return pd.DataFrame()
+
+    cutoff = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=KEYWORD_STALE_DAYS)
+    keywords_df = keywords_df[keywords_df['last_updated'] >= cutoff]
+    result_df = keywords_df[[
+        'keyword', 'opportunity_score', 'saturation_index', 'contagion_index', 'avg_vph', 'video_count', 'recent_video_count', 'channel_count'
+    ]]
+    result_df.columns = ['키워드', '기회 점수', '포화도', '전염성', '평균 VPH', '영상 수', '최근 7일 영상 수', '채널 수']
+    result_df = result_df.sort_values(by='기회 점수', ascending=False).reset_index(drop=True)
+    result_df.index += 1
+
+    print("키워드 지표 로딩 완료.")
+    return result_df
+
+@st.cache_data(ttl=600) # 10분 동안 캐시
+def fetch_keyword_videos(keyword: str):
+    """
+    keyword_videos 역색인에서 키워드가 등장한 최근 영상 ID를 조회합니다. (기본키 인덱스 조회)
+    오래된 영상이 limit을 채우지 않도록 videos를 inner 임베딩해 게시일로 거릅니다.
+    """
+    cutoff = (pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=KEYWORD_VIDEOS_WINDOW_DAYS)).isoformat()
+    try:
+        with telemetry.span('db.query', query='keyword_videos'):
+            res = (
+                supabase.table('keyword_videos').select('video_id, source, videos!inner(published_at)')
+                .eq('keyword', keyword).gte('videos.published_at', cutoff)
+                .limit(KEYWORD_VIDEOS_LIMIT * 4).execute()
+            )
+        return pd.DataFrame(res.data or [], columns=['video_id', 'source'])
+    except Exception as e:
+        st.error(f"키워드 영상 목록을 가져오는 중 오류가 발생했습니다: {e}")
+        return pd.DataFrame(columns=['video_id', 'source'])
+
+def render_keyword_opportunities():
+    """기회 점수 순 키워드 표와, 선택한 키워드가 쓰인 영상 목록을 표시합니다."""
+    keyword_data = fetch_keyword_opportunities()
+    if keyword_data.empty:
+        st.info("키워드 지표가 아직 없습니다. collector.py를 실행하여 키워드 색인을 만들어주세요.")
+        return
+
+    query = st.text_input("키워드 검색", placeholder="예: 고양이").strip().lower()
+    if query:
+        keyword_data = keyword_data[keyword_data['키워드'].str.contains(query, regex=False)]
+
+    st.subheader("기회 점수 순 키워드")
+    st.dataframe(
+        keyword_data.head(KEYWORD_TOP_N),
+        use_container_width=True,
+        column_config={
+            '기회 점수': st.column_config.NumberColumn(help="log(1 + 평균 VPH) × (1 + 전염성) ÷ 포화도"),
+            '포화도': st.column_config.NumberColumn(help="영상 수 비중 ÷ VPH 비중. 1보다 작으면 수요에 비해 영상이 적음"),
+            '전염성': st.column_config.NumberColumn(help="최근 7일 사용 채널 수 ÷ (그 이전 7일 사용 채널 수 + 1)"),
+            '평균 VPH': st.column_config.NumberColumn(format='%.1f'),
+        },
+    )
+    if keyword_data.empty:
+        return
+
+    selected_keyword = st.selectbox("영상 목록을 볼 키워드", keyword_data['키워드'].head(KEYWORD_TOP_N))
+    postings = fetch_keyword_videos(selected_keyword)
+    video_ranking_data = fetch_video_ranking()
+    if postings.empty or video_ranking_data.empty:
+        st.info("이 키워드가 쓰인 영상을 찾을 수 없습니다.")
+        return
+    keyword_videos = video_ranking_data.merge(postings, on='video_id')
+    keyword_videos['출처'] = keyword_videos['source'].map({'tag': '태그', 'title': '제목'})
+    st.dataframe(
+        keyword_videos[['썸네일URL', '제목', '채널명', 'VPH', '총조회수', '게시일', '출처']].head(KEYWORD_VIDEOS_LIMIT),
+        use_container_width=True,
+        hide_index=True,
+        column_config={'썸네일URL': st.column_config.ImageColumn('썸네일', width='small')},
+    )
+
+
+# --- 랭킹 표 렌더링 ---
+RANKING_SORT_COLUMNS = ['VPH', 'VPH 백분위', '좋아요율(%)', '좋아요율 백분위', '댓글율(%)', '분당조회수', '총조회수', '좋아요', '게시일']
+RANKING_PAGE_SIZES = [25, 50, 100]
+RANKING_DISPLAY_COLUMNS = ['썸네일URL', '제목', '채널명', 'VPH', 'VPH 백분위', '좋아요율(%)', '댓글율(%)', '분당조회수', '총조회수', '게시일']
+
+def render_ranking_table(video_ranking_data):
+    """
+    랭킹을 서버 측에서 정렬·페이지 분할한 뒤 현재 페이지만 st.dataframe 하나로 표시합니다.
+    표에서 행을 선택하면 session_state['selected_video_id']가 갱신되어 아래 상세 분석에 반영됩니다.
+    """
+    col_sort, col_order, col_size, col_page = st.columns([2, 1, 1, 1])
+    with col_sort:
+        sort_column = st.selectbox("정렬 기준", RANKING_SORT_COLUMNS, key='ranking_sort_column')
+    with col_order:
+        ascending = st.selectbox("정렬 순서", ["내림차순", "오름차순"], key='ranking_sort_order') == "오름차순"
+    with col_size:
+        page_size = st.selectbox("페이지당 영상 수", RANKING_PAGE_SIZES, key='ranking_page_size')
+    total_pages = max(1, -(-len(video_ranking_data) // page_size))
+    with col_page:
+        page = st.number_input(f"페이지 (총 {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key='ranking_page')
+
+    # 인덱스(VPH 순위)는 유지한 채로 정렬하고, 현재 페이지 구간만 잘라냄
+    sorted_df = video_ranking_data.sort_values(by=sort_column, ascending=ascending, kind='mergesort')
+    page_df = sorted_df.iloc[(page - 1) * page_size:page * page_size]
+
+    event = st.dataframe(
+        page_df[RANKING_DISPLAY_COLUMNS],
+        use_container_width=True,
+        on_select='rerun',
+        selection_mode='single-row',
+        # 정렬/페이지가 바뀌면 이전 선택(행 번호)이 다른 영상을 가리키지 않도록 키를 분리
+        key=f"ranking_table_{sort_column}_{ascending}_{page_size}_{page}",
+        column_config={
+            '썸네일URL': st.column_config.ImageColumn('썸네일', width='small'),
+            'VPH': st.column_config.NumberColumn(format='%d'),
+            '분당조회수': st.column_config.NumberColumn(format='%d'),
+            'VPH 백분위': st.column_config.ProgressColumn(help="같은 카테고리 영상 중 VPH 백분위", min_value=0, max_value=100, format='%.1f'),
+            '총조회수': st.column_config.NumberColumn(format='%d'),
+            '게시일': st.column_config.DatetimeColumn(format='YYYY-MM-DD HH:mm'),
+        },
+    )
+    selected_rows = event.selection.rows
+    if selected_rows:
+        st.session_state['selected_video_id'] = page_df.iloc[selected_rows[0]]['video_id']
+    st.caption(f"총 {len(video_ranking_data):,}개 영상 중 {len(page_df)}개 표시 · 행을 선택하면 상세 분석이 표시됩니다.")
+
 
 # --- 메인 대시보드 로직 ---
 def main_dashboard():
@@ -175,7 +400,7 @@ def main_dashboard():
 
     with tab2:
         st.header("새로운 콘텐츠 아이디어와 키워드")
-        st.write("이곳에 구글 트렌드, 떡상 키워드 분석 결과가 표시됩니다.")
+        render_keyword_opportunities()
 
     with tab3:
         st.header("영상 성과 분석 (VPH 순 랭킹)")
@@ -185,48 +410,17 @@ def main_dashboard():
         if not video_ranking_data.empty:
             st.subheader("전체 영상 랭킹")
             
-            # 헤더 컬럼
-            col_header_idx, col_header_title, col_header_channel, col_header_vph, col_header_button = st.columns([0.5, 3, 1.5, 1, 1])
-            with col_header_idx:
-                st.markdown("<p style='font-size: 18px;'><b>순위</b></p>", unsafe_allow_html=True)
-            with col_header_title:
-                st.markdown("<p style='font-size: 18px;'><b>제목</b></p>", unsafe_allow_html=True)
-            with col_header_channel:
-                st.markdown("<p style='font-size: 18px;'><b>채널명</b></p>", unsafe_allow_html=True)
-            with col_header_vph:
-                st.markdown("<p style='font-size: 18px;'><b>VPH</b></p>", unsafe_allow_html=True)
-            with col_header_button:
-                st.write(" ") # 버튼 컬럼 헤더
-
-            st.markdown("---")
-
-            # 각 영상에 대한 정보와 버튼을 표시
-            for index, row in video_ranking_data.iterrows():
-                col_idx, col_title, col_channel, col_vph, col_button = st.columns([0.5, 3, 1.5, 1, 1])
-                
-                with col_idx:
-                    st.markdown(f"<p style='font-size: 18px;'>{index}</p>", unsafe_allow_html=True)
-                with col_title:
-                    st.markdown(f"<p style='font-size: 18px;'>{row['제목']}</p>", unsafe_allow_html=True)
-                with col_channel:
-                    st.markdown(f"<p style='font-size: 18px;'>{row['채널명']}</p>", unsafe_allow_html=True)
-                with col_vph:
-                    st.markdown(f"<p style='font-size: 18px;'>{row['VPH']:,}</p>", unsafe_allow_html=True)
-                with col_button:
-                    if st.button("상세 보기", key=f"detail_button_{row['video_id']}"):
-                        st.session_state['selected_video_id'] = row['video_id']
-                        st.rerun()
-            
+            # 정렬/페이지 단위로 잘라낸 한 페이지만 단일 표 컴포넌트로 렌더링 (행 선택 시 상세 보기)
+            render_ranking_table(video_ranking_data)
+
             # 선택된 영상 상세 정보 표시
             if 'selected_video_id' in st.session_state and st.session_state.selected_video_id:
                 selected_video_id = st.session_state.selected_video_id
-                selected_row = video_ranking_data[video_ranking_data['video_id'] == selected_video_id].iloc[0]
-
-                st.markdown("---") # 구분선
-                st.subheader(f"🎬 {selected_row['제목']} 상세 분석")
                 video_details = fetch_video_details(selected_video_id)
 
+                st.markdown("---") # 구분선
                 if video_details:
+                    st.subheader(f"🎬 {video_details['title']} 상세 분석")
                     st.markdown(f"<h3 style='font-size: 18px;'><a href='https://www.youtube.com/watch?v={video_details['video_id']}' target='_blank'>{video_details['title']}</a></h3>", unsafe_allow_html=True)
                     col1, col2 = st.columns([1, 2])
                     with col1:
@@ -245,6 +439,8 @@ def main_dashboard():
                         st.markdown(f"<p style='font-size: 18px; color: #26B2FF;'><b>좋아요율:</b> {video_details.get('like_rate', 0):.2f}%</p>", unsafe_allow_html=True)
                         st.markdown(f"<p style='font-size: 18px; color: #26B2FF;'><b>댓글율:</b> {video_details.get('comment_rate', 0):.2f}%</p>", unsafe_allow_html=True)
                         st.markdown(f"<p style='font-size: 18px; color: #26B2FF;'><b>분당 조회수:</b> {video_details.get('views_per_minute', 0):,}</p>", unsafe_allow_html=True)
+                        if video_details.get('vph_percentile') is not None:
+                            st.markdown(f"<p style='font-size: 18px; color: #26B2FF;'><b>카테고리 내 백분위:</b> VPH {video_details['vph_percentile']:.1f} / 좋아요율 {video_details.get('like_rate_percentile', 0):.1f}</p>", unsafe_allow_html=True)
                     
                     if video_details.get('tags'):
                         st.markdown(f"<p style='font-size: 18px;'><b>태그:</b> {', '.join(video_details['tags'])}</p>", unsafe_allow_html=True)
@@ -258,7 +454,23 @@ def main_dashboard():
 
     with tab4:
         st.header("채널 성장 분석 및 랭킹")
-        st.write("이곳에 주간 구독자 성장률 기반의 채널 랭킹이 표시됩니다.")
+
+        channel_ranking_data = fetch_channel_ranking()
+
+        if not channel_ranking_data.empty:
+            st.subheader("주간 구독자 성장률 순 채널 랭킹")
+            st.dataframe(
+                channel_ranking_data.drop(columns=['channel_id']),
+                use_container_width=True,
+                column_config={
+                    '썸네일': st.column_config.ImageColumn('썸네일', width='small'),
+                    '구독자 수': st.column_config.NumberColumn(format='%d'),
+                    '주간 구독자 성장수': st.column_config.NumberColumn(format='%d'),
+                    '성장 가속도': st.column_config.NumberColumn(help="최근 7일 일평균 구독자 증가 - 그 이전 7일 일평균 증가 (명/일)"),
+                },
+            )
+        else:
+            st.info("채널 통계가 아직 없습니다. collector.py를 실행하여 채널 데이터를 수집해주세요.")
 
 # --- 앱 실행 ---
 if __name__ == "__main__":
@@ -0,0 +1,248 @@
+# benchmark.py
+# 수집기/대시보드 오프라인 벤치마크입니다. 실제 YouTube/Supabase 대신 fake_backends의 대역을 사용합니다.
+#
+# 규모(video_stats 행 수)마다 별도 프로세스에서 다음을 측정합니다. (프로세스별 최대 RSS를 따로 재기 위함)
+# - collect_fetch: 카테고리별 fetch_popular_videos (인기 차트 페이지 수집 + 정규화)
+# - collect_save:  save_videos_to_db (스풀 기록 + 일괄 쓰기)
+# - ranking_cold:  로컬 캐시가 빈 상태에서 sync_table 3개 + 랭킹 계산 (대시보드 콜드 스타트)
+# - ranking_warm:  캐시가 있는 상태에서 같은 작업 (변경분만 동기화)
+# 결과는 .benchmarks/에 커밋별 JSON으로 저장되고, 이전 결과보다 threshold 이상 느려진 항목을 회귀로 표시합니다.
+#
+# 사용 예: python benchmark.py --scales 10000,100000,1000000
+#          python benchmark.py --scales 10000 --api-latency-ms 50 --db-latency-ms 20
+#          python benchmark.py --compare .benchmarks/20261001-120000-abc1234.json
+
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, '.benchmarks')
+DEFAULT_SCALES = '10000,100000,1000000'
+# 회귀 판정에 쓰는 시간 지표 (초)
+TIMED_STAGES = ('collect_fetch', 'collect_save', 'ranking_cold', 'ranking_warm')
+# 시드 영상에 돌아가며 붙이는 카테고리 (카테고리 내 백분위 계산 부하를 실제와 비슷하게)
+SEED_CATEGORY_IDS = ['15', '22', '23', '26', '28']
+
+
+def peak_rss_mb():
+    # Linux의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed_database(client, stats_rows, snapshots_per_video, seed=0):
+    """video_stats가 stats_rows행이 되도록 채널/영상/통계 이력을 적재합니다. (최근 14일에 고르게 분포)"""
+    import random
+
+    rng = random.Random(seed)
+    video_count = max(stats_rows // snapshots_per_video, 1)
+    channel_count = max(video_count // 20, 1)
+    now = datetime.now(timezone.utc)
+
+    client.bulk_load('channels', (
+        {'channel_id': f"UCseed{index:07d}", 'name': f"시드 채널 {index}", 'updated_at': now} for index in range(channel_count)
+    ))
+    published = [now - timedelta(hours=rng.uniform(1, 24 * 14)) for _ in range(video_count)]
+    client.bulk_load('videos', (
+        {
+            'video_id': f"seed{index:08d}", 'channel_id': f"UCseed{index % channel_count:07d}",
+            'category_id': SEED_CATEGORY_IDS[index % len(SEED_CATEGORY_IDS)],
+            'title': f"시드 영상 {index}", 'published_at': published[index], 'tags': ['시드', f"태그{index % 50}"],
+            'duration_sec': 60 + index % 1200, 'thumbnail_url': '', 'updated_at': now,
+        }
+        for index in range(video_count)
+    ))
+
+    def stats():
+        for snapshot in range(snapshots_per_video):
+            for index in range(video_count):
+                age = now - published[index]
+                timestamp = published[index] + age * (snapshot + 1) / snapshots_per_video
+                views = int(1000 * (snapshot + 1) * (1 + index % 7))
+                yield {
+                    'video_id': f"seed{index:08d}", 'timestamp': timestamp,
+                    'view_count': views, 'like_count': views // 30, 'comment_count': views // 300,
+                }
+    client.bulk_load('video_stats', stats())
+    client.install_triggers()
+    return video_count, channel_count
+
+
+def run_worker(args):
+    """한 규모에 대한 측정을 현재 프로세스에서 실행하고 결과 dict를 반환합니다."""
+    work_dir = tempfile.mkdtemp(prefix='searchlight-bench-')
+    # local_cache는 import 시점에 캐시 경로를 정하므로 import 전에 지정
+    os.environ['DASHBOARD_CACHE_DIR'] = os.path.join(work_dir, 'dashboard_cache')
+    # 방금 적재한 데이터는 모두 high-water mark 겹침 구간에 들어가므로 끄고 '변경분 없음' 동기화를 측정
+    os.environ['DASHBOARD_CACHE_HWM_OVERLAP_SEC'] = '0'
+    os.environ.pop('SUPABASE_DB_URL', None)
+
+    import collector
+    from fake_backends import FakeSupabaseClient, FakeYouTubeClient
+    from local_cache import sync_table
+    from ranking import build_video_ranking
+    from spool import WriteAheadSpool
+
+    result = {'scale': args.scale}
+    client = FakeSupabaseClient(os.path.join(work_dir, 'fake_supabase.sqlite3'), latency_sec=args.db_latency_ms / 1000)
+    youtube = FakeYouTubeClient(seed=args.seed, chart_size=args.chart_depth, latency_sec=args.api_latency_ms / 1000)
+
+    started = time.perf_counter()
+    result['videos'], result['channels'] = seed_database(client, args.scale, args.snapshots_per_video, seed=args.seed)
+    result['seed_sec'] = time.perf_counter() - started
+
+    # 수집기가 실제 클라이언트 대신 대역을 쓰도록 연결
+    collector.get_supabase = lambda: client
+    collector.get_youtube_client = lambda api_key: youtube
+    collector._spool = WriteAheadSpool(os.path.join(work_dir, 'spool.sqlite3'))
+
+    started = time.perf_counter()
+    videos, channels, stats = [], [], []
+    for category_id in collector.TARGET_CATEGORY_IDS[:args.categories]:
+        fetched = collector.fetch_popular_videos('fake-key', category_id, max_results=args.chart_depth)
+        videos.extend(fetched[0])
+        channels.extend(fetched[1])
+        stats.extend(fetched[2])
+    result['collect_fetch'] = time.perf_counter() - started
+    result['collected_videos'] = len(videos)
+
+    started = time.perf_counter()
+    result['collect_save_ok'] = collector.save_videos_to_db(videos, channels, stats)
+    result['collect_save'] = time.perf_counter() - started
+    saved_rows = len(videos) + len(channels) + len(stats)
+    result['collect_rows_per_sec'] = saved_rows / result['collect_save'] if result['collect_save'] else 0.0
+
+    def load_ranking():
+        videos_df = sync_table(client, 'videos').drop(columns=['updated_at'])
+        stats_df = sync_table(client, 'video_latest_stats')
+        channels_df = sync_table(client, 'channels')[['channel_id', 'name']]
+        return build_video_ranking(videos_df, stats_df, channels_df)
+
+    for stage in ('ranking_cold', 'ranking_warm'):
+        requests_before = client.request_count
+        started = time.perf_counter()
+        ranking = load_ranking()
+        result[stage] = time.perf_counter() - started
+        result[f'{stage}_requests'] = client.request_count - requests_before
+    result['ranking_rows'] = len(ranking)
+    result['ranking_rows_per_sec'] = len(ranking) / result['ranking_cold'] if result['ranking_cold'] else 0.0
+    result['youtube_requests'] = youtube.request_count
+    result['peak_rss_mb'] = peak_rss_mb()
+    client.close()
+    return result
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def latest_result_file(exclude=None):
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')))
+    files = [path for path in files if path != exclude]
+    return files[-1] if files else None
+
+
+def find_regressions(current, baseline, threshold):
+    """같은 규모의 측정값이 기준보다 threshold 비율 이상 느려졌거나 RSS가 늘어난 항목 목록을 반환합니다."""
+    baseline_by_scale = {entry['scale']: entry for entry in baseline['results']}
+    regressions = []
+    for entry in current['results']:
+        previous = baseline_by_scale.get(entry['scale'])
+        if previous is None:
+            continue
+        for metric in TIMED_STAGES + ('peak_rss_mb',):
+            before, after = previous.get(metric), entry.get(metric)
+            if before and after and after > before * (1 + threshold):
+                regressions.append(f"scale={entry['scale']:,} {metric}: {before:.3f} -> {after:.3f} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_table(results):
+    header = f"{'video_stats':>12} {'fetch(s)':>9} {'save(s)':>8} {'save rows/s':>12} {'rank cold(s)':>13} {'rank warm(s)':>13} {'RSS(MB)':>8}"
+    print(header)
+    print('-' * len(header))
+    for entry in results:
+        if 'error' in entry:
+            print(f"{entry['scale']:>12,} 실패: {entry['error']}")
+            continue
+        print(f"{entry['scale']:>12,} {entry['collect_fetch']:>9.2f} {entry['collect_save']:>8.2f} {entry['collect_rows_per_sec']:>12,.0f} "
+              f"{entry['ranking_cold']:>13.2f} {entry['ranking_warm']:>13.2f} {entry['peak_rss_mb']:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Searchlight 오프라인 벤치마크")
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help="쉼표로 구분한 video_stats 행 수 (예: 10000,100000)")
+    parser.add_argument('--snapshots-per-video', type=int, default=20, help="영상당 통계 스냅샷 수 (영상 수 = 규모 / 이 값)")
+    parser.add_argument('--categories', type=int, default=5, help="수집할 카테고리 수")
+    parser.add_argument('--chart-depth', type=int, default=200, help="카테고리당 차트 영상 수")
+    parser.add_argument('--api-latency-ms', type=float, default=0.0, help="YouTube 요청당 지연 시간")
+    parser.add_argument('--db-latency-ms', type=float, default=0.0, help="Supabase 요청당 지연 시간")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', help="비교할 이전 결과 파일 (기본: .benchmarks의 가장 최근 파일)")
+    parser.add_argument('--threshold', type=float, default=0.15, help="회귀로 판단할 증가 비율")
+    parser.add_argument('--no-save', action='store_true', help="결과를 .benchmarks에 저장하지 않음")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--scale', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # 측정 대상 코드의 print 출력과 섞이지 않도록 결과는 마지막 줄에 JSON으로 출력
+        print(json.dumps(run_worker(args)))
+        return 0
+
+    results = []
+    for scale in (int(value) for value in args.scales.split(',')):
+        print(f"[벤치마크] video_stats {scale:,}행 측정 중...")
+        command = [sys.executable, os.path.abspath(__file__), '--worker', '--scale', str(scale)]
+        for option in ('snapshots_per_video', 'categories', 'chart_depth', 'api_latency_ms', 'db_latency_ms', 'seed'):
+            command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+        completed = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True)
+        if completed.returncode != 0:
+            results.append({'scale': scale, 'error': (completed.stderr.strip().splitlines() or ['알 수 없는 오류'])[-1]})
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    report = {
+        'commit': current_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'options': {key: value for key, value in vars(args).items() if key not in ('worker', 'scale', 'compare', 'no_save')},
+        'results': results,
+    }
+    print()
+    print_table(results)
+
+    saved_path = None
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        saved_path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+        with open(saved_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {os.path.relpath(saved_path, BASE_DIR)}")
+
+    baseline_path = args.compare or latest_result_file(exclude=saved_path)
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        print(f"\n기준 결과({baseline.get('commit')}, {os.path.basename(baseline_path)})와 비교:")
+        for line in regressions:
+            print(f"  [회귀] {line}")
+        if not regressions:
+            print("  회귀 없음")
+        if regressions:
+            return 1
+    return 1 if any('error' in entry for entry in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
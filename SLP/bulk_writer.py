@@ -0,0 +1,249 @@
+# bulk_writer.py
+# Supabase 테이블에 대량의 행을 나누어 쓰는 일괄 쓰기 모듈입니다.
+#
+# - 행을 JSON 크기/행 수 예산에 맞춰 청크로 나누고, 제한된 스레드 풀로 청크를 동시에 씁니다.
+# - 실패한 청크는 한 번 재시도한 뒤 절반씩 나누어(bisection) 다시 써서, 문제가 되는 행만 골라냅니다.
+#   (잘못된 행 하나 때문에 하루치 video_stats 전체를 잃지 않도록)
+#   DB가 행 내용 때문에 거부한 오류(제약 위반 등)일 때만 나누고, 연결 실패/5xx 같은 장애는 나누지 않고
+#   청크 전체를 실패로 돌려주며 WriteStats.unavailable로 표시합니다. (호출자가 나중에 다시 쓰도록)
+# - SUPABASE_DB_URL(Postgres DSN)이 설정되어 있으면 psycopg로 COPY 경로를 사용합니다. (실패 시 REST 경로,
+#   psycopg가 설치되어 있지 않으면 한 번만 경고하고 REST 경로만 사용)
+# - 테이블별 처리량 통계(행 수, 청크 수, 바이트, 소요 시간)를 반환하고 telemetry에 'db.write' 구간과 카운터로 기록합니다.
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import telemetry
+
+DEFAULT_MAX_CHUNK_BYTES = 512 * 1024
+DEFAULT_MAX_CHUNK_ROWS = 1000
+DEFAULT_MAX_WORKERS = 4
+RETRY_DELAY_SEC = 1.0
+# 행 자체가 거부된 오류로 보는 Postgres SQLSTATE 클래스 (22: 데이터 예외, 23: 무결성 제약 위반)
+ROW_ERROR_SQLSTATE_CLASSES = ('22', '23')
+
+
+_copy_supported = None
+
+
+def _copy_available():
+    """psycopg를 import할 수 있으면 True. 결과를 기억해 두어 없을 때 경고는 프로세스당 한 번만 출력합니다."""
+    global _copy_supported
+    if _copy_supported is None:
+        try:
+            import psycopg  # noqa: F401
+            _copy_supported = True
+        except ImportError:
+            _copy_supported = False
+            print("[일괄 쓰기] SUPABASE_DB_URL이 설정되었지만 psycopg가 설치되어 있지 않아 REST 경로만 사용합니다. "
+                  "(pip install 'psycopg[binary]')")
+    return _copy_supported
+
+
+def _env_int(name, default):
+    # .env는 호출하는 스크립트에서 import 이후에 로드되므로 환경 변수는 호출 시점에 읽음
+    return int(os.environ.get(name, str(default)))
+
+
+@dataclass
+class WriteStats:
+    """write_rows 한 번의 처리 결과입니다."""
+    table: str
+    rows_written: int = 0
+    chunks: int = 0
+    bytes_sent: int = 0
+    elapsed_sec: float = 0.0
+    method: str = 'rest'
+    failed_rows: list = field(default_factory=list)
+    # DB 장애(연결 실패, 5xx 등)로 시도조차 못 한 행이 있으면 True (failed_rows에 포함)
+    unavailable: bool = False
+
+    @property
+    def ok(self):
+        return not self.failed_rows
+
+    @property
+    def rows_per_sec(self):
+        return self.rows_written / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+
+    def record(self):
+        """처리 결과를 출력하고 telemetry에 기록합니다."""
+        print(self.summary())
+        telemetry.observe('db.write', self.elapsed_sec, table=self.table, method=self.method,
+                          fields={'rows': self.rows_written, 'bytes': self.bytes_sent, 'failed_rows': len(self.failed_rows)})
+        telemetry.count('db_rows_written', self.rows_written, table=self.table)
+        telemetry.count('db_bytes_sent', self.bytes_sent, table=self.table)
+        telemetry.count('db_requests', self.chunks, table=self.table)
+        if self.failed_rows:
+            telemetry.count('db_rows_failed', len(self.failed_rows), table=self.table)
+
+    def summary(self):
+        return (f"[일괄 쓰기] {self.table} ({self.method}): {self.rows_written:,}행 / {self.chunks}청크 / "
+                f"{self.bytes_sent / 1024:,.1f}KB / {self.elapsed_sec:.2f}초 ({self.rows_per_sec:,.0f}행/초), "
+                f"실패 {len(self.failed_rows)}행")
+
+
+def _row_size(row):
+    return len(json.dumps(row, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+def chunk_rows(rows, max_bytes=None, max_rows=None):
+    """
+    행 목록을 (청크, 바이트 수) 목록으로 나눕니다. 한 청크는 max_bytes와 max_rows를 넘지 않습니다.
+    (기본값: 환경 변수 BULK_MAX_CHUNK_BYTES / BULK_MAX_CHUNK_ROWS)
+    """
+    max_bytes = max_bytes or _env_int("BULK_MAX_CHUNK_BYTES", DEFAULT_MAX_CHUNK_BYTES)
+    max_rows = max_rows or _env_int("BULK_MAX_CHUNK_ROWS", DEFAULT_MAX_CHUNK_ROWS)
+    chunks = []
+    current, current_bytes = [], 0
+    for row in rows:
+        size = _row_size(row)
+        if current and (current_bytes + size > max_bytes or len(current) >= max_rows):
+            chunks.append((current, current_bytes))
+            current, current_bytes = [], 0
+        current.append(row)
+        current_bytes += size
+    if current:
+        chunks.append((current, current_bytes))
+    return chunks
+
+
+def dedupe_rows(rows, key):
+    """같은 키의 행이 여러 개면 마지막 행만 남깁니다. (upsert 한 요청 안의 중복 키는 Postgres 오류)"""
+    if not key:
+        return rows
+    keys = key.split(',')
+    return list({tuple(row[k] for k in keys): row for row in rows}.values())
+
+
+def write_rows(client, table, rows, on_conflict=None, max_workers=None):
+    """
+    rows를 table에 씁니다. on_conflict가 주어지면 upsert, 아니면 insert입니다.
+    WriteStats를 반환하며, 끝까지 실패한 행은 failed_rows에 담깁니다.
+    """
+    started = time.perf_counter()
+    rows = dedupe_rows(rows, on_conflict)
+    stats = WriteStats(table=table)
+    if not rows:
+        return stats
+
+    db_url = os.environ.get("SUPABASE_DB_URL")
+    if db_url and _copy_available():
+        try:
+            stats.bytes_sent = _copy_rows(db_url, table, rows, on_conflict)
+            stats.method = 'copy'
+            stats.rows_written = len(rows)
+            stats.chunks = 1
+            stats.elapsed_sec = time.perf_counter() - started
+            stats.record()
+            return stats
+        except Exception as e:
+            print(f"[일괄 쓰기] {table} COPY 경로 실패, REST 경로로 전환합니다. (에러: {e})")
+
+    chunks = chunk_rows(rows)
+    with ThreadPoolExecutor(max_workers=max_workers or _env_int("BULK_MAX_WORKERS", DEFAULT_MAX_WORKERS)) as executor:
+        results = list(executor.map(lambda chunk: _write_chunk(client, table, chunk[0], on_conflict), chunks))
+
+    for written, failed, unavailable, requests_sent, bytes_sent in results:
+        stats.rows_written += written
+        stats.failed_rows.extend(failed)
+        stats.unavailable = stats.unavailable or unavailable
+        stats.chunks += requests_sent
+        stats.bytes_sent += bytes_sent
+    stats.elapsed_sec = time.perf_counter() - started
+    stats.record()
+    return stats
+
+
+def is_row_error(error):
+    """DB가 행 내용 때문에 거부한 오류(PostgREST APIError/psycopg 오류의 SQLSTATE로 판단)이면 True를 반환합니다."""
+    code = getattr(error, 'code', None) or getattr(error, 'sqlstate', None)
+    return isinstance(code, str) and code[:2] in ROW_ERROR_SQLSTATE_CLASSES
+
+
+def _send(client, table, rows, on_conflict):
+    query = client.table(table)
+    if on_conflict:
+        query.upsert(rows, on_conflict=on_conflict).execute()
+    else:
+        query.insert(rows).execute()
+
+
+def _write_chunk(client, table, rows, on_conflict):
+    """
+    청크 하나를 씁니다. 실패하면 잠시 후 한 번 재시도하고, 그래도 행 오류로 실패하면 절반씩 나누어 씁니다.
+    (쓴 행 수, 실패한 행 목록, DB 장애 여부, 보낸 요청 수, 보낸 바이트 수)를 반환합니다.
+    """
+    requests_sent, bytes_sent = 0, 0
+    pending = [(rows, True)]  # (행 목록, 재시도 가능 여부)
+    written, failed, unavailable = 0, [], False
+    while pending:
+        part, can_retry = pending.pop()
+        requests_sent += 1
+        bytes_sent += sum(_row_size(row) for row in part)
+        try:
+            _send(client, table, part, on_conflict)
+            written += len(part)
+        except Exception as e:
+            if can_retry:
+                # 일시적인 오류일 수 있으므로 같은 청크를 한 번 더 시도
+                time.sleep(RETRY_DELAY_SEC)
+                pending.append((part, False))
+            elif not is_row_error(e):
+                # 장애 중에 나누어 보내 봐야 요청만 늘어나므로 남은 행을 모두 실패로 돌려줌
+                print(f"[일괄 쓰기] {table} 저장 실패 (DB 장애로 판단, {len(part)}행): {e}")
+                failed.extend(part)
+                unavailable = True
+            elif len(part) > 1:
+                middle = len(part) // 2
+                pending.append((part[middle:], False))
+                pending.append((part[:middle], False))
+            else:
+                print(f"[일괄 쓰기] {table} 행 저장 실패: {part[0]} (에러: {e})")
+                failed.extend(part)
+    return written, failed, unavailable, requests_sent, bytes_sent
+
+
+def _copy_rows(db_url, table, rows, on_conflict):
+    """
+    Postgres COPY로 행을 씁니다. upsert는 임시 테이블에 COPY한 뒤 INSERT ... ON CONFLICT로 합칩니다.
+    보낸 바이트 수(추정)를 반환합니다.
+    """
+    import psycopg
+    from psycopg import sql
+    from psycopg.types.json import Jsonb
+
+    columns = list(rows[0].keys())
+    column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+    target = sql.Identifier(table)
+
+    with psycopg.connect(db_url) as conn:
+        with conn.cursor() as cur:
+            if on_conflict:
+                cur.execute(sql.SQL("CREATE TEMP TABLE bulk_stage (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP").format(target))
+                copy_target = sql.Identifier('bulk_stage')
+            else:
+                copy_target = target
+
+            with cur.copy(sql.SQL("COPY {} ({}) FROM STDIN").format(copy_target, column_list)) as copy:
+                for row in rows:
+                    values = [row.get(c) for c in columns]
+                    copy.write_row([Jsonb(v) if isinstance(v, dict) else v for v in values])
+
+            if on_conflict:
+                conflict_columns = on_conflict.split(',')
+                update_columns = [c for c in columns if c not in conflict_columns]
+                if update_columns:
+                    conflict_action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(', ').join(
+                        sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in update_columns
+                    ))
+                else:
+                    conflict_action = sql.SQL("DO NOTHING")
+                cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM bulk_stage ON CONFLICT ({}) {}").format(
+                    target, column_list, column_list,
+                    sql.SQL(', ').join(map(sql.Identifier, conflict_columns)), conflict_action,
+                ))
+    return sum(_row_size(row) for row in rows)
@@ -0,0 +1,76 @@
+# channel_growth.py
+# channel_stats 시계열로 채널 성장 지표를 계산해 channels 테이블에 반영하는 분석 모듈입니다.
+#
+# 채널별 스냅샷을 하나의 DataFrame에 두고, 각 채널의 최신 스냅샷 기준 7일/14일 전 구독자 수를
+# merge_asof로 한 번에 찾아 계산합니다. (채널별 반복 조회 없음)
+# - weekly_subscriber_growth: 최근 7일 구독자 증가 수
+# - growth_acceleration: 최근 7일 일평균 증가량 - 그 이전 7일 일평균 증가량 (구독자/일)
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from bulk_writer import write_rows
+from db_loader import iter_table_frames
+
+WEEK = pd.Timedelta(days=7)
+# 14일 비교에 필요한 이력 범위 (하루 여유 포함)
+LOOKBACK_DAYS = 15
+# in_ 조건 한 번에 넣을 채널 수
+KEY_CHUNK_SIZE = 200
+
+# subscriber_count는 구독자 수 비공개 채널이면 비어 있으므로 0으로 채우지 않고 compute 단계에서 변환
+STATS_DTYPES = {'stat_id': 'int64', 'timestamp': 'datetime'}
+
+
+def compute_channel_growth(stats_df):
+    """스냅샷 DataFrame(channel_id, timestamp, subscriber_count)으로 채널별 성장 지표(channel_id 인덱스)를 계산합니다."""
+    df = stats_df[['channel_id', 'timestamp', 'subscriber_count']].copy()
+    df['subscriber_count'] = pd.to_numeric(df['subscriber_count'], errors='coerce')
+    df = df.dropna(subset=['subscriber_count'])
+    df = df.sort_values('timestamp', kind='mergesort')
+    latest = df.groupby('channel_id', sort=False).tail(1).set_index('channel_id')
+
+    def subscribers_at(offset):
+        # 각 채널의 (최신 시각 - offset) 이전 가장 가까운 스냅샷의 구독자 수
+        targets = (latest['timestamp'] - offset).rename('timestamp').reset_index().sort_values('timestamp')
+        matched = pd.merge_asof(targets, df, on='timestamp', by='channel_id', direction='backward')
+        return matched.set_index('channel_id')['subscriber_count']
+
+    week_ago = subscribers_at(WEEK).reindex(latest.index)
+    two_weeks_ago = subscribers_at(2 * WEEK).reindex(latest.index)
+
+    result = pd.DataFrame(index=latest.index)
+    result['subscriber_count'] = latest['subscriber_count'].astype('int64')
+    result['weekly_subscriber_growth'] = (latest['subscriber_count'] - week_ago).astype('Int64')
+    result['growth_acceleration'] = (((latest['subscriber_count'] - week_ago) - (week_ago - two_weeks_ago)) / 7).round(2)
+    return result
+
+
+def run_channel_growth_update(client, channel_ids):
+    """주어진 채널들의 최근 channel_stats 이력으로 성장 지표를 계산해 channels 테이블에 일괄 반영합니다."""
+    channel_ids = list(channel_ids)
+    if not channel_ids:
+        return 0
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=LOOKBACK_DAYS)).isoformat()
+
+    frames = []
+    for start in range(0, len(channel_ids), KEY_CHUNK_SIZE):
+        chunk = channel_ids[start:start + KEY_CHUNK_SIZE]
+        frames.extend(iter_table_frames(
+            client, 'channel_stats', ['channel_id', 'timestamp', 'subscriber_count'], key='stat_id',
+            dtypes=STATS_DTYPES, filters=lambda q, chunk=chunk: q.in_('channel_id', chunk).gte('timestamp', cutoff),
+        ))
+    if not frames:
+        return 0
+
+    result = compute_channel_growth(pd.concat(frames, ignore_index=True))
+    result['growth_updated_at'] = datetime.now(timezone.utc).isoformat()
+    # JSON으로 보낼 수 있도록 결측값은 None으로 변환
+    result = result.reset_index()
+    rows = result.astype(object).where(result.notna(), None).to_dict(orient='records')
+    stats = write_rows(client, 'channels', rows, on_conflict='channel_id')
+    if not stats.ok:
+        print(f"{len(stats.failed_rows)}개 채널의 성장 지표를 저장하지 못했습니다.")
+    print(f"{stats.rows_written}개 채널의 성장 지표를 갱신했습니다.")
+    return stats.rows_written
@@ -1,220 +1,686 @@
 # collector.py
 # 데이터 수집을 담당하는 백엔드 스크립트입니다.
 
+# 시작 시간을 줄이기 위해 무거운 모듈(supabase, googleapiclient, pandas 기반 분석 모듈)은
+# 실제로 쓰는 단계에서 import하고, 클라이언트는 처음 필요할 때 한 번만 만듭니다.
+# (python import_budget.py로 import 시간을 확인)
+import argparse
+import json
 import os
-import pandas as pd
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from googleapiclient.discovery import build
-from pytrends.request import TrendReq
-
-# --- .env 파일 로드 및 클라이언트 초기화 ---
+from iso_duration import parse_iso8601_durations
+from fetch_engine import ApiKeyPool, execute_with_retry, run_tasks
+from fingerprint_cache import FingerprintCache
+from db_loader import iter_table_batches
+from bulk_writer import write_rows
+from spool import WriteAheadSpool, SpoolFlusher
+from scheduler import IntervalScheduler, TrackingQueue
+import telemetry
+
+# --- .env 파일 로드 ---
 load_dotenv()
 
-try:
-    SUPABASE_URL = os.environ.get("SUPABASE_URL")
-    SUPABASE_KEY = os.environ.get("SUPABASE_ANON_KEY") # .env 파일의 키 이름과 일치시킵니다.
-    YOUTUBE_API_KEY = os.environ.get("YOUTUBE_API_KEY")
-
-    if not all([SUPABASE_URL, SUPABASE_KEY, YOUTUBE_API_KEY]):
-        raise ValueError("필수 환경 변수가 .env 파일에 설정되지 않았습니다. (SUPABASE_URL, SUPABASE_ANON_KEY, YOUTUBE_API_KEY)")
 
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
-    pytrends = TrendReq(hl='ko-KR', tz=540)
-    
-    print("Supabase, YouTube, Google Trends 클라이언트 초기화 완료.")
-    
-except Exception as e:
-    print(f"클라이언트 초기화 중 에러 발생: {e}")
+def _env_list(name, default):
+    """쉼표로 구분된 환경 변수를 리스트로 읽습니다. (없으면 default)"""
+    values = [value.strip() for value in os.environ.get(name, '').split(',') if value.strip()]
+    return values or default
 
 
 # --- 상수 정의 ---
 # 최종 확정된 5개 카테고리 ID
-TARGET_CATEGORY_IDS = ['15', '22', '23', '26', '28'] # 반려동물/동물, 인물/블로그, 코미디, 노하우/스타일, 과학기술
-
-def fetch_popular_videos(api_key, category_id, region_code='KR', max_results=15):
+TARGET_CATEGORY_IDS = _env_list("COLLECTOR_CATEGORIES", ['15', '22', '23', '26', '28']) # 반려동물/동물, 인물/블로그, 코미디, 노하우/스타일, 과학기술
+# 수집 대상 국가 코드 (예: COLLECTOR_REGIONS=KR,US,JP)
+TARGET_REGION_CODES = _env_list("COLLECTOR_REGIONS", ['KR'])
+
+# 샤딩 실행: (국가, 카테고리) 조합 행렬을 SHARD_COUNT개로 나눠 SHARD_INDEX번째(0부터)만 수집
+# (여러 머신에서 나눠 실행할 때 머신마다 다른 인덱스와 같은 COLLECTOR_RUN_KEY/COLLECTOR_SNAPSHOT_AT을 지정)
+SHARD_INDEX = int(os.environ.get("COLLECTOR_SHARD_INDEX", "0"))
+SHARD_COUNT = int(os.environ.get("COLLECTOR_SHARD_COUNT", "1"))
+# 한 머신에서 차트 수집을 나눠 맡을 워커 프로세스 수 (워커마다 API 키를 나눠 가지므로 키 수를 넘지 않음)
+COLLECTOR_WORKERS = int(os.environ.get("COLLECTOR_WORKERS", "1"))
+# 차트 통계의 스냅샷 시각 (미설정 시 실행 키에서 처음 수집을 시작한 시각을 스풀에 기록해 워커들이 공유)
+COLLECTOR_SNAPSHOT_AT = os.environ.get("COLLECTOR_SNAPSHOT_AT")
+
+# 동시 수집 설정
+MAX_FETCH_WORKERS = int(os.environ.get("MAX_FETCH_WORKERS", "8"))
+QUOTA_UNITS_PER_SEC = float(os.environ.get("QUOTA_UNITS_PER_SEC", "10"))
+QUOTA_DAILY_BUDGET = int(os.environ.get("QUOTA_DAILY_BUDGET", "10000"))
+VIDEOS_LIST_COST = 1 # videos.list 1회 호출 비용 (quota unit)
+
+# 인기 급상승 차트 수집 깊이 (카테고리/국가당 최대 200개, 페이지당 최대 50개)
+CHART_PAGE_SIZE = 50
+CHART_DEPTH = int(os.environ.get("CHART_DEPTH", "200"))
+
+# 증분 수집: 변경된 videos/channels 행만 upsert (0으로 설정하면 매번 전체 upsert)
+INCREMENTAL_MODE = os.environ.get("COLLECTOR_INCREMENTAL", "1") == "1"
+
+# videos.list(id=...) / channels.list(id=...) 한 번에 조회할 수 있는 최대 개수
+VIDEOS_LIST_BATCH_SIZE = 50
+CHANNELS_LIST_BATCH_SIZE = 50
+CHANNELS_LIST_COST = 1 # channels.list 1회 호출 비용 (quota unit)
+
+# 채널 수집 단계(channels.list + channel_stats + 성장 지표) 실행 여부
+CHANNEL_STAGE_ENABLED = os.environ.get("COLLECTOR_CHANNELS", "1") == "1"
+
+# 데몬 모드 설정
+DAEMON_CHART_INTERVAL_MIN = int(os.environ.get("DAEMON_CHART_INTERVAL_MIN", "60")) # 인기 급상승 차트 수집 주기
+DAEMON_TICK_SEC = int(os.environ.get("DAEMON_TICK_SEC", "60")) # 추적 영상 스냅샷 점검 주기
+SNAPSHOT_BATCH_BUDGET = int(os.environ.get("SNAPSHOT_BATCH_BUDGET", "2500")) # 점검 1회당 최대 스냅샷 영상 수
+SNAPSHOT_HOURLY_WINDOW_HOURS = int(os.environ.get("SNAPSHOT_HOURLY_WINDOW_HOURS", "48")) # 이 시간 이내 영상은 매시간 스냅샷
+TRACKING_MAX_AGE_DAYS = int(os.environ.get("TRACKING_MAX_AGE_DAYS", "14")) # 게시 후 이 기간까지만 추적
+# YouTube Data API 일일 할당량은 태평양 시간 자정에 초기화됨 (데몬의 키별 예산도 이 시각에 초기화)
+QUOTA_RESET_TIMEZONE = "America/Los_Angeles"
+
+# 일괄 통계 갱신 단계 설정 (1회 실행 모드)
+REFRESH_ENABLED = os.environ.get("COLLECTOR_REFRESH", "1") == "1"
+REFRESH_WINDOW_DAYS = int(os.environ.get("REFRESH_WINDOW_DAYS", str(TRACKING_MAX_AGE_DAYS))) # 게시 후 이 기간 내 영상만 갱신
+
+# 수집 후 모멘텀 지표(momentum_score 등) 계산 여부
+MOMENTUM_ENABLED = os.environ.get("COLLECTOR_MOMENTUM", "1") == "1"
+DAEMON_MOMENTUM_INTERVAL_MIN = int(os.environ.get("DAEMON_MOMENTUM_INTERVAL_MIN", "60"))
+
+# 수집 후 키워드 역색인/지표(saturation_index, contagion_index) 갱신 여부
+KEYWORDS_ENABLED = os.environ.get("COLLECTOR_KEYWORDS", "1") == "1"
+DAEMON_KEYWORDS_INTERVAL_MIN = int(os.environ.get("DAEMON_KEYWORDS_INTERVAL_MIN", "60"))
+
+# video_stats 파티션 준비/일·주 집계/보관 기간 정리 (stats_retention.py) 실행 여부
+# (SUPABASE_DB_URL 또는 SUPABASE_SERVICE_ROLE_KEY가 있어야 실행됨)
+STATS_MAINTENANCE_ENABLED = os.environ.get("COLLECTOR_STATS_MAINTENANCE", "1") == "1"
+DAEMON_STATS_MAINTENANCE_INTERVAL_MIN = int(os.environ.get("DAEMON_STATS_MAINTENANCE_INTERVAL_MIN", "1440"))
+
+# write-ahead 스풀 설정
+# 외래키 순서대로 비움: (테이블, upsert 키 / None이면 insert, 증분 여부)
+# video_stats는 (video_id, timestamp)로 upsert하여 여러 국가 차트/샤드에 함께 오른 영상의 스냅샷을 한 행으로 합침
+SPOOL_TABLES = [('channels', 'channel_id', True), ('videos', 'video_id', True), ('video_stats', 'video_id,timestamp', False)]
+SPOOL_FLUSH_INTERVAL_SEC = float(os.environ.get("SPOOL_FLUSH_INTERVAL_SEC", "5"))
+SPOOL_RETENTION_DAYS = int(os.environ.get("SPOOL_RETENTION_DAYS", "3")) # 저장 완료된 레코드 보관 기간
+# 같은 실행 키로 다시 실행하면 이미 수집한 차트는 다시 호출하지 않음 (기본: UTC 날짜, CI에서는 run_id)
+COLLECTOR_RUN_KEY = os.environ.get("COLLECTOR_RUN_KEY") or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+# 실행 보고서(구간별 소요 시간, 행/바이트/할당량 카운터) 저장 위치와 데몬의 보고 주기
+RUN_REPORT_DIR = os.environ.get("RUN_REPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), '.collector_reports'))
+DAEMON_REPORT_INTERVAL_MIN = int(os.environ.get("DAEMON_REPORT_INTERVAL_MIN", "60"))
+
+REQUIRED_ENV_VARS = ("SUPABASE_URL", "SUPABASE_ANON_KEY")
+
+def get_api_keys():
+    """YOUTUBE_API_KEYS(쉼표 구분, 여러 키)가 있으면 그 목록을, 없으면 YOUTUBE_API_KEY 하나를 반환합니다."""
+    return _env_list("YOUTUBE_API_KEYS", _env_list("YOUTUBE_API_KEY", []))
+
+def make_key_pool(api_keys):
+    """API 키마다 할당량 리미터를 둔 키 풀을 만듭니다. (QUOTA_DAILY_BUDGET은 키당 예산)"""
+    return ApiKeyPool(api_keys, rate=QUOTA_UNITS_PER_SEC, capacity=MAX_FETCH_WORKERS * 2, daily_budget=QUOTA_DAILY_BUDGET)
+
+_supabase = None
+_supabase_lock = threading.Lock()
+
+def get_supabase():
+    """Supabase 클라이언트를 반환합니다. (프로세스에서 처음 호출할 때 1회 생성)"""
+    global _supabase
+    with _supabase_lock:
+        if _supabase is None:
+            from supabase import create_client
+            _supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"])
+        return _supabase
+
+# googleapiclient(httplib2)는 스레드 안전하지 않으므로 스레드마다 별도의 클라이언트를 사용
+_thread_local = threading.local()
+_discovery_document = None
+
+def get_youtube_discovery_document():
     """
-    지정된 카테고리에 대해 유튜브 인기 급상승 동영상을 수집합니다.
+    YouTube Data API v3 discovery 문서(JSON 문자열)를 반환합니다.
+    google-api-python-client에 포함된 정적 문서를 한 번만 읽어 두므로, 클라이언트를 만들 때마다
+    네트워크 요청이나 파일 읽기를 하지 않습니다.
     """
-    videos_to_insert = []
-    channels_to_insert = []
-    stats_to_insert = []
-    existing_channel_ids = set() # 중복 채널 저장을 피하기 위함
-
-    try:
-        request = youtube.videos().list(
+    global _discovery_document
+    if _discovery_document is None:
+        from googleapiclient.discovery_cache import get_static_doc
+        _discovery_document = get_static_doc('youtube', 'v3')
+        if _discovery_document is None:
+            raise RuntimeError("google-api-python-client에 YouTube v3 정적 discovery 문서가 없습니다. (2.0 이상 필요)")
+    return _discovery_document
+
+def get_youtube_client(api_key):
+    """현재 스레드 전용 YouTube 클라이언트를 반환합니다. (API 키별로 1회 생성)"""
+    clients = getattr(_thread_local, 'youtube_clients', None)
+    if clients is None:
+        clients = _thread_local.youtube_clients = {}
+    if api_key not in clients:
+        from googleapiclient.discovery import build_from_document
+        # 문서를 스레드마다 파싱하여, 라이브러리가 수정할 수 있는 dict를 스레드 간에 공유하지 않음
+        clients[api_key] = build_from_document(json.loads(get_youtube_discovery_document()), developerKey=api_key)
+    return clients[api_key]
+
+def iter_popular_pages(api_key, category_id, region_code='KR', max_results=CHART_DEPTH, limiter=None):
+    """
+    인기 급상승 차트를 nextPageToken을 따라가며 페이지 단위로 생성합니다. (페이지당 최대 50개)
+    max_results개에 도달하거나 다음 페이지가 없으면 종료합니다.
+    """
+    youtube_client = get_youtube_client(api_key)
+    page_token = None
+    remaining = max_results
+    while remaining > 0:
+        request = youtube_client.videos().list(
             part='snippet,contentDetails,statistics',
             chart='mostPopular',
             regionCode=region_code,
             videoCategoryId=category_id,
-            maxResults=max_results
+            maxResults=min(CHART_PAGE_SIZE, remaining),
+            pageToken=page_token
         )
-        response = request.execute()
+        response = execute_with_retry(request, limiter=limiter, cost=VIDEOS_LIST_COST)
+        items = response.get('items', [])
+        yield items[:remaining]
 
-        for item in response.get('items', []):
-            # 영상 데이터
-            video_data = {
-                "video_id": item["id"],
-                "channel_id": item["snippet"]["channelId"],
-                "title": item["snippet"]["title"],
-                "published_at": item["snippet"]["publishedAt"],
-                "tags": item["snippet"].get("tags", []), # tags가 없을 수도 있음
-                "duration_sec": parse_iso8601_duration(item["contentDetails"]["duration"]),
-                "thumbnail_url": item["snippet"]["thumbnails"]["high"]["url"] # 썸네일 URL 추가
-            }
-            videos_to_insert.append(video_data)
-
-            # 채널 정보 (중복 방지)
-            if item["snippet"]["channelId"] not in existing_channel_ids:
-                channel_data = {
-                    "channel_id": item["snippet"]["channelId"],
-                    "name": item["snippet"]["channelTitle"],
-                    "thumbnail_url": "" # 채널 썸네일은 별도 API 호출 필요 시 추가 (현재는 빈 값)
-                }
-                channels_to_insert.append(channel_data)
-                existing_channel_ids.add(item["snippet"]["channelId"])
-
-            # 통계 정보
-            stats_to_insert.append({
-                "video_id": item["id"],
-                "view_count": item["statistics"].get("viewCount", 0),
-                "like_count": item["statistics"].get("likeCount", 0),
-                "comment_count": item["statistics"].get("commentCount", 0),
-            })
+        remaining -= len(items)
+        page_token = response.get('nextPageToken')
+        if not page_token or not items:
+            break
 
-    except Exception as e:
-        print(f"    -> 카테고리 ID [{category_id}] 수집 실패. (에러: {e})")
-        # 실패 시 빈 리스트 반환
-        return [], [], []
-    
-    return videos_to_insert, channels_to_insert, stats_to_insert
+def _count(statistics, key):
+    # API는 카운트를 문자열로 주고, 숨긴 좋아요/댓글 수는 키 자체가 없음 → DB/대시보드에서 바로 쓰도록 정수로 저장
+    return int(statistics.get(key, 0))
 
-def parse_iso8601_duration(duration_str):
-    """ISO 8601 기간 문자열을 초로 변환합니다. (예: PT1M30S -> 90)"""
-    if not duration_str:
-        return 0
-    try:
-        # pandas의 to_timedelta를 사용하여 간편하게 변환
-        return int(pd.to_timedelta(duration_str).total_seconds())
-    except Exception:
-        return 0
-
-def save_videos_to_db(videos_list):
+def normalize_items(items, existing_channel_ids, snapshot_at=None):
     """
-    수집된 영상 리스트를 DB의 각 테이블에 맞게 가공하고 저장합니다.
+    videos.list 응답 아이템 한 페이지를 videos/channels/video_stats 테이블 형식으로 변환합니다.
+    existing_channel_ids에 이미 있는 채널은 건너뛰고, 새 채널 ID는 추가합니다.
+    통계 행의 timestamp는 snapshot_at(없으면 현재 시각)입니다.
     """
-    if not videos_list:
-        print("DB에 저장할 영상이 없습니다.")
-        return
-
-    print("\nDB 저장을 위해 데이터 가공을 시작합니다...")
-
-    channels_to_upsert = {}
-    videos_to_upsert = []
+    snapshot_at = snapshot_at or datetime.now(timezone.utc).isoformat()
+    videos_to_insert = []
+    channels_to_insert = []
     stats_to_insert = []
 
-    for video in videos_list:
-        channel_id = video['snippet']['channelId']
-        if channel_id not in channels_to_upsert:
-            channels_to_upsert[channel_id] = {
-                'channel_id': channel_id,
-                'name': video['snippet']['channelTitle']
-            }
-            video_data = {
-                "video_id": item["id"],
+    # 페이지의 영상 길이를 한 번에 변환
+    durations = parse_iso8601_durations(item.get("contentDetails", {}).get("duration") for item in items)
+
+    for item, duration_sec in zip(items, durations):
+        # 영상 데이터
+        video_data = {
+            "video_id": item["id"],
+            "channel_id": item["snippet"]["channelId"],
+            "category_id": item["snippet"].get("categoryId"),
+            "title": item["snippet"]["title"],
+            "published_at": item["snippet"]["publishedAt"],
+            "tags": item["snippet"].get("tags", []), # tags가 없을 수도 있음
+            "duration_sec": duration_sec,
+            "thumbnail_url": item["snippet"]["thumbnails"]["high"]["url"] # 썸네일 URL 추가
+        }
+        videos_to_insert.append(video_data)
+
+        # 채널 정보 (중복 방지)
+        # 채널 썸네일은 채널 수집 단계(channels.list)에서 채우므로 여기서는 덮어쓰지 않음
+        if item["snippet"]["channelId"] not in existing_channel_ids:
+            channel_data = {
                 "channel_id": item["snippet"]["channelId"],
-                "title": item["snippet"]["title"],
-                "published_at": item["snippet"]["publishedAt"],
-                "tags": item["snippet"].get("tags", []), # tags가 없을 수도 있음
-                "duration_sec": parse_iso8601_duration(item["contentDetails"]["duration"]),
-                "thumbnail_url": item["snippet"]["thumbnails"]["high"]["url"] # 썸네일 URL 추가
+                "name": item["snippet"]["channelTitle"],
             }
-            videos_to_insert.append(video_data)
-
-            # 채널 정보 수집 (중복 방지)
-            if item["snippet"]["channelId"] not in existing_channel_ids:
-                channel_data = {
-                    "channel_id": item["snippet"]["channelId"],
-                    "name": item["snippet"]["channelTitle"],
-                    "thumbnail_url": "" # 채널 썸네일은 별도 API 호출 필요 시 추가
-                }
-                channels_to_insert.append(channel_data)
-                existing_channel_ids.add(item["snippet"]["channelId"])
-
-            # 통계 정보 수집
-            stats_to_insert.append({
-                "video_id": item["id"],
-                "view_count": item["statistics"].get("viewCount", 0),
-                "like_count": item["statistics"].get("likeCount", 0),
-                "comment_count": item["statistics"].get("commentCount", 0),
-            })
+            channels_to_insert.append(channel_data)
+            existing_channel_ids.add(item["snippet"]["channelId"])
+
+        # 통계 정보
+        stats_to_insert.append({
+            "video_id": item["id"],
+            "view_count": _count(item["statistics"], "viewCount"),
+            "like_count": _count(item["statistics"], "likeCount"),
+            "comment_count": _count(item["statistics"], "commentCount"),
+            "timestamp": snapshot_at,
+        })
 
     return videos_to_insert, channels_to_insert, stats_to_insert
 
-def save_videos_to_db(videos_data, channels_data, stats_data):
+def iter_popular_video_batches(api_key, category_id, region_code='KR', max_results=CHART_DEPTH, limiter=None, snapshot_at=None):
     """
-    수집된 영상, 채널, 통계 데이터를 Supabase DB에 저장합니다.
+    페이지가 도착하는 즉시 정규화하여 (videos, channels, stats) 묶음을 페이지 단위로 생성합니다.
+    원본 응답은 정규화 후 바로 버려지므로 수집 깊이가 늘어도 최대 메모리는 한 페이지 분량입니다.
     """
-    print("DB에 데이터 저장을 시작합니다...")
-    try:
-        # 채널 데이터 저장 (중복 시 업데이트)
-        if channels_data:
-            supabase.table('channels').upsert(channels_data, on_conflict='channel_id').execute()
-            print(f"{len(channels_data)}개 채널 정보 저장/업데이트 완료.")
-
-        # 영상 데이터 저장 (중복 시 업데이트)
-        if videos_data:
-            supabase.table('videos').upsert(videos_data, on_conflict='video_id').execute()
-            print(f"{len(videos_data)}개 영상 정보 저장/업데이트 완료.")
+    existing_channel_ids = set() # 페이지 간 중복 채널 저장을 피하기 위함
+    for items in iter_popular_pages(api_key, category_id, region_code, max_results, limiter):
+        with telemetry.span('normalize', region=region_code, category=category_id) as fields:
+            batch = normalize_items(items, existing_channel_ids, snapshot_at)
+            fields['rows'] = len(items)
+        telemetry.count('videos_collected', len(items), region=region_code, category=category_id)
+        yield batch
+
+def fetch_popular_videos(api_key, category_id, region_code='KR', max_results=15, limiter=None, spool=None, run_key=None,
+                         snapshot_at=None):
+    """
+    지정된 카테고리에 대해 유튜브 인기 급상승 동영상을 수집합니다.
+    max_results가 50보다 크면 nextPageToken을 따라 여러 페이지를 수집합니다. (차트 최대 200개)
+    limiter가 주어지면 호출 전 할당량을 확보하고, 일시적인 오류는 백오프 후 재시도합니다.
+    spool이 주어지면 페이지가 도착할 때마다 스풀에 기록하고, 끝까지 수집하면 작업 완료로 표시합니다.
+    snapshot_at이 주어지면 통계 행을 그 시각의 스냅샷으로 기록합니다. (샤드 간 같은 스냅샷으로 병합)
+    """
+    videos_to_insert = []
+    channels_to_insert = []
+    stats_to_insert = []
 
-        # 통계 데이터 저장 (항상 새로 추가)
-        if stats_data:
-            supabase.table('video_stats').insert(stats_data).execute()
-            print(f"{len(stats_data)}개 영상 통계 저장 완료.")
+    try:
+        for videos, channels, stats in iter_popular_video_batches(api_key, category_id, region_code, max_results, limiter, snapshot_at):
+            if spool is not None:
+                spool.append(run_key, {'channels': channels, 'videos': videos, 'video_stats': stats})
+            videos_to_insert.extend(videos)
+            channels_to_insert.extend(channels)
+            stats_to_insert.extend(stats)
+        if spool is not None:
+            spool.mark_task_done(run_key, f"{region_code}:{category_id}")
 
-        print("DB 저장 완료.")
     except Exception as e:
-        print(f"DB 저장 중 오류 발생: {e}")
+        print(f"    -> [{region_code}] 카테고리 ID [{category_id}] 수집 실패. (에러: {e})")
+        # 중간 페이지에서 실패하면 그때까지 수집한 페이지는 유지 (첫 페이지 실패 시 빈 리스트)
+        telemetry.count('chart_failures', region=region_code, category=category_id)
+        telemetry.log_event('chart_failure', region=region_code, category=category_id, error=repr(e),
+                            videos_kept=len(videos_to_insert))
 
+    return videos_to_insert, channels_to_insert, stats_to_insert
 
-if __name__ == "__main__":
-    load_dotenv()
-    YOUTUBE_API_KEY = os.environ.get("YOUTUBE_API_KEY")
-    SUPABASE_URL = os.environ.get("SUPABASE_URL")
-    SUPABASE_ANON_KEY = os.environ.get("SUPABASE_ANON_KEY")
+_spool = None
+_spool_flusher = None
 
-    if not all([YOUTUBE_API_KEY, SUPABASE_URL, SUPABASE_ANON_KEY]):
-        print("오류: 필수 환경 변수가 .env 파일에 설정되지 않았습니다.")
-        exit(1)
+def get_spool():
+    """프로세스에서 함께 쓰는 write-ahead 스풀을 반환합니다. (처음 호출 시 생성)"""
+    global _spool
+    if _spool is None:
+        _spool = WriteAheadSpool()
+    return _spool
 
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-    youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY) # youtube 클라이언트 초기화
+def make_spool_flusher(fingerprint_cache=None):
+    return SpoolFlusher(get_spool(), get_supabase(), SPOOL_TABLES, fingerprint_cache=fingerprint_cache, interval_sec=SPOOL_FLUSH_INTERVAL_SEC)
 
-    all_videos, all_channels, all_stats = [], [], []
-    failed_categories = []
+def save_videos_to_db(videos_data, channels_data, stats_data, fingerprint_cache=None):
+    """
+    수집된 영상, 채널, 통계 데이터를 스풀에 기록한 뒤 Supabase DB에 저장합니다.
+    저장 성공 여부를 반환하며, 실패한 데이터는 스풀에 남아 다음 저장 때 함께 저장됩니다.
+    """
+    print("DB에 데이터 저장을 시작합니다...")
+    global _spool_flusher
+    get_spool().append(COLLECTOR_RUN_KEY, {'channels': channels_data, 'videos': videos_data, 'video_stats': stats_data})
+    if fingerprint_cache is not None:
+        flusher = make_spool_flusher(fingerprint_cache)
+    else:
+        # 실패 횟수가 호출 사이에 유지되도록 같은 flusher를 재사용
+        _spool_flusher = _spool_flusher or make_spool_flusher()
+        flusher = _spool_flusher
+    if not flusher.flush():
+        print("DB 저장 중 오류 발생: 저장하지 못한 데이터는 스풀에 보관합니다.")
+        return False
+    print("DB 저장 완료.")
+    return True
+
+
+def with_pooled_key(key_pool, fetch_batch):
+    """fetch_batch(api_key, batch, limiter)를 묶음마다 사용량이 가장 적은 키로 호출하는 함수를 반환합니다."""
+    def run(batch):
+        api_key, limiter = key_pool.least_used()
+        return fetch_batch(api_key, batch, limiter)
+    return run
+
+def fetch_video_statistics_batch(api_key, video_ids, limiter=None):
+    """video_id 최대 50개의 최신 통계를 videos.list(id=...) 1회 호출(1 quota unit)로 가져옵니다."""
+    request = get_youtube_client(api_key).videos().list(part='statistics', id=','.join(video_ids), maxResults=len(video_ids))
+    response = execute_with_retry(request, limiter=limiter, cost=VIDEOS_LIST_COST)
+    snapshot_at = datetime.now(timezone.utc).isoformat()
+    stats_to_insert = []
+    for item in response.get('items', []):
+        stats_to_insert.append({
+            "video_id": item["id"],
+            "view_count": _count(item["statistics"], "viewCount"),
+            "like_count": _count(item["statistics"], "likeCount"),
+            "comment_count": _count(item["statistics"], "commentCount"),
+            "timestamp": snapshot_at,
+        })
+    return stats_to_insert
+
+def fetch_video_statistics(key_pool, video_ids):
+    """
+    video_id 목록을 50개씩 나누어 여러 스레드에서 동시에 통계를 가져옵니다. (묶음마다 사용량이 가장 적은 키 사용)
+    (통계 리스트, 실패한 묶음의 video_id 리스트)를 반환합니다.
+    삭제/비공개된 영상은 성공한 응답에서 빠지므로 통계에 포함되지 않고, 실패한 묶음(할당량 소진 포함)의 영상은
+    삭제 여부를 알 수 없으므로 실패 목록으로 따로 돌려줍니다.
+    """
+    batches = [video_ids[start:start + VIDEOS_LIST_BATCH_SIZE] for start in range(0, len(video_ids), VIDEOS_LIST_BATCH_SIZE)]
+    results = run_tasks(batches, with_pooled_key(key_pool, fetch_video_statistics_batch), max_workers=MAX_FETCH_WORKERS)
 
-    print("\n========== 데이터 수집 파이프라인 시작 ==========")
-    for category_id in TARGET_CATEGORY_IDS:
-        print(f"카테고리 ID {category_id}의 인기 동영상 수집 중...")
-        videos, channels, stats = fetch_popular_videos(YOUTUBE_API_KEY, category_id, region_code='KR', max_results=15)
-        if videos:
-            all_videos.extend(videos)
-            all_channels.extend(channels)
-            all_stats.extend(stats)
+    stats_to_insert = []
+    failed_ids = []
+    for task_result in results:
+        if task_result.ok:
+            stats_to_insert.extend(task_result.result)
         else:
-            failed_categories.append(category_id)
+            failed_ids.extend(task_result.task)
+            print(f"    -> 영상 {len(task_result.task)}개 통계 갱신 실패. (에러: {task_result.error})")
+    return stats_to_insert, failed_ids
 
-    # 중복 채널 제거
-    unique_channels = {}
-    for channel in all_channels:
-        unique_channels[channel["channel_id"]] = channel
-    final_channels = list(unique_channels.values())
+def run_refresh_stage(key_pool, exclude_ids=()):
+    """
+    최근 REFRESH_WINDOW_DAYS 이내에 게시된 영상을 DB에서 읽어 통계를 일괄 갱신합니다.
+    차트에서 내려간 영상도 계속 관측할 수 있으며, 50개당 1 quota unit만 사용합니다.
+    exclude_ids: 이번 실행에서 이미 스냅샷을 저장한 영상 (차트 수집분)
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=REFRESH_WINDOW_DAYS)).isoformat()
+    exclude_ids = set(exclude_ids)
+    video_ids = []
+    for rows in iter_table_batches(get_supabase(), 'videos', [], key='video_id', filters=lambda q: q.gte('published_at', cutoff)):
+        video_ids.extend(row['video_id'] for row in rows if row['video_id'] not in exclude_ids)
+    if not video_ids:
+        print("통계를 갱신할 추적 영상이 없습니다.")
+        return []
+
+    print(f"\n최근 {REFRESH_WINDOW_DAYS}일 내 게시된 영상 {len(video_ids)}개의 통계를 {VIDEOS_LIST_BATCH_SIZE}개씩 갱신합니다...")
+    stats, _ = fetch_video_statistics(key_pool, video_ids)
+    print(f"{len(stats)}개 영상 통계 갱신 완료. (사용한 API 할당량: {key_pool.units_used} units)")
+    save_videos_to_db([], [], stats)
+    return stats
+
+def fetch_channel_details_batch(api_key, channel_ids, limiter=None):
+    """채널 최대 50개의 snippet/statistics를 channels.list 1회 호출(1 quota unit)로 가져옵니다."""
+    request = get_youtube_client(api_key).channels().list(part='snippet,statistics', id=','.join(channel_ids), maxResults=len(channel_ids))
+    response = execute_with_retry(request, limiter=limiter, cost=CHANNELS_LIST_COST)
+    channels_to_upsert = []
+    channel_stats_to_insert = []
+    for item in response.get('items', []):
+        thumbnails = item["snippet"].get("thumbnails", {})
+        thumbnail = thumbnails.get("high") or thumbnails.get("medium") or thumbnails.get("default") or {}
+        channels_to_upsert.append({
+            "channel_id": item["id"],
+            "name": item["snippet"]["title"],
+            "thumbnail_url": thumbnail.get("url", ""),
+        })
+        statistics = item.get("statistics", {})
+        channel_stats_to_insert.append({
+            "channel_id": item["id"],
+            # 구독자 수를 숨긴 채널은 값이 없으므로 None으로 저장
+            "subscriber_count": None if statistics.get("hiddenSubscriberCount") else statistics.get("subscriberCount"),
+            "view_count": statistics.get("viewCount", 0),
+        })
+    return channels_to_upsert, channel_stats_to_insert
+
+def run_channel_stage(key_pool, channel_ids, fingerprint_cache=None):
+    """
+    이번 실행에서 수집된 채널들의 정보를 channels.list로 50개씩 동시에 가져와
+    썸네일을 채우고 channel_stats 스냅샷을 추가한 뒤 채널 성장 지표를 갱신합니다.
+    """
+    channel_ids = sorted(set(channel_ids))
+    if not channel_ids:
+        return
+    print(f"\n채널 {len(channel_ids)}개의 정보와 통계를 {CHANNELS_LIST_BATCH_SIZE}개씩 수집합니다...")
+    batches = [channel_ids[start:start + CHANNELS_LIST_BATCH_SIZE] for start in range(0, len(channel_ids), CHANNELS_LIST_BATCH_SIZE)]
+    results = run_tasks(batches, with_pooled_key(key_pool, fetch_channel_details_batch), max_workers=MAX_FETCH_WORKERS)
+
+    channels_data, channel_stats_data = [], []
+    for task_result in results:
+        if task_result.ok:
+            channels_data.extend(task_result.result[0])
+            channel_stats_data.extend(task_result.result[1])
+        else:
+            print(f"    -> 채널 {len(task_result.task)}개 정보 수집 실패. (에러: {task_result.error})")
+
+    channels_to_save = channels_data
+    if fingerprint_cache is not None:
+        # 차트 수집분(이름만)과 행 형태가 다르므로 별도 네임스페이스에 지문을 기록
+        channels_to_save = fingerprint_cache.changed_rows('channel_details', channels_data, 'channel_id')
 
-    print(f"\n총 {len(all_videos)}개의 영상을 성공적으로 수집했습니다.")
+    channel_result = write_rows(get_supabase(), 'channels', channels_to_save, on_conflict='channel_id')
+    stats_result = write_rows(get_supabase(), 'channel_stats', channel_stats_data)
+    if not (channel_result.ok and stats_result.ok):
+        print(f"채널 정보 저장 중 일부 행 저장 실패: 채널 {len(channel_result.failed_rows)}개, 통계 {len(stats_result.failed_rows)}개")
+        return
+    print(f"{len(channels_to_save)}개 채널 정보 갱신, {len(channel_stats_data)}개 채널 통계 저장 완료.")
+
+    if fingerprint_cache is not None:
+        fingerprint_cache.update('channel_details', channels_to_save, 'channel_id')
+        fingerprint_cache.save()
+    from channel_growth import run_channel_growth_update
+    run_channel_growth_update(get_supabase(), [row['channel_id'] for row in channel_stats_data])
+
+def chart_tasks(shard_index=0, shard_count=1):
+    """
+    (국가, 카테고리) 조합 행렬에서 shard_index번째 샤드가 맡을 조합을 반환합니다.
+    모든 머신/워커가 같은 정렬 순서로 나누므로 샤드끼리 겹치거나 빠지는 조합이 없습니다.
+    """
+    matrix = sorted((region_code, category_id) for region_code in TARGET_REGION_CODES for category_id in TARGET_CATEGORY_IDS)
+    return matrix[shard_index::shard_count]
+
+def run_chart_collection(key_pool, fingerprint_cache=None, run_key=None, shard_index=SHARD_INDEX, shard_count=SHARD_COUNT,
+                         flush=True):
+    """
+    (국가, 카테고리) 조합의 인기 급상승 차트를 동시에 수집하여 DB에 저장하고, 수집한 (영상, 통계) 리스트를 반환합니다.
+    수집한 페이지는 곧바로 스풀에 기록되고, 백그라운드 flusher가 수집과 별도로 DB에 저장합니다.
+    run_key 실행에서 이미 끝까지 수집한 조합은 다시 호출하지 않고 스풀에 기록된 결과를 사용합니다.
+    fingerprint_cache가 주어지면 새로 등장했거나 바뀐 메타데이터만 저장합니다. (통계는 항상 추가)
+    shard_index/shard_count로 조합 행렬의 일부만 수집하며, 조합은 키 풀의 API 키에 번갈아 배정합니다.
+    flush=False이면 스풀에 기록만 합니다. (워커 프로세스: 저장은 같은 스풀을 쓰는 부모 프로세스가 담당)
+    """
+    run_key = run_key or COLLECTOR_RUN_KEY
+    spool = get_spool()
+    failed_categories = []
+    # 모든 샤드/워커/재실행이 같은 시각으로 통계를 기록해야 DB에서 하나의 스냅샷으로 합쳐짐
+    snapshot_at = COLLECTOR_SNAPSHOT_AT or spool.run_snapshot_at(run_key, datetime.now(timezone.utc).isoformat())
+
+    flusher = None
+    if flush:
+        pending = spool.pending_count()
+        if pending:
+            print(f"이전 실행에서 저장하지 못한 스풀 레코드 {pending}개를 이어서 저장합니다.")
+        flusher = make_spool_flusher(fingerprint_cache)
+        flusher.start()
+
+    # (국가, 카테고리) 조합을 스레드 풀에서 동시에 수집 (API 키마다 할당량 리미터를 따로 사용)
+    completed = spool.completed_tasks(run_key)
+    shard = chart_tasks(shard_index, shard_count)
+    tasks = [task for task in shard if f"{task[0]}:{task[1]}" not in completed]
+    if shard_count > 1:
+        print(f"샤드 {shard_index + 1}/{shard_count}: 전체 조합 중 {len(shard)}개를 담당합니다.")
+    if len(shard) > len(tasks):
+        print(f"실행 키 '{run_key}'에서 이미 수집한 {len(shard) - len(tasks)}개 조합은 건너뜁니다.")
+    api_keys = key_pool.api_keys
+    assignments = [(task, api_keys[position % len(api_keys)]) for position, task in enumerate(tasks)]
+    print(f"{len(tasks)}개 (국가, 카테고리) 조합을 API 키 {len(api_keys)}개, 최대 {MAX_FETCH_WORKERS}개 스레드로 수집합니다...")
+    results = run_tasks(
+        assignments,
+        lambda assignment: fetch_popular_videos(assignment[1], assignment[0][1], region_code=assignment[0][0],
+                                                max_results=CHART_DEPTH, limiter=key_pool.limiters[assignment[1]],
+                                                spool=spool, run_key=run_key, snapshot_at=snapshot_at),
+        max_workers=MAX_FETCH_WORKERS,
+    )
+
+    for task_result in results:
+        (region_code, category_id), _ = task_result.task
+        videos = task_result.result[0] if task_result.ok else []
+        print(f"  [{region_code}] 카테고리 ID {category_id}: {len(videos)}개 영상 ({task_result.elapsed_sec:.2f}초)")
+        if not videos:
+            failed_categories.append(f"{region_code}:{category_id}")
+    print(f"사용한 API 할당량: {key_pool.units_used} units")
+
+    # 이번 실행 키의 전체 수집 결과 (건너뛴 조합, 다른 워커가 수집한 조합 포함)
+    # 여러 국가/카테고리 차트에 함께 오른 영상은 한 번만 (통계는 같은 스냅샷 시각이므로 마지막 기록을 사용)
+    all_videos = list({row['video_id']: row for row in spool.run_rows(run_key, 'videos')}.values())
+    all_stats = list({row['video_id']: row for row in spool.run_rows(run_key, 'video_stats')}.values())
+    print(f"\n총 {len(all_videos)}개의 영상(중복 제외)을 성공적으로 수집했습니다.")
     if failed_categories:
         print(f"실패한 카테고리 ID: {failed_categories}")
         print("(해당 카테고리는 '인기 급상승' 차트를 제공하지 않을 수 있습니다.)")
 
-    save_videos_to_db(all_videos, final_channels, all_stats)
-    print("\n========== 데이터 수집 파이프라인 완료 ==========")
+    if flusher is None:
+        return all_videos, all_stats
+    if flusher.stop():
+        print("DB 저장 완료.")
+        spool.compact(keep_days=SPOOL_RETENTION_DAYS)
+    else:
+        print(f"DB 저장 중 오류 발생: 스풀 레코드 {spool.pending_count()}개는 다음 실행에서 이어서 저장합니다.")
+
+    return all_videos, all_stats
+
+def run_chart_workers(api_keys, workers, run_key=None, shard_index=SHARD_INDEX, shard_count=SHARD_COUNT):
+    """
+    이 머신의 샤드를 workers개 워커 프로세스(collector.py --collect-only)로 다시 나눠 동시에 수집합니다.
+    워커 i는 전체 행렬의 shard_index + shard_count * i번째 샤드(총 shard_count * workers개)를 맡고
+    API 키를 api_keys[i::workers]로 나눠 가지며, 결과는 같은 실행 키로 공유 스풀에만 기록합니다.
+    실패한 워커가 있어도 반환 후 run_chart_collection이 남은 조합을 이어서 수집합니다.
+    """
+    import subprocess
+    run_key = run_key or COLLECTOR_RUN_KEY
+    workers = min(workers, len(api_keys))
+    print(f"차트 수집을 워커 프로세스 {workers}개로 나눠 실행합니다. (실행 키: '{run_key}')")
+    processes = []
+    for worker in range(workers):
+        env = dict(os.environ, COLLECTOR_RUN_KEY=run_key, YOUTUBE_API_KEYS=','.join(api_keys[worker::workers]))
+        command = [sys.executable, os.path.abspath(__file__), '--collect-only',
+                   '--shard-index', str(shard_index + shard_count * worker), '--shard-count', str(shard_count * workers)]
+        processes.append(subprocess.Popen(command, env=env))
+    failed = [worker for worker, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        print(f"워커 {failed} 실행 실패: 남은 조합은 이 프로세스에서 이어서 수집합니다.")
+
+def write_run_report(reset=False):
+    """지금까지의 계측 결과를 출력하고 RUN_REPORT_DIR에 JSON으로 저장합니다. reset이면 이후 구간을 새로 집계합니다."""
+    print("\n---------- 실행 보고서 ----------")
+    print(telemetry.format_report(telemetry.run_report()))
+    path = telemetry.write_run_report(RUN_REPORT_DIR)
+    print(f"실행 보고서 저장: {path}")
+    if reset:
+        telemetry.reset()
+
+# --- 데몬 모드 ---
+def seconds_until_quota_reset(now=None):
+    """다음 YouTube 할당량 초기화 시각(태평양 시간 자정)까지 남은 초를 반환합니다. (서머타임 반영)"""
+    from zoneinfo import ZoneInfo
+    tz = ZoneInfo(QUOTA_RESET_TIMEZONE)
+    now = (now or datetime.now(timezone.utc)).astimezone(tz)
+    next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+    return max((next_midnight - now).total_seconds(), 1.0)
+
+def seed_tracking_queue(tracking_queue):
+    """DB에서 추적 기간 내에 게시된 영상과 최신 통계를 읽어 추적 큐를 채웁니다."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=TRACKING_MAX_AGE_DAYS)).isoformat()
+    latest_stats = {}
+    for rows in iter_table_batches(get_supabase(), 'video_latest_stats', ['view_count', 'timestamp'], key='video_id',
+                                   filters=lambda q: q.gte('timestamp', cutoff)):
+        for row in rows:
+            latest_stats[row['video_id']] = row
+    for rows in iter_table_batches(get_supabase(), 'videos', ['published_at'], key='video_id',
+                                   filters=lambda q: q.gte('published_at', cutoff)):
+        for row in rows:
+            stats = latest_stats.get(row['video_id'], {})
+            tracking_queue.track(row['video_id'], row['published_at'], stats.get('view_count'), stats.get('timestamp'))
+    print(f"DB에서 {len(tracking_queue)}개 영상을 추적 대상으로 불러왔습니다.")
+
+def snapshot_tracked_videos(key_pool, tracking_queue):
+    """스냅샷 시각이 된 추적 영상의 통계를 가져와 video_stats에 추가하고 다음 스냅샷을 예약합니다."""
+    due_ids = tracking_queue.pop_due(limit=SNAPSHOT_BATCH_BUDGET)
+    if not due_ids:
+        return
+    stats, failed_ids = fetch_video_statistics(key_pool, due_ids)
+    # 실패한 묶음(일시적 오류, 할당량 소진)의 영상은 다음 점검 때 다시 시도
+    tracking_queue.retry(failed_ids)
+    answered_ids = set(due_ids) - set(failed_ids)
+    returned_ids = {row['video_id'] for row in stats}
+    for video_id in answered_ids - returned_ids:
+        tracking_queue.untrack(video_id)  # 성공한 응답에 없는 영상: 삭제되었거나 비공개 전환됨
+    save_videos_to_db([], [], stats)
+    for row in stats:
+        tracking_queue.record_snapshot(row['video_id'], row['view_count'])
+    print(f"[데몬] {len(stats)}개 추적 영상 스냅샷 저장 (추적 중: {len(tracking_queue)}개, 재시도 대기: {len(failed_ids)}개, 사용 할당량: {key_pool.units_used} units)")
+
+def run_daemon(key_pool):
+    """
+    장기 실행 데몬 모드입니다. 하나의 YouTube/Supabase 클라이언트를 프로세스 수명 동안 재사용하며,
+    주기적으로 인기 급상승 차트를 수집하고 추적 큐에서 스냅샷 시각이 된 영상을 갱신합니다.
+    """
+    tracking_queue = TrackingQueue(hourly_window_hours=SNAPSHOT_HOURLY_WINDOW_HOURS, max_age_days=TRACKING_MAX_AGE_DAYS)
+    fingerprint_cache = FingerprintCache() if INCREMENTAL_MODE else None
+    seed_tracking_queue(tracking_queue)
+
+    def chart_job():
+        # 데몬은 주기마다 차트를 새로 수집하므로 실행마다 별도의 실행 키를 사용
+        run_key = f"daemon-{datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M')}"
+        videos, stats = run_chart_collection(key_pool, fingerprint_cache, run_key=run_key)
+        if CHANNEL_STAGE_ENABLED:
+            run_channel_stage(key_pool, [video['channel_id'] for video in videos], fingerprint_cache)
+        view_counts = {row['video_id']: row['view_count'] for row in stats}
+        for video in videos:
+            video_id = video['video_id']
+            if video_id in tracking_queue:
+                tracking_queue.record_snapshot(video_id, view_counts[video_id])
+            else:
+                tracking_queue.track(video_id, video['published_at'], view_counts[video_id], snapshot_at=time.time())
+
+    scheduler = IntervalScheduler()
+    scheduler.add_job('chart_collection', DAEMON_CHART_INTERVAL_MIN * 60, chart_job)
+    scheduler.add_job('tracked_snapshot', DAEMON_TICK_SEC, lambda: snapshot_tracked_videos(key_pool, tracking_queue))
+    if MOMENTUM_ENABLED:
+        from momentum import run_momentum_update
+        scheduler.add_job('momentum_update', DAEMON_MOMENTUM_INTERVAL_MIN * 60, lambda: run_momentum_update(get_supabase()), run_immediately=False)
+    if KEYWORDS_ENABLED:
+        from keyword_index import run_keyword_index_update
+        scheduler.add_job('keyword_index', DAEMON_KEYWORDS_INTERVAL_MIN * 60,
+                          lambda: run_keyword_index_update(get_supabase(), fingerprint_cache), run_immediately=False)
+    if STATS_MAINTENANCE_ENABLED:
+        from stats_retention import run_stats_maintenance
+        scheduler.add_job('stats_maintenance', DAEMON_STATS_MAINTENANCE_INTERVAL_MIN * 60, run_stats_maintenance)
+    scheduler.add_job('quota_reset', seconds_until_quota_reset, key_pool.reset_budget, run_immediately=False)
+    scheduler.add_job('run_report', DAEMON_REPORT_INTERVAL_MIN * 60, lambda: write_run_report(reset=True), run_immediately=False)
+    print(f"\n========== 수집 데몬 시작 (차트 주기: {DAEMON_CHART_INTERVAL_MIN}분, 스냅샷 점검 주기: {DAEMON_TICK_SEC}초) ==========")
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Searchlight 데이터 수집기")
+    parser.add_argument('--daemon', action='store_true', help="프로세스 내 스케줄러로 계속 실행하며 추적 영상을 주기적으로 스냅샷합니다.")
+    parser.add_argument('--shard-index', type=int, default=SHARD_INDEX, help="(국가, 카테고리) 조합 행렬 중 이 머신이 맡을 샤드 번호 (0부터)")
+    parser.add_argument('--shard-count', type=int, default=SHARD_COUNT, help="조합 행렬을 나눌 전체 샤드 수")
+    parser.add_argument('--workers', type=int, default=COLLECTOR_WORKERS, help="차트 수집을 나눠 맡을 워커 프로세스 수 (API 키 수 이하)")
+    parser.add_argument('--collect-only', action='store_true', help="차트를 수집해 스풀에 기록만 하고 종료합니다. (워커 프로세스용)")
+    args = parser.parse_args()
+
+    telemetry.start_metrics_server_from_env()
+    api_keys = get_api_keys()
+    if not api_keys or not all(os.environ.get(name) for name in REQUIRED_ENV_VARS):
+        print(f"오류: 필수 환경 변수가 .env 파일에 설정되지 않았습니다. {REQUIRED_ENV_VARS + ('YOUTUBE_API_KEYS 또는 YOUTUBE_API_KEY',)}")
+        exit(1)
+
+    key_pool = make_key_pool(api_keys)
+
+    if args.collect_only:
+        run_chart_collection(key_pool, shard_index=args.shard_index, shard_count=args.shard_count, flush=False)
+    elif args.daemon:
+        run_daemon(key_pool)
+    else:
+        print("\n========== 데이터 수집 파이프라인 시작 ==========")
+        fingerprint_cache = FingerprintCache() if INCREMENTAL_MODE else None
+        try:
+            with telemetry.span('stage', stage='chart'):
+                if args.workers > 1:
+                    run_chart_workers(api_keys, args.workers, shard_index=args.shard_index, shard_count=args.shard_count)
+                # 워커가 끝낸 조합은 건너뛰고, 남은 조합을 수집한 뒤 스풀 전체를 DB에 저장
+                chart_videos, _ = run_chart_collection(key_pool, fingerprint_cache, shard_index=args.shard_index,
+                                                       shard_count=args.shard_count)
+            if CHANNEL_STAGE_ENABLED:
+                with telemetry.span('stage', stage='channels'):
+                    run_channel_stage(key_pool, [video['channel_id'] for video in chart_videos], fingerprint_cache)
+            if REFRESH_ENABLED:
+                with telemetry.span('stage', stage='refresh'):
+                    run_refresh_stage(key_pool, exclude_ids=[video['video_id'] for video in chart_videos])
+            if MOMENTUM_ENABLED:
+                from momentum import run_momentum_update
+                with telemetry.span('stage', stage='momentum'):
+                    run_momentum_update(get_supabase())
+            if KEYWORDS_ENABLED:
+                from keyword_index import run_keyword_index_update
+                with telemetry.span('stage', stage='keywords'):
+                    run_keyword_index_update(get_supabase(), fingerprint_cache)
+            if STATS_MAINTENANCE_ENABLED:
+                from stats_retention import run_stats_maintenance
+                with telemetry.span('stage', stage='stats_maintenance'):
+                    run_stats_maintenance()
+        finally:
+            # 중간에 실패해도 그때까지의 계측 결과는 보고서로 남김
+            write_run_report()
+        print("\n========== 데이터 수집 파이프라인 완료 ==========")
@@ -16,6 +16,242 @@ if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     print("Supabase_URL과 SUPABASE_ANON_KEY가 올바르게 설정되었는지 확인해주세요.")
     exit(1)
 
+# video_stats 트리거가 쓰는 video_latest_stats 갱신 함수 (새 DB 스키마와 기존 DB 업그레이드 스크립트에서 함께 사용)
+refresh_video_latest_stats_schema = """
+-- video_stats에 새 스냅샷이 들어오면 video_latest_stats를 함께 갱신하는 트리거
+CREATE OR REPLACE FUNCTION refresh_video_latest_stats() RETURNS TRIGGER AS $$
+BEGIN
+    -- timestamp는 수집기가 찍은 스냅샷 시각이라 늦게 저장된 행이 더 작을 수 있으므로 기록 시각을 따로 남김
+    INSERT INTO video_latest_stats (video_id, stat_id, timestamp, view_count, like_count, comment_count, updated_at)
+    VALUES (NEW.video_id, NEW.stat_id, NEW.timestamp, NEW.view_count, NEW.like_count, NEW.comment_count, NOW())
+    ON CONFLICT (video_id) DO UPDATE SET
+        stat_id = EXCLUDED.stat_id,
+        timestamp = EXCLUDED.timestamp,
+        view_count = EXCLUDED.view_count,
+        like_count = EXCLUDED.like_count,
+        comment_count = EXCLUDED.comment_count,
+        updated_at = NOW()
+    WHERE video_latest_stats.timestamp IS NULL OR EXCLUDED.timestamp >= video_latest_stats.timestamp;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# videos/channels updated_at 갱신 함수와 트리거 (새 DB 스키마와 기존 DB 업그레이드 스크립트에서 함께 사용)
+touch_updated_at_schema = """
+-- videos/channels 행이 수정될 때 updated_at 갱신 (대시보드 로컬 캐시의 델타 동기화 기준)
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_videos_updated_at ON videos;
+CREATE TRIGGER trg_videos_updated_at
+BEFORE UPDATE ON videos
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+DROP TRIGGER IF EXISTS trg_channels_updated_at ON channels;
+CREATE TRIGGER trg_channels_updated_at
+BEFORE UPDATE ON channels
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+"""
+
+# video_stats 파티션 테이블, 집계 테이블, 보관 관리 함수 (새 DB 스키마와 기존 DB 전환 스크립트에서 함께 사용)
+video_stats_schema = """
+-- video_stats 테이블 (timestamp 기준 일 단위 파티션)
+-- 스냅샷이 매시간 쌓이므로 날짜별 파티션으로 나누어, 기간 조회는 해당 파티션만 읽고
+-- 보관 기간이 지난 원본은 DELETE 없이 파티션째 삭제합니다. (maintain_video_stats 참고)
+CREATE TABLE video_stats (
+    stat_id BIGSERIAL,
+    video_id TEXT REFERENCES videos(video_id),
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    view_count BIGINT,
+    like_count BIGINT,
+    comment_count BIGINT,
+    PRIMARY KEY (stat_id, timestamp) -- 파티션 키(timestamp)를 기본키에 포함해야 함
+) PARTITION BY RANGE (timestamp);
+
+-- 준비된 파티션 범위를 벗어난 스냅샷을 받아 두는 기본 파티션
+CREATE TABLE video_stats_default PARTITION OF video_stats DEFAULT;
+
+-- 영상별 시계열 조회(상세/모멘텀)용 복합 인덱스 (각 파티션에 자동 생성)
+-- 고유 인덱스이므로 수집기가 (video_id, timestamp)로 upsert하여 여러 국가 차트/샤드에서 같은 스냅샷에
+-- 수집된 영상을 한 행으로 합침
+CREATE UNIQUE INDEX IF NOT EXISTS uq_video_stats_video_id_timestamp ON video_stats (video_id, timestamp);
+
+-- 보관 기간이 지난 스냅샷을 영상별 일/주 단위로 압축한 집계 테이블
+-- (view/like/comment_count는 해당 기간 마지막 스냅샷 값, view_count_min은 첫 스냅샷 값)
+CREATE TABLE video_stats_daily (
+    video_id TEXT REFERENCES videos(video_id),
+    day DATE,
+    snapshot_count INTEGER,
+    first_timestamp TIMESTAMPTZ,
+    last_timestamp TIMESTAMPTZ,
+    view_count_min BIGINT,
+    view_count BIGINT,
+    like_count BIGINT,
+    comment_count BIGINT,
+    PRIMARY KEY (video_id, day)
+);
+
+CREATE TABLE video_stats_weekly (
+    video_id TEXT REFERENCES videos(video_id),
+    week_start DATE, -- 주의 월요일
+    snapshot_count INTEGER,
+    first_timestamp TIMESTAMPTZ,
+    last_timestamp TIMESTAMPTZ,
+    view_count_min BIGINT,
+    view_count BIGINT,
+    like_count BIGINT,
+    comment_count BIGINT,
+    PRIMARY KEY (video_id, week_start)
+);
+
+CREATE INDEX idx_video_stats_daily_day ON video_stats_daily (day);
+
+-- 수집기의 (video_id, timestamp) upsert가 이미 있는 스냅샷을 갱신(ON CONFLICT DO UPDATE)해도 최신 통계에 반영
+CREATE TRIGGER trg_video_stats_latest
+AFTER INSERT OR UPDATE ON video_stats
+FOR EACH ROW EXECUTE FUNCTION refresh_video_latest_stats();
+
+-- video_stats 일 단위 파티션 생성 (from_date부터 오늘 + days_ahead일까지, 이미 있으면 건너뜀)
+CREATE OR REPLACE FUNCTION ensure_video_stats_partitions(
+    days_ahead INTEGER DEFAULT 7,
+    from_date DATE DEFAULT CURRENT_DATE
+) RETURNS INTEGER AS $$
+DECLARE
+    d DATE;
+    part TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR d IN SELECT generate_series(from_date, CURRENT_DATE + days_ahead, INTERVAL '1 day')::DATE LOOP
+        part := format('video_stats_p%s', to_char(d, 'YYYYMMDD'));
+        IF to_regclass(part) IS NULL THEN
+            -- 파티션이 없는 동안 기본 파티션에 들어간 그날 스냅샷을 옮긴 뒤 붙임 (남아 있으면 ATTACH가 실패)
+            EXECUTE format('CREATE TABLE %I (LIKE video_stats INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part);
+            EXECUTE format('INSERT INTO %I SELECT * FROM video_stats_default WHERE timestamp >= %L AND timestamp < %L',
+                           part, d::TIMESTAMPTZ, (d + 1)::TIMESTAMPTZ);
+            DELETE FROM video_stats_default WHERE timestamp >= d::TIMESTAMPTZ AND timestamp < (d + 1)::TIMESTAMPTZ;
+            EXECUTE format('ALTER TABLE video_stats ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           part, d::TIMESTAMPTZ, (d + 1)::TIMESTAMPTZ);
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- video_stats 보관 관리 (stats_retention.py에서 매일 호출)
+-- 1. 앞으로 쓸 파티션을 미리 만듦
+-- 2. 마지막 집계 이후 끝난 날짜의 원본 스냅샷을 video_stats_daily로, 끝난 주의 일 집계를 video_stats_weekly로 집계
+-- 3. raw_retention_days가 지났고 일 집계가 끝난 날짜 파티션을 삭제, daily_retention_days가 지난 일 집계를 삭제
+-- 모멘텀 계산(최근 8일 원본)이 깨지지 않도록 원본 보관 기간은 최소 14일로 제한합니다.
+CREATE OR REPLACE FUNCTION maintain_video_stats(
+    raw_retention_days INTEGER DEFAULT 30,
+    daily_retention_days INTEGER DEFAULT 365,
+    days_ahead INTEGER DEFAULT 7
+) RETURNS JSONB AS $$
+DECLARE
+    raw_keep INTEGER := GREATEST(raw_retention_days, 14);
+    daily_keep INTEGER := GREATEST(daily_retention_days, raw_keep + 7);
+    rollup_from DATE;
+    week_from DATE;
+    created INTEGER;
+    daily_rows BIGINT;
+    weekly_rows BIGINT;
+    deleted_daily BIGINT;
+    dropped INTEGER := 0;
+    part RECORD;
+    part_day DATE;
+BEGIN
+    created := ensure_video_stats_partitions(days_ahead);
+
+    -- 마지막으로 집계한 날짜를 다시 포함해 집계 (그날 늦게 도착한 스냅샷 반영)
+    SELECT COALESCE(MAX(day), (SELECT MIN(timestamp)::DATE FROM video_stats)) INTO rollup_from FROM video_stats_daily;
+    INSERT INTO video_stats_daily (video_id, day, snapshot_count, first_timestamp, last_timestamp,
+                                   view_count_min, view_count, like_count, comment_count)
+    SELECT video_id, timestamp::DATE, COUNT(*), MIN(timestamp), MAX(timestamp),
+           (ARRAY_AGG(view_count ORDER BY timestamp))[1],
+           (ARRAY_AGG(view_count ORDER BY timestamp DESC))[1],
+           (ARRAY_AGG(like_count ORDER BY timestamp DESC))[1],
+           (ARRAY_AGG(comment_count ORDER BY timestamp DESC))[1]
+    FROM video_stats
+    WHERE timestamp >= rollup_from AND timestamp < CURRENT_DATE
+    GROUP BY video_id, timestamp::DATE
+    ON CONFLICT (video_id, day) DO UPDATE SET
+        snapshot_count = EXCLUDED.snapshot_count,
+        first_timestamp = EXCLUDED.first_timestamp,
+        last_timestamp = EXCLUDED.last_timestamp,
+        view_count_min = EXCLUDED.view_count_min,
+        view_count = EXCLUDED.view_count,
+        like_count = EXCLUDED.like_count,
+        comment_count = EXCLUDED.comment_count;
+    GET DIAGNOSTICS daily_rows = ROW_COUNT;
+
+    -- 끝난 주만 주 단위로 집계 (일 집계에서 계산하므로 원본 파티션이 삭제된 뒤에도 유지됨)
+    SELECT COALESCE(MAX(week_start), date_trunc('week', (SELECT MIN(day) FROM video_stats_daily))::DATE)
+    INTO week_from FROM video_stats_weekly;
+    INSERT INTO video_stats_weekly (video_id, week_start, snapshot_count, first_timestamp, last_timestamp,
+                                    view_count_min, view_count, like_count, comment_count)
+    SELECT video_id, date_trunc('week', day)::DATE, SUM(snapshot_count), MIN(first_timestamp), MAX(last_timestamp),
+           (ARRAY_AGG(view_count_min ORDER BY day))[1],
+           (ARRAY_AGG(view_count ORDER BY day DESC))[1],
+           (ARRAY_AGG(like_count ORDER BY day DESC))[1],
+           (ARRAY_AGG(comment_count ORDER BY day DESC))[1]
+    FROM video_stats_daily
+    WHERE day >= week_from AND day < date_trunc('week', CURRENT_DATE)::DATE
+    GROUP BY video_id, date_trunc('week', day)::DATE
+    ON CONFLICT (video_id, week_start) DO UPDATE SET
+        snapshot_count = EXCLUDED.snapshot_count,
+        first_timestamp = EXCLUDED.first_timestamp,
+        last_timestamp = EXCLUDED.last_timestamp,
+        view_count_min = EXCLUDED.view_count_min,
+        view_count = EXCLUDED.view_count,
+        like_count = EXCLUDED.like_count,
+        comment_count = EXCLUDED.comment_count;
+    GET DIAGNOSTICS weekly_rows = ROW_COUNT;
+
+    -- 보관 기간이 지난 원본 파티션 삭제 (이름의 날짜로 판단, 위에서 어제까지 집계가 끝났으므로 안전)
+    FOR part IN
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'video_stats'::REGCLASS AND c.relname ~ '^video_stats_p[0-9]{8}$'
+    LOOP
+        part_day := to_date(substring(part.relname FROM 14), 'YYYYMMDD');
+        IF part_day < CURRENT_DATE - raw_keep THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    -- 파티션 범위 밖(기본 파티션)에 들어간 오래된 원본도 같은 기준으로 삭제
+    DELETE FROM video_stats_default WHERE timestamp < CURRENT_DATE - raw_keep;
+
+    DELETE FROM video_stats_daily WHERE day < CURRENT_DATE - daily_keep;
+    GET DIAGNOSTICS deleted_daily = ROW_COUNT;
+
+    RETURN jsonb_build_object(
+        'partitions_created', created,
+        'daily_rows', daily_rows,
+        'weekly_rows', weekly_rows,
+        'partitions_dropped', dropped,
+        'daily_rows_deleted', deleted_daily
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- 파티션/집계를 삭제하는 함수이므로 anon 키로는 RPC 호출할 수 없게 하고 service_role(유지보수 작업)에만 허용
+-- (Postgres 기본값은 PUBLIC 실행 허용, Supabase는 anon/authenticated에도 기본 부여)
+REVOKE EXECUTE ON FUNCTION maintain_video_stats(INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION maintain_video_stats(INTEGER, INTEGER, INTEGER) TO service_role;
+REVOKE EXECUTE ON FUNCTION ensure_video_stats_partitions(INTEGER, DATE) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_video_stats_partitions(INTEGER, DATE) TO service_role;
+
+-- 오늘부터 7일치 파티션 준비
+SELECT ensure_video_stats_partitions(7);
+"""
+
 # SQL Schema Definition
 sql_schema = """
 -- channels 테이블
@@ -27,7 +263,10 @@ CREATE TABLE channels (
     updated_at TIMESTAMPTZ DEFAULT NOW(),
     ai_persona JSONB, -- v2.0: AI가 추정한 시청자 페르소나
     tag_dna_consistency FLOAT8, -- v2.0: 태그 DNA 일관성 점수
-    growth_acceleration FLOAT8 -- v2.0: 채널 성장 가속도 점수
+    growth_acceleration FLOAT8, -- v2.0: 채널 성장 가속도 점수
+    subscriber_count BIGINT, -- 채널 수집 단계: 최신 구독자 수
+    weekly_subscriber_growth BIGINT, -- 채널 수집 단계: 최근 7일 구독자 증가 수
+    growth_updated_at TIMESTAMPTZ -- 채널 수집 단계: 성장 지표 마지막 계산 시각
 );
 
 -- channel_stats 테이블
@@ -43,6 +282,7 @@ CREATE TABLE channel_stats (
 CREATE TABLE videos (
     video_id TEXT PRIMARY KEY,
     channel_id TEXT REFERENCES channels(channel_id),
+    category_id TEXT, -- YouTube 카테고리 ID (카테고리 내 백분위 계산용)
     title TEXT,
     published_at TIMESTAMPTZ,
     tags TEXT[],
@@ -55,26 +295,162 @@ CREATE TABLE videos (
     momentum_score FLOAT8, -- v2.0: 모멘텀 점수
     viral_score INTEGER, -- v2.0: 바이럴 예측 점수
     ai_recipe JSONB, -- v2.0: AI가 생성한 콘텐츠 레시피
-    ai_comment_analysis JSONB -- v2.0: AI 댓글 분석 결과
+    ai_comment_analysis JSONB, -- v2.0: AI 댓글 분석 결과
+    view_velocity FLOAT8, -- 모멘텀 엔진: 최근 시간당 조회수 증가량
+    view_acceleration FLOAT8, -- 모멘텀 엔진: 시간당 velocity 변화량
+    velocity_ma7 FLOAT8, -- 모멘텀 엔진: 7일 velocity 이동 평균
+    milestone_hours JSONB, -- 모멘텀 엔진: 조회수 마일스톤(1K/10K/100K/1M) 도달 시간 (게시 후 시간)
+    momentum_updated_at TIMESTAMPTZ -- 모멘텀 엔진: 마지막 계산 시각
 );
 
--- video_stats 테이블
-CREATE TABLE video_stats (
-    stat_id BIGSERIAL PRIMARY KEY,
-    video_id TEXT REFERENCES videos(video_id),
-    timestamp TIMESTAMPTZ DEFAULT NOW(),
+-- video_latest_stats 테이블 (영상별 최신 통계 스냅샷, 대시보드 조회용)
+CREATE TABLE video_latest_stats (
+    video_id TEXT PRIMARY KEY REFERENCES videos(video_id),
+    stat_id BIGINT,
+    timestamp TIMESTAMPTZ,
     view_count BIGINT,
     like_count BIGINT,
-    comment_count BIGINT
+    comment_count BIGINT,
+    updated_at TIMESTAMPTZ DEFAULT NOW() -- 행이 기록된 서버 시각 (대시보드 로컬 캐시의 델타 동기화 기준)
 );
 
+""" + refresh_video_latest_stats_schema + video_stats_schema + """
+
+-- 기존 video_stats 데이터로 video_latest_stats 초기 채우기 (최초 1회)
+INSERT INTO video_latest_stats (video_id, stat_id, timestamp, view_count, like_count, comment_count)
+SELECT DISTINCT ON (video_id) video_id, stat_id, timestamp, view_count, like_count, comment_count
+FROM video_stats
+ORDER BY video_id, timestamp DESC, stat_id DESC
+ON CONFLICT (video_id) DO NOTHING;
+
 -- keywords 테이블
 CREATE TABLE keywords (
     keyword TEXT PRIMARY KEY,
     saturation_index FLOAT8, -- v2.0: 콘텐츠 포화도 지수
     contagion_index FLOAT8, -- v2.0: 토픽 전염성 지수
-    last_updated TIMESTAMPTZ DEFAULT NOW()
+    last_updated TIMESTAMPTZ DEFAULT NOW(),
+    video_count INTEGER, -- 키워드 색인: 최근 영상 중 키워드가 등장한 영상 수 (공급)
+    channel_count INTEGER, -- 키워드 색인: 키워드를 사용한 채널 수
+    recent_video_count INTEGER, -- 키워드 색인: 최근 7일 게시 영상 수
+    total_vph FLOAT8, -- 키워드 색인: 영상 VPH 합 (수요)
+    avg_vph FLOAT8, -- 키워드 색인: 영상당 평균 VPH
+    opportunity_score FLOAT8 -- 키워드 색인: 기회 점수 (수요 대비 공급이 적고 확산 중일수록 높음)
+);
+
+-- keyword_videos 테이블 (키워드 -> 영상 역색인, 기본키 순서대로 키워드 조회가 인덱스 스캔)
+CREATE TABLE keyword_videos (
+    keyword TEXT,
+    video_id TEXT REFERENCES videos(video_id),
+    source TEXT, -- 'tag' 또는 'title'
+    PRIMARY KEY (keyword, video_id)
 );
+
+CREATE INDEX idx_keyword_videos_video_id ON keyword_videos (video_id);
+CREATE INDEX idx_keywords_opportunity_score ON keywords (opportunity_score DESC);
+CREATE INDEX idx_keywords_last_updated ON keywords (last_updated);
+
+""" + touch_updated_at_schema + """
+CREATE INDEX idx_videos_updated_at ON videos (updated_at);
+CREATE INDEX idx_channels_updated_at ON channels (updated_at);
+CREATE INDEX idx_video_latest_stats_timestamp ON video_latest_stats (timestamp);
+CREATE INDEX idx_video_latest_stats_updated_at ON video_latest_stats (updated_at);
+-- 채널 성장 지표 계산(채널별 최근 이력 조회)용 복합 인덱스
+CREATE INDEX idx_channel_stats_channel_id_timestamp ON channel_stats (channel_id, timestamp DESC);
+
+"""
+
+# 기존 DB 업그레이드: 처음 배포된 스키마(channels/channel_stats/videos/video_stats/keywords)에서 만든 DB에
+# 이후 추가된 컬럼/테이블/함수/트리거/인덱스를 더하는 스크립트 (여러 번 실행해도 안전, 파티션 전환보다 먼저 실행)
+schema_upgrade = """
+-- 추가된 컬럼
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS subscriber_count BIGINT;
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS weekly_subscriber_growth BIGINT;
+ALTER TABLE channels ADD COLUMN IF NOT EXISTS growth_updated_at TIMESTAMPTZ;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS category_id TEXT;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS view_velocity FLOAT8;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS view_acceleration FLOAT8;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS velocity_ma7 FLOAT8;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS milestone_hours JSONB;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS momentum_updated_at TIMESTAMPTZ;
+ALTER TABLE keywords ADD COLUMN IF NOT EXISTS video_count INTEGER;
+ALTER TABLE keywords ADD COLUMN IF NOT EXISTS channel_count INTEGER;
+ALTER TABLE keywords ADD COLUMN IF NOT EXISTS recent_video_count INTEGER;
+ALTER TABLE keywords ADD COLUMN IF NOT EXISTS total_vph FLOAT8;
+ALTER TABLE keywords ADD COLUMN IF NOT EXISTS avg_vph FLOAT8;
+ALTER TABLE keywords ADD COLUMN IF NOT EXISTS opportunity_score FLOAT8;
+
+-- video_latest_stats 테이블과 갱신 트리거
+CREATE TABLE IF NOT EXISTS video_latest_stats (
+    video_id TEXT PRIMARY KEY REFERENCES videos(video_id),
+    stat_id BIGINT,
+    timestamp TIMESTAMPTZ,
+    view_count BIGINT,
+    like_count BIGINT,
+    comment_count BIGINT,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+ALTER TABLE video_latest_stats ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+""" + refresh_video_latest_stats_schema + """
+DROP TRIGGER IF EXISTS trg_video_stats_latest ON video_stats;
+CREATE TRIGGER trg_video_stats_latest
+AFTER INSERT OR UPDATE ON video_stats
+FOR EACH ROW EXECUTE FUNCTION refresh_video_latest_stats();
+
+-- video_stats 시계열 인덱스를 (video_id, timestamp) 고유 인덱스로 교체 (같은 시각의 중복 스냅샷은 하나만 남김)
+DELETE FROM video_stats a USING video_stats b
+WHERE a.video_id = b.video_id AND a.timestamp = b.timestamp AND a.stat_id < b.stat_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_video_stats_video_id_timestamp ON video_stats (video_id, timestamp);
+DROP INDEX IF EXISTS idx_video_stats_video_id_timestamp;
+
+-- 기존 video_stats 데이터로 video_latest_stats 초기 채우기 (이미 있는 영상은 건너뜀)
+INSERT INTO video_latest_stats (video_id, stat_id, timestamp, view_count, like_count, comment_count)
+SELECT DISTINCT ON (video_id) video_id, stat_id, timestamp, view_count, like_count, comment_count
+FROM video_stats
+ORDER BY video_id, timestamp DESC, stat_id DESC
+ON CONFLICT (video_id) DO NOTHING;
+
+-- keyword_videos 역색인 테이블
+CREATE TABLE IF NOT EXISTS keyword_videos (
+    keyword TEXT,
+    video_id TEXT REFERENCES videos(video_id),
+    source TEXT,
+    PRIMARY KEY (keyword, video_id)
+);
+""" + touch_updated_at_schema + """
+-- 인덱스
+CREATE INDEX IF NOT EXISTS idx_keyword_videos_video_id ON keyword_videos (video_id);
+CREATE INDEX IF NOT EXISTS idx_keywords_opportunity_score ON keywords (opportunity_score DESC);
+CREATE INDEX IF NOT EXISTS idx_keywords_last_updated ON keywords (last_updated);
+CREATE INDEX IF NOT EXISTS idx_videos_updated_at ON videos (updated_at);
+CREATE INDEX IF NOT EXISTS idx_channels_updated_at ON channels (updated_at);
+CREATE INDEX IF NOT EXISTS idx_video_latest_stats_timestamp ON video_latest_stats (timestamp);
+CREATE INDEX IF NOT EXISTS idx_video_latest_stats_updated_at ON video_latest_stats (updated_at);
+CREATE INDEX IF NOT EXISTS idx_channel_stats_channel_id_timestamp ON channel_stats (channel_id, timestamp DESC);
+"""
+
+# 기존 DB 전환: 파티션이 없는 기존 video_stats를 파티션 테이블로 옮기는 스크립트 (기존 DB 업그레이드 후 1회 실행)
+# 기존 스냅샷 날짜의 파티션을 모두 만든 뒤 stat_id를 유지한 채 옮기고, 다음 maintain_video_stats 실행에서
+# 보관 기간이 지난 날짜는 일/주 집계로 압축됩니다.
+video_stats_partition_migration = """
+BEGIN;
+ALTER TABLE video_stats RENAME TO video_stats_legacy;
+ALTER INDEX video_stats_pkey RENAME TO video_stats_legacy_pkey;
+-- 업그레이드 스크립트가 기존 테이블에 만든 인덱스도 이름을 비워 둠 (새 테이블에서 같은 이름으로 생성)
+ALTER INDEX IF EXISTS uq_video_stats_video_id_timestamp RENAME TO video_stats_legacy_video_id_timestamp_key;
+ALTER INDEX IF EXISTS idx_video_stats_video_id_timestamp RENAME TO video_stats_legacy_video_id_timestamp_idx;
+ALTER SEQUENCE video_stats_stat_id_seq RENAME TO video_stats_legacy_stat_id_seq;
+DROP TRIGGER IF EXISTS trg_video_stats_latest ON video_stats_legacy;
+""" + video_stats_schema + """
+SELECT ensure_video_stats_partitions(7, COALESCE((SELECT MIN(timestamp)::DATE FROM video_stats_legacy), CURRENT_DATE));
+-- video_latest_stats는 이미 채워져 있으므로 옮기는 동안 트리거를 끔
+ALTER TABLE video_stats DISABLE TRIGGER trg_video_stats_latest;
+INSERT INTO video_stats (stat_id, video_id, timestamp, view_count, like_count, comment_count)
+SELECT stat_id, video_id, COALESCE(timestamp, NOW()), view_count, like_count, comment_count FROM video_stats_legacy
+ON CONFLICT (video_id, timestamp) DO NOTHING;
+ALTER TABLE video_stats ENABLE TRIGGER trg_video_stats_latest;
+SELECT setval(pg_get_serial_sequence('video_stats', 'stat_id'), (SELECT COALESCE(MAX(stat_id), 1) FROM video_stats));
+DROP TABLE video_stats_legacy;
+COMMIT;
 """
 
 # Supabase 클라이언트 초기화 (실제 DDL 실행은 수동으로)
@@ -86,8 +462,15 @@ CREATE TABLE keywords (
 # except Exception as e:
 #     print(f"Supabase 클라이언트 연결 실패: {e}")
 
-print("--- Searchlight Supabase 테이블 생성 SQL 스크립트 ---")
+print("--- (새 DB) Searchlight Supabase 테이블 생성 SQL 스크립트 ---")
 print(sql_schema)
 print("--------------------------------------------------")
-print("\n위 SQL 스크립트를 복사하여 Supabase 대시보드의 'SQL Editor'에 붙여넣고 실행해주세요.")
+print("\n--- (기존 DB만, 1단계) 스키마 업그레이드 SQL 스크립트 ---")
+print(schema_upgrade)
+print("--------------------------------------------------")
+print("\n--- (기존 DB만, 2단계) video_stats 파티션 전환 SQL 스크립트 (아직 전환하지 않은 경우 1회) ---")
+print(video_stats_partition_migration)
+print("--------------------------------------------------")
+print("\n새 DB는 생성 스크립트만, 기존 DB는 업그레이드 -> 파티션 전환 순서로 실행해야 합니다.")
+print("위 SQL 스크립트를 복사하여 Supabase 대시보드의 'SQL Editor'에 붙여넣고 실행해주세요.")
 print("실행이 완료되면 저에게 알려주세요.")
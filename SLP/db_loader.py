@@ -0,0 +1,108 @@
+# db_loader.py
+# Supabase 테이블을 키셋 페이지네이션으로 나누어 읽어오는 공용 로더입니다.
+#
+# PostgREST는 한 번의 select에 반환하는 행 수에 상한(기본 1000행)이 있어
+# 단일 execute()로는 결과가 조용히 잘립니다. 여기서는 정렬 키(stat_id, video_id 등)의
+# 마지막 값을 커서로 삼아 `key > 커서` 조건으로 다음 페이지를 요청하므로,
+# 테이블 크기와 상관없이 모든 행을 일정한 크기의 묶음으로 받아볼 수 있습니다.
+#
+# pandas는 DataFrame을 만드는 함수에서만 import합니다. (행 묶음만 쓰는 수집기는 pandas 없이 시작)
+
+# PostgREST 기본 max-rows와 맞춘 기본 페이지 크기
+DEFAULT_BATCH_SIZE = 1000
+
+
+def iter_table_batches(client, table, columns, key, batch_size=DEFAULT_BATCH_SIZE, filters=None, max_rows=None):
+    """
+    테이블을 key 기준 오름차순 키셋 페이지네이션으로 순회하며 행 묶음(list[dict])을 생성합니다.
+
+    - columns: 가져올 컬럼 목록 (key 컬럼은 자동으로 포함)
+    - key: 유일하고 정렬 가능한 컬럼 (예: 'stat_id', 'video_id')
+    - filters: 쿼리 빌더를 받아 조건을 추가해 반환하는 함수 (예: lambda q: q.gte('timestamp', since))
+    - max_rows: 최대로 읽어올 행 수 (메모리 상한, None이면 제한 없음)
+    """
+    select_columns = list(columns)
+    if key not in select_columns:
+        select_columns.append(key)
+    select_clause = ', '.join(select_columns)
+
+    last_key = None
+    fetched = 0
+    while True:
+        limit = batch_size
+        if max_rows is not None:
+            limit = min(limit, max_rows - fetched)
+            if limit <= 0:
+                return
+
+        query = client.table(table).select(select_clause)
+        if filters is not None:
+            query = filters(query)
+        if last_key is not None:
+            query = query.gt(key, last_key)
+        rows = query.order(key).limit(limit).execute().data or []
+
+        if not rows:
+            return
+        yield rows
+
+        fetched += len(rows)
+        last_key = rows[-1][key]
+        # 서버의 max-rows가 batch_size보다 작으면 페이지가 짧게 오므로, 짧은 페이지를 끝으로 보지 않고
+        # 빈 페이지가 올 때까지 계속 요청 (max_rows에 도달하면 위에서 종료)
+
+
+def iter_table_frames(client, table, columns, key, dtypes=None, **kwargs):
+    """iter_table_batches의 각 묶음을 dtypes가 적용된 DataFrame 조각으로 변환하여 생성합니다."""
+    for rows in iter_table_batches(client, table, columns, key, **kwargs):
+        yield _to_frame(rows, dtypes)
+
+
+def load_table(client, table, columns, key, dtypes=None, **kwargs):
+    """테이블 전체(또는 max_rows까지)를 페이지 단위로 읽어 하나의 DataFrame으로 합쳐 반환합니다."""
+    import pandas as pd
+
+    frames = list(iter_table_frames(client, table, columns, key, dtypes=dtypes, **kwargs))
+    if not frames:
+        return pd.DataFrame(columns=list(columns))
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_rows_by_keys(client, table, columns, key, keys, dtypes=None, chunk_size=200):
+    """
+    key 값 목록에 해당하는 행들을 in_ 조건으로 나누어 조회해 하나의 DataFrame으로 반환합니다.
+    (URL 길이 제한을 피하기 위해 chunk_size개씩 요청)
+    """
+    import pandas as pd
+
+    select_columns = list(columns)
+    if key not in select_columns:
+        select_columns.append(key)
+    select_clause = ', '.join(select_columns)
+
+    keys = list(keys)
+    frames = []
+    for start in range(0, len(keys), chunk_size):
+        rows = client.table(table).select(select_clause).in_(key, keys[start:start + chunk_size]).execute().data or []
+        if rows:
+            frames.append(_to_frame(rows, dtypes))
+    if not frames:
+        return pd.DataFrame(columns=select_columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _to_frame(rows, dtypes):
+    """행 묶음을 DataFrame으로 만들고 컬럼 타입을 지정합니다. 숫자 컬럼은 문자열로 와도 변환합니다."""
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(rows)
+    for column, dtype in (dtypes or {}).items():
+        if column not in df.columns:
+            continue
+        if dtype == 'datetime':
+            df[column] = pd.to_datetime(df[column], utc=True)
+        elif dtype in ('int64', 'float64'):
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
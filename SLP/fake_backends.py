@@ -0,0 +1,433 @@
+# fake_backends.py
+# 벤치마크용 로컬 Supabase/YouTube 대역(stand-in)입니다. (benchmark.py에서 사용)
+#
+# - FakeSupabaseClient: supabase-py 쿼리 빌더 중 이 프로젝트가 쓰는 부분(select/eq/gt/gte/lt/lte/in_/order/limit,
+#   insert/upsert/delete)을 SQLite 파일 위에서 흉내 냅니다. video_latest_stats/updated_at 트리거도
+#   create_tables.py와 같은 동작으로 재현하므로, 수집기와 대시보드 코드를 수정 없이 실행할 수 있습니다.
+# - FakeYouTubeClient: videos.list(chart/id)와 channels.list 응답을 시드 기반으로 합성합니다.
+#   같은 시드면 항상 같은 응답을 만들며, 요청마다 지연 시간을 줄 수 있습니다.
+
+import json
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# 테이블별 기본키, 컬럼 (SQLite 타입), 타임스탬프/JSON 컬럼
+FAKE_TABLES = {
+    'channels': {
+        'key': 'channel_id',
+        'columns': {
+            'channel_id': 'TEXT PRIMARY KEY', 'name': 'TEXT', 'thumbnail_url': 'TEXT', 'created_at': 'TEXT', 'updated_at': 'TEXT',
+            'subscriber_count': 'INTEGER', 'weekly_subscriber_growth': 'INTEGER', 'growth_acceleration': 'REAL',
+            'growth_updated_at': 'TEXT',
+        },
+    },
+    'channel_stats': {
+        'key': 'stat_id',
+        'columns': {
+            'stat_id': 'INTEGER PRIMARY KEY AUTOINCREMENT', 'channel_id': 'TEXT', 'timestamp': 'TEXT',
+            'subscriber_count': 'INTEGER', 'view_count': 'INTEGER',
+        },
+    },
+    'videos': {
+        'key': 'video_id',
+        'columns': {
+            'video_id': 'TEXT PRIMARY KEY', 'channel_id': 'TEXT', 'category_id': 'TEXT', 'title': 'TEXT', 'published_at': 'TEXT', 'tags': 'TEXT',
+            'duration_sec': 'INTEGER', 'thumbnail_url': 'TEXT', 'created_at': 'TEXT', 'updated_at': 'TEXT',
+            'lifecycle_prediction': 'TEXT', 'momentum_score': 'REAL', 'viral_score': 'REAL', 'view_velocity': 'REAL',
+            'view_acceleration': 'REAL', 'velocity_ma7': 'REAL', 'milestone_hours': 'TEXT', 'momentum_updated_at': 'TEXT',
+        },
+    },
+    'video_stats': {
+        'key': 'stat_id',
+        'columns': {
+            'stat_id': 'INTEGER PRIMARY KEY AUTOINCREMENT', 'video_id': 'TEXT', 'timestamp': 'TEXT',
+            'view_count': 'INTEGER', 'like_count': 'INTEGER', 'comment_count': 'INTEGER',
+        },
+    },
+    'video_latest_stats': {
+        'key': 'video_id',
+        'columns': {
+            'video_id': 'TEXT PRIMARY KEY', 'stat_id': 'INTEGER', 'timestamp': 'TEXT',
+            'view_count': 'INTEGER', 'like_count': 'INTEGER', 'comment_count': 'INTEGER', 'updated_at': 'TEXT',
+        },
+    },
+    'keywords': {
+        'key': 'keyword',
+        'columns': {
+            'keyword': 'TEXT PRIMARY KEY', 'saturation_index': 'REAL', 'contagion_index': 'REAL', 'last_updated': 'TEXT',
+            'video_count': 'INTEGER', 'channel_count': 'INTEGER', 'recent_video_count': 'INTEGER', 'total_vph': 'REAL',
+            'avg_vph': 'REAL', 'opportunity_score': 'REAL',
+        },
+    },
+    'keyword_videos': {
+        'key': 'keyword,video_id',
+        'columns': {'keyword': 'TEXT', 'video_id': 'TEXT', 'source': 'TEXT'},
+    },
+}
+TIMESTAMP_COLUMNS = {
+    'created_at', 'updated_at', 'timestamp', 'published_at', 'last_updated', 'growth_updated_at', 'momentum_updated_at',
+}
+JSON_COLUMNS = {'tags', 'milestone_hours'}
+# PostgREST 타임스탬프 출력과 같은 UTC ISO 8601 형식 (문자열 비교가 시간 순서와 일치하도록 자릿수 고정)
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f+00:00'
+_SQL_NOW = "(strftime('%Y-%m-%dT%H:%M:%f', 'now') || '000+00:00')"
+
+# video_stats upsert가 기존 스냅샷을 갱신(ON CONFLICT DO UPDATE)해도 반영되도록 INSERT/UPDATE 모두에 트리거를 둠
+# (SQLite 트리거는 이벤트를 하나만 받으므로 같은 본문으로 두 개를 만듦)
+_LATEST_STATS_TRIGGER_BODY = f"""
+BEGIN
+    INSERT INTO video_latest_stats (video_id, stat_id, timestamp, view_count, like_count, comment_count, updated_at)
+    VALUES (NEW.video_id, NEW.stat_id, NEW.timestamp, NEW.view_count, NEW.like_count, NEW.comment_count, {_SQL_NOW})
+    ON CONFLICT (video_id) DO UPDATE SET
+        stat_id = excluded.stat_id, timestamp = excluded.timestamp, view_count = excluded.view_count,
+        like_count = excluded.like_count, comment_count = excluded.comment_count, updated_at = excluded.updated_at
+    WHERE video_latest_stats.timestamp IS NULL OR excluded.timestamp >= video_latest_stats.timestamp;
+END;"""
+
+_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS trg_video_stats_latest AFTER INSERT ON video_stats{_LATEST_STATS_TRIGGER_BODY}
+CREATE TRIGGER IF NOT EXISTS trg_video_stats_latest_update AFTER UPDATE ON video_stats{_LATEST_STATS_TRIGGER_BODY}
+CREATE TRIGGER IF NOT EXISTS trg_videos_updated_at AFTER UPDATE ON videos
+BEGIN
+    UPDATE videos SET updated_at = {_SQL_NOW} WHERE video_id = NEW.video_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_channels_updated_at AFTER UPDATE ON channels
+BEGIN
+    UPDATE channels SET updated_at = {_SQL_NOW} WHERE channel_id = NEW.channel_id;
+END;
+"""
+
+
+def format_timestamp(value):
+    """ISO 8601 문자열/datetime을 고정 형식의 UTC 문자열로 변환합니다."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def _encode(column, value):
+    if column in TIMESTAMP_COLUMNS:
+        return format_timestamp(value)
+    if column in JSON_COLUMNS and value is not None:
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class FakeAPIError(Exception):
+    """PostgREST APIError 흉내. 제약 위반이면 code에 SQLSTATE(23xxx)를 담습니다."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class _FakeQuery:
+    """supabase-py 쿼리 빌더 흉내. 메서드 체이닝 후 execute()에서 SQL 하나로 실행합니다."""
+
+    def __init__(self, client, table):
+        if table not in FAKE_TABLES:
+            raise ValueError(f"알 수 없는 테이블: {table}")
+        self._client = client
+        self._table = table
+        self._action = 'select'
+        self._columns = '*'
+        self._rows = None
+        self._on_conflict = None
+        self._where = []
+        self._params = []
+        self._order = None
+        self._limit = None
+
+    def select(self, columns='*'):
+        self._action = 'select'
+        self._columns = columns
+        return self
+
+    def insert(self, rows):
+        self._action, self._rows = 'insert', rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._action, self._rows = 'upsert', rows if isinstance(rows, list) else [rows]
+        self._on_conflict = on_conflict or FAKE_TABLES[self._table]['key']
+        return self
+
+    def delete(self):
+        self._action = 'delete'
+        return self
+
+    def _filter(self, column, operator, value):
+        self._where.append(f'"{column}" {operator} ?')
+        self._params.append(_encode(column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, '=', value)
+
+    def gt(self, column, value):
+        return self._filter(column, '>', value)
+
+    def gte(self, column, value):
+        return self._filter(column, '>=', value)
+
+    def lt(self, column, value):
+        return self._filter(column, '<', value)
+
+    def lte(self, column, value):
+        return self._filter(column, '<=', value)
+
+    def in_(self, column, values):
+        values = list(values)
+        self._where.append(f'"{column}" IN ({", ".join("?" * len(values))})' if values else '0')
+        self._params.extend(_encode(column, value) for value in values)
+        return self
+
+    def order(self, column, desc=False):
+        self._order = f'"{column}" {"DESC" if desc else "ASC"}'
+        return self
+
+    def limit(self, count):
+        self._limit = int(count)
+        return self
+
+    def execute(self):
+        return self._client._execute(self)
+
+    def _where_clause(self):
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ''
+
+    def _select_sql(self):
+        if self._columns.strip() == '*':
+            column_list = '*'
+        else:
+            columns = [column.strip() for column in self._columns.split(',') if column.strip()]
+            if any('(' in column for column in columns):
+                raise NotImplementedError("FakeSupabaseClient는 외래 키 임베딩 select를 지원하지 않습니다.")
+            column_list = ', '.join(f'"{column}"' for column in columns)
+        sql = f'SELECT {column_list} FROM "{self._table}"{self._where_clause()}'
+        if self._order:
+            sql += f' ORDER BY {self._order}'
+        # PostgREST max-rows(1000)와 같은 상한
+        sql += f' LIMIT {min(self._limit or self._client.max_rows, self._client.max_rows)}'
+        return sql, self._params
+
+    def _write_sql(self):
+        columns = list(dict.fromkeys(column for row in self._rows for column in row))
+        values = [tuple(_encode(column, row.get(column)) for column in columns) for row in self._rows]
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        sql = f'INSERT INTO "{self._table}" ({column_list}) VALUES ({", ".join("?" * len(columns))})'
+        if self._action == 'upsert':
+            conflict_columns = [column.strip() for column in self._on_conflict.split(',')]
+            updates = [f'"{column}" = excluded."{column}"' for column in columns if column not in conflict_columns]
+            conflict_target = ', '.join(f'"{column}"' for column in conflict_columns)
+            sql += f' ON CONFLICT ({conflict_target}) ' + (f'DO UPDATE SET {", ".join(updates)}' if updates else 'DO NOTHING')
+        return sql, values
+
+
+class FakeSupabaseClient:
+    """SQLite 파일 하나로 동작하는 supabase-py 클라이언트 대역입니다. (스레드 간 공유 가능)"""
+
+    def __init__(self, path, latency_sec=0.0, max_rows=1000):
+        self.path = path
+        self.latency_sec = latency_sec
+        self.max_rows = max_rows
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for table, spec in FAKE_TABLES.items():
+            column_defs = []
+            for column, column_type in spec['columns'].items():
+                if column in ('created_at', 'updated_at', 'timestamp', 'last_updated'):
+                    column_type += f' DEFAULT {_SQL_NOW}'
+                column_defs.append(f'"{column}" {column_type}')
+            if ',' in spec['key']:
+                column_defs.append(f'PRIMARY KEY ({spec["key"]})')
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(column_defs)})')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_videos_updated_at ON videos (updated_at)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos (published_at)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_video_latest_stats_timestamp ON video_latest_stats (timestamp)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_video_latest_stats_updated_at ON video_latest_stats (updated_at)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_keyword_videos_video_id ON keyword_videos (video_id)')
+        self._conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS uq_video_stats_video_id_timestamp ON video_stats (video_id, timestamp)')
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+    def bulk_load(self, table, rows):
+        """트리거 설치 전 초기 데이터를 빠르게 적재합니다. rows는 dict 반복자입니다."""
+        columns = list(FAKE_TABLES[table]['columns'])
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        sql = f'INSERT INTO "{table}" ({column_list}) VALUES ({", ".join("?" * len(columns))})'
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany(sql, (tuple(_encode(column, row.get(column)) for column in columns) for row in rows))
+            self._conn.execute('COMMIT')
+
+    def install_triggers(self):
+        """create_tables.py와 같은 트리거를 설치하고 video_latest_stats를 기존 이력으로 채웁니다."""
+        with self._lock:
+            self._conn.executescript(_TRIGGERS)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video_latest_stats (video_id, stat_id, timestamp, view_count, like_count, comment_count) "
+                "SELECT video_id, stat_id, timestamp, view_count, like_count, comment_count FROM video_stats "
+                "WHERE stat_id IN (SELECT MAX(stat_id) FROM video_stats GROUP BY video_id)"
+            )
+
+    def count(self, table):
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+    def _execute(self, query):
+        if self.latency_sec:
+            time.sleep(self.latency_sec)
+        with self._lock:
+            self.request_count += 1
+            if query._action == 'select':
+                sql, params = query._select_sql()
+                rows = [dict(row) for row in self._conn.execute(sql, params)]
+                for row in rows:
+                    for column in JSON_COLUMNS & row.keys():
+                        if row[column] is not None:
+                            row[column] = json.loads(row[column])
+                return _FakeResponse(rows)
+            if query._action == 'delete':
+                self._conn.execute(f'DELETE FROM "{query._table}"{query._where_clause()}', query._params)
+                return _FakeResponse([])
+            if not query._rows:
+                return _FakeResponse([])
+            sql, values = query._write_sql()
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(sql, values)
+                self._conn.execute('COMMIT')
+            except sqlite3.IntegrityError as e:
+                self._conn.execute('ROLLBACK')
+                raise FakeAPIError(str(e), code='23000') from e
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            return _FakeResponse(query._rows)
+
+    def close(self):
+        self._conn.close()
+
+
+# --- YouTube ---
+TITLE_WORDS = [
+    '고양이', '강아지', '브이로그', '먹방', '리뷰', '언박싱', '여행', '캠핑', '요리', '레시피', '게임', '공략', '코미디',
+    '상황극', '메이크업', '패션', '하울', '운동', '다이어트', '과학', '실험', '아이폰', '갤럭시', 'AI', '코딩', '주식',
+]
+
+
+class _FakeRequest:
+    def __init__(self, client, handler, params, method_id):
+        self.methodId = method_id
+        self._client = client
+        self._handler = handler
+        self._params = params
+
+    def execute(self):
+        if self._client.latency_sec:
+            time.sleep(self._client.latency_sec)
+        with self._client._lock:
+            self._client.request_count += 1
+        return self._handler(**self._params)
+
+
+class _FakeResource:
+    def __init__(self, client, handler, name):
+        self._client = client
+        self._handler = handler
+        self._name = name
+
+    def list(self, **params):
+        return _FakeRequest(self._client, self._handler, params, f"youtube.{self._name}.list")
+
+
+class FakeYouTubeClient:
+    """
+    YouTube Data API v3 클라이언트 대역입니다.
+    (국가, 카테고리)마다 chart_size개의 인기 영상 차트를 만들고, 영상/채널 통계는 호출 시각에 따라 증가합니다.
+    """
+
+    def __init__(self, seed=0, chart_size=200, channel_count=500, latency_sec=0.0):
+        self.seed = seed
+        self.chart_size = chart_size
+        self.channel_count = channel_count
+        self.latency_sec = latency_sec
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def videos(self):
+        return _FakeResource(self, self._videos_list, 'videos')
+
+    def channels(self):
+        return _FakeResource(self, self._channels_list, 'channels')
+
+    def _video_id(self, region_code, category_id, rank):
+        return f"{region_code}{category_id}v{rank:05d}"
+
+    def _video_item(self, video_id, category_id=None):
+        rng = random.Random(f"{self.seed}:{video_id}")
+        channel_index = rng.randrange(self.channel_count)
+        published_at = datetime.now(timezone.utc) - timedelta(hours=rng.uniform(1, 24 * 14))
+        words = rng.sample(TITLE_WORDS, 3)
+        base_views = int(rng.lognormvariate(10, 1.5))
+        # 실행 중에 다시 조회하면 조회수가 늘어남
+        views = base_views + int((time.time() - self._started) * rng.uniform(0, 5))
+        return {
+            'id': video_id,
+            'snippet': {
+                'channelId': f"UCfake{channel_index:06d}",
+                'channelTitle': f"채널 {channel_index}",
+                'categoryId': category_id or rng.choice(['15', '22', '23', '26', '28']),
+                'title': f"{words[0]}의 {words[1]} {words[2]} 모음",
+                'publishedAt': published_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'tags': rng.sample(TITLE_WORDS, rng.randrange(0, 6)),
+                'thumbnails': {'high': {'url': f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}},
+            },
+            'contentDetails': {'duration': f"PT{rng.randrange(0, 60)}M{rng.randrange(0, 60)}S"},
+            'statistics': {
+                'viewCount': str(views),
+                'likeCount': str(int(views * rng.uniform(0.01, 0.08))),
+                'commentCount': str(int(views * rng.uniform(0.001, 0.01))),
+            },
+        }
+
+    def _videos_list(self, part=None, chart=None, regionCode='KR', videoCategoryId='0', maxResults=5, pageToken=None, id=None):
+        if id is not None:
+            return {'items': [self._video_item(video_id) for video_id in id.split(',')]}
+        start = int(pageToken or 0)
+        end = min(start + maxResults, self.chart_size)
+        response = {'items': [self._video_item(self._video_id(regionCode, videoCategoryId, rank), videoCategoryId)
+                              for rank in range(start, end)]}
+        if end < self.chart_size:
+            response['nextPageToken'] = str(end)
+        return response
+
+    def _channels_list(self, part=None, id='', maxResults=5):
+        items = []
+        for channel_id in id.split(','):
+            rng = random.Random(f"{self.seed}:{channel_id}")
+            items.append({
+                'id': channel_id,
+                'snippet': {'title': f"채널 {channel_id[-6:]}", 'thumbnails': {'high': {'url': f"https://yt3.ggpht.com/{channel_id}"}}},
+                'statistics': {'subscriberCount': str(int(rng.lognormvariate(9, 2))), 'viewCount': str(int(rng.lognormvariate(14, 2)))},
+            })
+        return {'items': items}
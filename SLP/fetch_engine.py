@@ -0,0 +1,181 @@
+# fetch_engine.py
+# YouTube Data API 호출을 동시에 실행하기 위한 엔진입니다.
+# - 할당량(quota unit) 기반 토큰 버킷 리미터, 여러 API 키를 나누어 쓰는 키 풀
+# - 403(rate limit)/429/5xx 및 네트워크 오류에 대한 지수 백오프 재시도
+# - 스레드 풀 기반 작업 실행과 작업별 소요 시간 기록
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import telemetry
+
+# 재시도할 HTTP 상태 코드 (403은 아래 _is_retryable에서 사유를 추가로 확인)
+RETRYABLE_STATUS = {403, 429, 500, 502, 503, 504}
+# 재시도해도 소용없는 403 사유 (일일 할당량 소진, API 비활성화 등)
+NON_RETRYABLE_REASONS = (b'quotaExceeded', b'dailyLimitExceeded', b'accessNotConfigured', b'forbidden')
+
+
+class QuotaExhaustedError(Exception):
+    """실행에 배정된 할당량(daily_budget)을 모두 사용했을 때 발생합니다."""
+
+
+class QuotaRateLimiter:
+    """
+    YouTube Data API 할당량 단위를 토큰으로 사용하는 토큰 버킷입니다.
+
+    - rate: 초당 보충되는 단위 수
+    - capacity: 순간적으로 소비할 수 있는 최대 단위 수 (버스트)
+    - daily_budget: 이번 실행에서 쓸 수 있는 총 단위 수 (None이면 무제한)
+    """
+
+    def __init__(self, rate=10.0, capacity=20, daily_budget=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.daily_budget = daily_budget
+        self.units_used = 0
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units=1):
+        """units만큼의 토큰을 확보할 때까지 대기하고, 사용량을 기록합니다."""
+        while True:
+            with self._lock:
+                if self.daily_budget is not None and self.units_used + units > self.daily_budget:
+                    raise QuotaExhaustedError(f"할당량 예산 초과 (사용: {self.units_used}, 예산: {self.daily_budget})")
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= units:
+                    self._tokens -= units
+                    self.units_used += units
+                    return
+                wait = (units - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def reset_budget(self):
+        """누적 사용량을 초기화합니다. (장기 실행 데몬에서 하루 단위로 호출)"""
+        with self._lock:
+            self.units_used = 0
+
+
+class ApiKeyPool:
+    """
+    여러 YouTube API 키를 키마다 별도의 QuotaRateLimiter(할당량은 키/프로젝트 단위)와 함께 관리합니다.
+    작업마다 사용량이 가장 적은 키를 골라 주므로 전체 처리량과 일일 할당량이 키 수에 비례해 늘어납니다.
+    """
+
+    def __init__(self, api_keys, rate=10.0, capacity=20, daily_budget=None):
+        api_keys = list(dict.fromkeys(api_keys))
+        if not api_keys:
+            raise ValueError("API 키가 하나 이상 필요합니다.")
+        self.limiters = {api_key: QuotaRateLimiter(rate, capacity, daily_budget) for api_key in api_keys}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.limiters)
+
+    @property
+    def api_keys(self):
+        return list(self.limiters)
+
+    @property
+    def units_used(self):
+        return sum(limiter.units_used for limiter in self.limiters.values())
+
+    def least_used(self):
+        """사용량이 가장 적은 (API 키, 리미터)를 반환합니다."""
+        with self._lock:
+            api_key = min(self.limiters, key=lambda key: self.limiters[key].units_used)
+        return api_key, self.limiters[api_key]
+
+    def reset_budget(self):
+        for limiter in self.limiters.values():
+            limiter.reset_budget()
+
+
+def _http_status(error):
+    """googleapiclient HttpError에서 상태 코드를 꺼냅니다. (다른 예외는 None)"""
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error):
+    status = _http_status(error)
+    if status is None:
+        # 상태 코드가 없는 예외는 연결 끊김/타임아웃 같은 네트워크 오류만 재시도
+        return isinstance(error, (ConnectionError, TimeoutError, OSError))
+    if status not in RETRYABLE_STATUS:
+        return False
+    if status == 403:
+        content = getattr(error, 'content', b'') or b''
+        return not any(reason in content for reason in NON_RETRYABLE_REASONS)
+    return True
+
+
+def execute_with_retry(request, limiter=None, cost=1, max_retries=5, base_delay=1.0, max_delay=32.0):
+    """
+    API 요청 객체(.execute()를 가진 객체)를 실행합니다.
+    실행 전 limiter에서 cost만큼 할당량을 확보하고, 재시도 가능한 오류는 지수 백오프(+지터)로 재시도합니다.
+    시도마다 'youtube.request' 구간과 사용한 quota unit을 계측합니다. (리미터 대기 시간은 구간에서 제외)
+    """
+    # googleapiclient 요청 객체의 methodId (예: youtube.videos.list)
+    method = getattr(request, 'methodId', None) or 'unknown'
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire(cost)
+        telemetry.count('quota_units', cost, method=method)
+        try:
+            with telemetry.span('youtube.request', method=method):
+                return request.execute()
+        except Exception as e:
+            telemetry.count('api_errors', method=method, status=_http_status(e) or 'none')
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+            telemetry.count('api_retries', method=method)
+            telemetry.log_event('api_retry', method=method, status=_http_status(e), attempt=attempt + 1, delay_sec=round(delay, 2))
+            print(f"    -> 요청 실패 (상태: {_http_status(e)}), {delay:.1f}초 후 재시도 ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+            attempt += 1
+
+
+@dataclass
+class TaskResult:
+    """run_tasks가 반환하는 작업 단위 결과입니다."""
+    task: Any
+    result: Any = None
+    error: Optional[BaseException] = None
+    elapsed_sec: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def run_tasks(tasks, func: Callable, max_workers=8):
+    """
+    tasks의 각 항목에 func(task)를 스레드 풀에서 동시에 실행하고, 완료 순서대로 TaskResult 리스트를 반환합니다.
+    """
+    def timed(task):
+        started = time.perf_counter()
+        try:
+            return TaskResult(task=task, result=func(task), elapsed_sec=time.perf_counter() - started)
+        except Exception as e:
+            return TaskResult(task=task, error=e, elapsed_sec=time.perf_counter() - started)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(timed, task) for task in tasks]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
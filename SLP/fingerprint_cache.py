@@ -0,0 +1,76 @@
+# fingerprint_cache.py
+# 증분 수집을 위한 로컬 지문(fingerprint) 캐시입니다.
+#
+# videos/channels 행은 제목·태그·썸네일처럼 거의 바뀌지 않는 메타데이터라서,
+# 매 실행마다 전부 upsert할 필요가 없습니다. 정규화된 행의 해시를 로컬 파일에 저장해 두고
+# 새로 등장했거나 내용이 바뀐 행만 골라 DB에 보냅니다. (video_stats는 항상 추가)
+#
+# API 아이템의 etag는 statistics 변화에도 바뀌므로 메타데이터 변경 감지에는 쓰지 않고,
+# DB에 실제로 쓰는 컬럼만으로 해시를 계산합니다.
+
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.collector_cache', 'fingerprints.json')
+# 이 기간 동안 다시 보이지 않은 항목은 캐시에서 제거 (오래된 항목은 다음 등장 시 다시 upsert)
+CACHE_TTL_DAYS = 30
+
+
+def row_fingerprint(row):
+    """행(dict)의 내용을 키 순서와 무관하게 해시합니다."""
+    payload = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class FingerprintCache:
+    """테이블별로 {기본키: {'h': 해시, 't': 마지막 확인 시각}}를 보관하는 JSON 파일 캐시입니다."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._tables = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._tables = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"지문 캐시를 읽지 못해 새로 시작합니다. (에러: {e})")
+                self._tables = {}
+
+    def changed_rows(self, table, rows, key):
+        """캐시에 없거나 해시가 달라진 행만 반환합니다. (캐시는 변경하지 않음)"""
+        entries = self._tables.get(table, {})
+        changed = []
+        for row in rows:
+            entry = entries.get(row[key])
+            if entry is None or entry['h'] != row_fingerprint(row):
+                changed.append(row)
+        return changed
+
+    def update(self, table, rows, key):
+        """DB 저장에 성공한 행들의 지문을 기록합니다."""
+        entries = self._tables.setdefault(table, {})
+        now = int(time.time())
+        for row in rows:
+            entries[row[key]] = {'h': row_fingerprint(row), 't': now}
+
+    def touch(self, table, keys):
+        """변경은 없지만 이번 실행에서 다시 확인된 항목의 마지막 확인 시각을 갱신합니다."""
+        entries = self._tables.get(table, {})
+        now = int(time.time())
+        for key in keys:
+            if key in entries:
+                entries[key]['t'] = now
+
+    def save(self):
+        """TTL이 지난 항목을 정리하고 캐시 파일을 원자적으로 저장합니다."""
+        cutoff = int(time.time()) - CACHE_TTL_DAYS * 86400
+        for table, entries in self._tables.items():
+            self._tables[table] = {k: v for k, v in entries.items() if v['t'] >= cutoff}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._tables, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
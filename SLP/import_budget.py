@@ -0,0 +1,73 @@
+# import_budget.py
+# 모듈 import 시간을 측정해 예산과 비교하는 점검 스크립트입니다.
+#
+# 새 프로세스에서 `python -X importtime -c "import <모듈>"`을 실행해 누적 import 시간을 읽으므로
+# 이미 로드된 모듈의 영향을 받지 않습니다. 예산을 넘으면 가장 오래 걸린 하위 모듈과 함께 알리고
+# 종료 코드 1을 반환합니다.
+#
+# 사용 예: python import_budget.py            (기본 예산 점검)
+#          python import_budget.py collector  (특정 모듈만 측정)
+
+import os
+import subprocess
+import sys
+
+# 모듈별 import 시간 예산 (밀리초)
+# - collector: 클라이언트/분석 모듈을 지연 로드하므로 표준 라이브러리 + dotenv 수준이어야 함
+# - local_cache, shared_cache, video_store: 대시보드 데이터 계층 (pandas 포함)
+IMPORT_BUDGETS_MS = {
+    'collector': 300,
+    'local_cache': 1500,
+    'shared_cache': 200,
+    'video_store': 1500,
+}
+TOP_N = 5
+
+
+def measure_import(module):
+    """module을 새 프로세스에서 import하여 (전체 누적 ms, [(누적 ms, 하위 모듈명)])을 반환합니다."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"{module} import 실패")
+
+    # 하위 모듈이 먼저 출력되고 부모가 나중에 출력되므로, 최상위 줄이 나올 때까지 직접 import한 모듈을 모음
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        ms = int(cumulative) / 1000
+        if depth == 1:
+            children.append((ms, name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                return ms, sorted(children, reverse=True)[:TOP_N]
+            children = []
+    raise RuntimeError(f"{module} import 시간을 찾지 못했습니다.")
+
+
+def main(modules):
+    over_budget = []
+    for module in modules:
+        budget = IMPORT_BUDGETS_MS.get(module)
+        try:
+            total, slowest = measure_import(module)
+        except RuntimeError as e:
+            print(f"[import 예산] {module}: 측정 실패 ({e})")
+            over_budget.append(module)
+            continue
+        status = "OK" if budget is None or total <= budget else "초과"
+        print(f"[import 예산] {module}: {total:,.0f}ms (예산 {budget if budget is not None else '-'}ms) {status}")
+        for ms, name in slowest:
+            print(f"    {ms:8,.0f}ms  {name}")
+        if status == "초과":
+            over_budget.append(module)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or list(IMPORT_BUDGETS_MS)))
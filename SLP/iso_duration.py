@@ -0,0 +1,36 @@
+# iso_duration.py
+# YouTube contentDetails.duration(ISO 8601 기간) 파서입니다.
+#
+# 정규식을 한 번만 컴파일해 두고 문자열을 직접 파싱하므로 pandas 없이 동작하며,
+# 일(D)/주(W)가 포함된 긴 영상(P1DT2H3M4S)과 라이브 영상의 P0D도 처리합니다.
+# 연(Y)/월(M)은 YouTube에서 쓰이지 않지만 문법상 허용되므로 365일/30일로 근사합니다.
+
+import re
+
+_DURATION_PATTERN = re.compile(
+    r'P(?:(?P<years>\d+)Y)?(?:(?P<months>\d+)M)?(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?'
+    r'(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+(?:[.,]\d+)?)S)?)?'
+)
+_UNIT_SECONDS = (
+    ('years', 365 * 86400), ('months', 30 * 86400), ('weeks', 7 * 86400), ('days', 86400),
+    ('hours', 3600), ('minutes', 60),
+)
+
+
+def parse_iso8601_duration(duration_str):
+    """ISO 8601 기간 문자열을 초(int)로 변환합니다. (예: PT1M30S -> 90) 비어 있거나 형식이 틀리면 0을 반환합니다."""
+    if not duration_str:
+        return 0
+    match = _DURATION_PATTERN.fullmatch(duration_str)
+    if match is None:
+        return 0
+    parts = match.groupdict()
+    total = sum(int(parts[unit]) * seconds for unit, seconds in _UNIT_SECONDS if parts[unit])
+    if parts['seconds']:
+        total += int(float(parts['seconds'].replace(',', '.')))
+    return total
+
+
+def parse_iso8601_durations(duration_strs):
+    """기간 문자열 목록을 한 번에 초 목록으로 변환합니다. (페이지 단위 정규화용)"""
+    return [parse_iso8601_duration(duration_str) for duration_str in duration_strs]
@@ -0,0 +1,248 @@
+# keyword_index.py
+# 영상 태그/제목으로 키워드 역색인(keyword -> video_id)을 만들고 keywords 테이블의 지표를 계산하는 분석 모듈입니다.
+#
+# - 키워드: 태그는 문구 그대로, 제목은 한글/영문/숫자 토큰으로 나눈 뒤 조사(은/는/을/를/의 등)를 떼어 냄
+# - 역색인은 keyword_videos 테이블(기본키: keyword, video_id)에 저장되어, 키워드로 영상을 찾을 때
+#   전체 영상을 다시 훑지 않고 인덱스 조회로 끝납니다. 제목/태그가 새로 생기거나 바뀐 영상만 다시 색인하고,
+#   게시일이 WINDOW_DAYS를 지난 영상의 항목은 실행마다 지워 테이블 크기를 최근 영상 분량으로 유지합니다.
+# - 지표는 최근 WINDOW_DAYS 이내 게시된 영상의 keyword_videos 항목을 읽어 keyword 그룹 연산으로 한 번에 계산합니다.
+#   (영상마다 제목/태그를 다시 토큰화하지 않고, 위에서 갱신한 역색인을 그대로 사용)
+#   - saturation_index: 공급 비중(키워드 영상 수 / 전체 영상 수) ÷ 수요 비중(키워드 VPH 합 / 전체 VPH 합)
+#     1보다 크면 수요에 비해 영상이 많고(포화), 1보다 작으면 수요에 비해 영상이 적음
+#   - contagion_index: 최근 7일 이 키워드로 올린 채널 수 ÷ (그 이전 7일 채널 수 + 1) (채널 간 확산 속도)
+#   - opportunity_score: log(1 + 평균 VPH) × (1 + contagion_index) ÷ saturation_index
+
+import os
+import re
+import unicodedata
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from bulk_writer import write_rows
+from db_loader import iter_table_batches, iter_table_frames, load_rows_by_keys
+from fingerprint_cache import FingerprintCache
+
+# 지표 계산에 포함할 영상 범위 (게시일 기준)
+WINDOW_DAYS = 14
+RECENT = pd.Timedelta(days=7)
+# 이 수보다 적은 영상에 등장한 키워드는 저장하지 않음 (한 번만 나온 토큰이 대부분이므로)
+MIN_KEYWORD_VIDEOS = 2
+# 공급/수요 비중이 0에 가까울 때 지수가 무한대로 커지지 않도록 제한
+MAX_SATURATION_INDEX = 100.0
+# in_ 조건 한 번에 넣을 영상 수
+KEY_CHUNK_SIZE = 200
+# 범위를 벗어난 영상의 역색인 항목을 지울 때 되돌아볼 기간 (실행 간격보다 길어야 함.
+# 이전에 쌓인 항목을 정리하려면 한 번만 크게 설정해 실행)
+PRUNE_LOOKBACK_DAYS = int(os.environ.get("KEYWORD_PRUNE_LOOKBACK_DAYS", "7"))
+
+TOKEN_PATTERN = re.compile(r'[0-9a-z가-힣]+')
+HANGUL_TOKEN_PATTERN = re.compile(r'^[가-힣]+$')
+# 긴 조사부터 확인 ("에서는"을 "는"보다 먼저). 한 글자 조사는 명사 끝 글자와 겹치기 쉬운 것(이/가/도/만 등)은 제외
+HANGUL_PARTICLES = (
+    '에서는', '으로는', '에게서', '에서', '에게', '으로', '까지', '부터', '처럼', '보다', '이랑',
+    '은', '는', '을', '를', '의', '와', '과',
+)
+STOPWORDS = {'shorts', 'short', 'the', 'and', 'of', 'in', 'to', 'for', 'with', 'a', 'an'}
+
+VIDEO_COLUMNS = ['channel_id', 'title', 'tags', 'published_at']
+
+
+def normalize_text(text):
+    """호환 문자(전각 영문 등)를 통일하고 소문자로 바꿉니다."""
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def strip_particle(token):
+    """한글 토큰 끝의 조사를 한 번 떼어 냅니다. 남는 부분이 두 글자 미만이면 그대로 둡니다."""
+    if not HANGUL_TOKEN_PATTERN.match(token):
+        return token
+    for particle in HANGUL_PARTICLES:
+        if token.endswith(particle) and len(token) - len(particle) >= 2:
+            return token[:-len(particle)]
+    return token
+
+
+def title_keywords(title):
+    """제목을 키워드 토큰 목록으로 나눕니다. (한 글자, 숫자만 있는 토큰, 불용어 제외)"""
+    keywords = []
+    for token in TOKEN_PATTERN.findall(normalize_text(title)):
+        token = strip_particle(token)
+        if len(token) >= 2 and not token.isdigit() and token not in STOPWORDS:
+            keywords.append(token)
+    return keywords
+
+
+def tag_keywords(tags):
+    """태그 목록을 키워드 목록으로 정규화합니다. (공백 정리, '#' 제거)"""
+    keywords = []
+    for tag in tags or []:
+        keyword = ' '.join(normalize_text(tag).lstrip('#').split())
+        if len(keyword) >= 2 and keyword not in STOPWORDS:
+            keywords.append(keyword)
+    return keywords
+
+
+def build_postings(videos_df):
+    """
+    영상 DataFrame(video_id, title, tags)으로 역색인 항목 DataFrame(keyword, video_id, source)을 만듭니다.
+    같은 영상에서 태그와 제목에 모두 나온 키워드는 'tag' 항목 하나로 남깁니다.
+    """
+    if videos_df.empty:
+        return pd.DataFrame(columns=['keyword', 'video_id', 'source'])
+    tags = pd.DataFrame({'video_id': videos_df['video_id'], 'keyword': videos_df['tags'].map(tag_keywords), 'source': 'tag'})
+    titles = pd.DataFrame({'video_id': videos_df['video_id'], 'keyword': videos_df['title'].map(title_keywords), 'source': 'title'})
+    postings = pd.concat([tags, titles], ignore_index=True).explode('keyword').dropna(subset=['keyword'])
+    # 'tag' < 'title' 이므로 정렬 후 첫 항목을 남기면 태그 항목이 우선
+    postings = postings.sort_values('source', kind='mergesort').drop_duplicates(subset=['keyword', 'video_id'])
+    return postings[['keyword', 'video_id', 'source']].reset_index(drop=True)
+
+
+def compute_keyword_metrics(postings_df, videos_df, stats_df, now=None):
+    """
+    역색인 항목, 영상(video_id, channel_id, published_at), 최신 통계(video_id, view_count)로
+    키워드별 공급/수요/확산 지표(keyword 인덱스)를 계산합니다.
+    """
+    now = now or pd.Timestamp.now(tz='UTC')
+    videos = videos_df[['video_id', 'channel_id', 'published_at']].merge(
+        stats_df[['video_id', 'view_count']], on='video_id', how='left'
+    )
+    videos['view_count'] = videos['view_count'].fillna(0)
+    hours_since_published = (now - videos['published_at']).dt.total_seconds() / 3600
+    videos['vph'] = videos['view_count'] / (hours_since_published.clip(lower=0) + 1)
+    age = now - videos['published_at']
+    videos['recent_channel'] = videos['channel_id'].where(age <= RECENT)
+    videos['previous_channel'] = videos['channel_id'].where((age > RECENT) & (age <= 2 * RECENT))
+    videos['is_recent'] = age <= RECENT
+
+    total_videos = len(videos)
+    total_vph = videos['vph'].sum()
+
+    df = postings_df[['keyword', 'video_id']].merge(videos, on='video_id')
+    grouped = df.groupby('keyword', sort=False)
+    result = pd.DataFrame({
+        'video_count': grouped['video_id'].size(),
+        'channel_count': grouped['channel_id'].nunique(),
+        'recent_video_count': grouped['is_recent'].sum(),
+        'total_vph': grouped['vph'].sum(),
+        'recent_channels': grouped['recent_channel'].nunique(),
+        'previous_channels': grouped['previous_channel'].nunique(),
+    })
+    result = result[result['video_count'] >= MIN_KEYWORD_VIDEOS]
+
+    supply_share = result['video_count'] / max(total_videos, 1)
+    demand_share = result['total_vph'] / total_vph if total_vph > 0 else pd.Series(0.0, index=result.index)
+    result['avg_vph'] = result['total_vph'] / result['video_count']
+    result['saturation_index'] = (supply_share / demand_share.replace(0, np.nan)).fillna(MAX_SATURATION_INDEX).clip(upper=MAX_SATURATION_INDEX)
+    result['contagion_index'] = result['recent_channels'] / (result['previous_channels'] + 1)
+    result['opportunity_score'] = (
+        np.log1p(result['avg_vph']) * (1 + result['contagion_index']) / result['saturation_index'].clip(lower=1 / MAX_SATURATION_INDEX)
+    )
+
+    result = result.drop(columns=['recent_channels', 'previous_channels'])
+    for column in ['video_count', 'channel_count', 'recent_video_count']:
+        result[column] = result[column].astype('int64')
+    for column in ['total_vph', 'avg_vph', 'saturation_index', 'contagion_index', 'opportunity_score']:
+        result[column] = result[column].round(3)
+    result.index.name = 'keyword'
+    return result
+
+
+def update_postings(client, videos_df, fingerprint_cache):
+    """제목/태그가 새로 생기거나 바뀐 영상만 다시 색인하여 keyword_videos에 반영합니다. 다시 색인한 영상 수를 반환합니다."""
+    rows = [
+        {'video_id': video_id, 'title': title, 'tags': list(tags) if tags is not None else []}
+        for video_id, title, tags in zip(videos_df['video_id'], videos_df['title'], videos_df['tags'])
+    ]
+    changed = fingerprint_cache.changed_rows('keyword_postings', rows, 'video_id')
+    if not changed:
+        return 0
+
+    changed_ids = [row['video_id'] for row in changed]
+    # 제목/태그가 바뀐 영상의 이전 항목을 지운 뒤 새 항목을 추가
+    for start in range(0, len(changed_ids), KEY_CHUNK_SIZE):
+        client.table('keyword_videos').delete().in_('video_id', changed_ids[start:start + KEY_CHUNK_SIZE]).execute()
+    postings = build_postings(pd.DataFrame(changed))
+    stats = write_rows(client, 'keyword_videos', postings.to_dict(orient='records'), on_conflict='keyword,video_id')
+    if stats.ok:
+        fingerprint_cache.update('keyword_postings', changed, 'video_id')
+    return len(changed)
+
+
+def load_postings(client, video_ids):
+    """
+    video_ids의 keyword_videos 항목을 DataFrame(keyword, video_id)으로 읽어 옵니다.
+    KEY_CHUNK_SIZE개씩 in_ 조건으로 나누고, 각 묶음은 keyword 키셋 페이지네이션으로 읽습니다.
+    """
+    frames = []
+    video_ids = list(video_ids)
+    for start in range(0, len(video_ids), KEY_CHUNK_SIZE):
+        chunk = video_ids[start:start + KEY_CHUNK_SIZE]
+        for rows in iter_table_batches(client, 'keyword_videos', ['video_id'], key='keyword',
+                                       filters=lambda q, chunk=chunk: q.in_('video_id', chunk)):
+            # keyword는 묶음 안에서 유일하지 않아 다음 페이지(keyword > 마지막 값)가 마지막 키워드의 나머지 항목을
+            # 건너뛰므로, 마지막 키워드의 항목은 (키워드 안에서 유일한) video_id 기준으로 따로 읽음
+            last_keyword = rows[-1]['keyword']
+            frames.append(pd.DataFrame.from_records([row for row in rows if row['keyword'] != last_keyword]))
+            for boundary in iter_table_batches(client, 'keyword_videos', ['keyword'], key='video_id',
+                                               filters=lambda q, chunk=chunk, keyword=last_keyword:
+                                               q.eq('keyword', keyword).in_('video_id', chunk)):
+                frames.append(pd.DataFrame.from_records(boundary))
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=['keyword', 'video_id'])
+    return pd.concat(frames, ignore_index=True)[['keyword', 'video_id']]
+
+
+def prune_postings(client, cutoff):
+    """게시일이 cutoff 이전(지표 범위 밖)이 된 영상의 keyword_videos 항목을 지웁니다. 대상 영상 수를 반환합니다."""
+    since = (cutoff - timedelta(days=PRUNE_LOOKBACK_DAYS)).isoformat()
+    aged_ids = []
+    for rows in iter_table_batches(client, 'videos', [], key='video_id',
+                                   filters=lambda q: q.gte('published_at', since).lt('published_at', cutoff.isoformat())):
+        aged_ids.extend(row['video_id'] for row in rows)
+    for start in range(0, len(aged_ids), KEY_CHUNK_SIZE):
+        client.table('keyword_videos').delete().in_('video_id', aged_ids[start:start + KEY_CHUNK_SIZE]).execute()
+    return len(aged_ids)
+
+
+def run_keyword_index_update(client, fingerprint_cache=None):
+    """최근 영상의 키워드 역색인을 갱신하고 keywords 테이블의 지표를 일괄 반영합니다. 갱신한 키워드 수를 반환합니다."""
+    fingerprint_cache = fingerprint_cache or FingerprintCache()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=WINDOW_DAYS)
+    pruned = prune_postings(client, cutoff)
+    frames = list(iter_table_frames(
+        client, 'videos', VIDEO_COLUMNS, key='video_id', dtypes={'published_at': 'datetime'},
+        filters=lambda q: q.gte('published_at', cutoff.isoformat()),
+    ))
+    if not frames:
+        print("키워드를 계산할 최근 영상이 없습니다.")
+        return 0
+    videos_df = pd.concat(frames, ignore_index=True)
+
+    reindexed = update_postings(client, videos_df, fingerprint_cache)
+    fingerprint_cache.save()
+
+    stats_df = load_rows_by_keys(
+        client, 'video_latest_stats', ['view_count'], 'video_id', videos_df['video_id'].tolist(),
+        dtypes={'view_count': 'int64'}, chunk_size=KEY_CHUNK_SIZE,
+    )
+    postings_df = load_postings(client, videos_df['video_id'].tolist())
+    metrics = compute_keyword_metrics(postings_df, videos_df, stats_df)
+    metrics['last_updated'] = datetime.now(timezone.utc).isoformat()
+    rows = metrics.reset_index().to_dict(orient='records')
+    stats = write_rows(client, 'keywords', rows, on_conflict='keyword')
+    if not stats.ok:
+        print(f"키워드 지표 {len(stats.failed_rows)}개를 저장하지 못했습니다.")
+    print(f"영상 {reindexed}개를 다시 색인하고 {stats.rows_written}개 키워드 지표를 갱신했습니다. "
+          f"(대상 영상 {len(videos_df)}개, 역색인 항목 {len(postings_df)}개, 범위를 벗어나 색인에서 뺀 영상 {pruned}개)")
+    return stats.rows_written
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv()
+    run_keyword_index_update(create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"]))
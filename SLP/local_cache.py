@@ -0,0 +1,139 @@
+# local_cache.py
+# 대시보드용 로컬 컬럼형(Parquet) 캐시와 델타 동기화입니다.
+#
+# 테이블마다 Parquet 파일 하나를 디스크에 두고, 시작 시 메모리 맵으로 읽은 뒤
+# 캐시에 있는 최댓값(high-water mark, 예: updated_at/last_updated) 이후에 바뀐 행만
+# Supabase에서 받아 기본키 기준으로 합칩니다. 따라서 콜드 스타트와 캐시 갱신 비용이
+# 테이블 전체 크기가 아니라 마지막 동기화 이후의 변경량에 비례합니다.
+
+import os
+import threading
+
+import pandas as pd
+
+import telemetry
+from db_loader import iter_table_frames
+
+CACHE_DIR = os.environ.get(
+    "DASHBOARD_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dashboard_cache'),
+)
+# 시각 기준 high-water mark를 이만큼 앞당겨 다시 받음 (NOW()는 트랜잭션 시작 시각이라, 먼저 시작해 늦게
+# 커밋된 트랜잭션의 행이 이미 동기화한 시각보다 작을 수 있음)
+HWM_OVERLAP_SEC = int(os.environ.get("DASHBOARD_CACHE_HWM_OVERLAP_SEC", "300"))
+
+# 테이블별 캐시 설정
+# - key: 기본키 (델타 병합 기준)
+# - hwm: 변경 감지 컬럼 (이 값 이상인 행만 다시 받음)
+# - columns: 캐시에 보관할 컬럼
+# - dtypes: db_loader 타입 지정
+TABLE_SPECS = {
+    'videos': {
+        'key': 'video_id',
+        'hwm': 'updated_at',
+        'columns': ['video_id', 'channel_id', 'category_id', 'title', 'published_at', 'duration_sec', 'tags', 'thumbnail_url', 'updated_at'],
+        'dtypes': {'duration_sec': 'int64', 'updated_at': 'datetime'},
+    },
+    'channels': {
+        'key': 'channel_id',
+        'hwm': 'updated_at',
+        'columns': [
+            'channel_id', 'name', 'thumbnail_url', 'subscriber_count', 'weekly_subscriber_growth',
+            'growth_acceleration', 'updated_at',
+        ],
+        'dtypes': {'updated_at': 'datetime'},
+    },
+    # timestamp(수집기가 찍은 스냅샷 시각)는 늦게 저장된 행이 더 작을 수 있으므로 서버 기록 시각(updated_at) 기준
+    'video_latest_stats': {
+        'key': 'video_id',
+        'hwm': 'updated_at',
+        'columns': ['video_id', 'view_count', 'like_count', 'comment_count', 'timestamp', 'updated_at'],
+        'dtypes': {
+            'view_count': 'int64', 'like_count': 'int64', 'comment_count': 'int64', 'timestamp': 'datetime',
+            'updated_at': 'datetime',
+        },
+    },
+    'keywords': {
+        'key': 'keyword',
+        'hwm': 'last_updated',
+        'columns': [
+            'keyword', 'saturation_index', 'contagion_index', 'opportunity_score', 'video_count', 'channel_count',
+            'recent_video_count', 'avg_vph', 'last_updated',
+        ],
+        'dtypes': {
+            'video_count': 'int64', 'channel_count': 'int64', 'recent_video_count': 'int64',
+            'saturation_index': 'float64', 'contagion_index': 'float64', 'opportunity_score': 'float64',
+            'avg_vph': 'float64', 'last_updated': 'datetime',
+        },
+    },
+}
+
+_locks = {table: threading.Lock() for table in TABLE_SPECS}
+
+
+def cache_path(table):
+    return os.path.join(CACHE_DIR, f"{table}.parquet")
+
+
+def load_cached(table):
+    """캐시 파일을 메모리 맵으로 읽어 반환합니다. 없거나 손상되었으면 None을 반환합니다."""
+    path = cache_path(table)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path, memory_map=True)
+    except Exception as e:
+        print(f"[로컬 캐시] {table} 캐시를 읽지 못해 전체를 다시 받습니다. (에러: {e})")
+        return None
+    missing = set(TABLE_SPECS[table]['columns']) - set(df.columns)
+    if missing:
+        # 컬럼이 추가되기 전에 만든 캐시는 변경분만 받으면 기존 행의 새 컬럼이 비므로 전체를 다시 받음
+        print(f"[로컬 캐시] {table} 캐시에 없는 컬럼 {sorted(missing)}이 있어 전체를 다시 받습니다.")
+        return None
+    return df
+
+
+def sync_table(client, table):
+    """
+    캐시된 테이블에 high-water mark 이후 변경분만 받아 합친 뒤 저장하고, 최신 DataFrame을 반환합니다.
+    캐시가 없으면 테이블 전체를 받아 캐시를 만듭니다.
+    """
+    spec = TABLE_SPECS[table]
+    key, hwm_column = spec['key'], spec['hwm']
+
+    with _locks[table]:
+        cached = load_cached(table)
+        filters = None
+        if cached is not None and not cached.empty:
+            # 늦게 커밋된 행과 같은 시각에 기록된 행을 놓치지 않도록 겹치는 구간을 다시 받고 기본키로 중복 제거
+            since = (cached[hwm_column].max() - pd.Timedelta(seconds=HWM_OVERLAP_SEC)).isoformat()
+            filters = lambda q: q.gte(hwm_column, since)
+
+        with telemetry.span('cache.sync', table=table) as fields:
+            frames = list(iter_table_frames(client, table, spec['columns'], key=key, dtypes=spec['dtypes'], filters=filters))
+            delta = pd.concat(frames, ignore_index=True) if frames else None
+            fields['rows'] = 0 if delta is None else len(delta)
+        telemetry.count('cache_rows_fetched', 0 if delta is None else len(delta), table=table)
+        # 캐시가 있으면 변경분만 받았으므로 hit, 없으면 전체를 받았으므로 miss
+        telemetry.record_cache(f"local:{table}", 'miss' if cached is None else 'hit')
+        print(f"[로컬 캐시] {table}: 캐시 {0 if cached is None else len(cached)}행, 변경분 {0 if delta is None else len(delta)}행")
+
+        if delta is None or delta.empty:
+            return cached if cached is not None else pd.DataFrame(columns=spec['columns'])
+
+        if cached is None or cached.empty:
+            merged = delta
+        else:
+            merged = pd.concat([cached, delta], ignore_index=True).drop_duplicates(subset=[key], keep='last')
+        merged = merged.reset_index(drop=True)
+        _write_atomic(table, merged)
+        return merged
+
+
+def _write_atomic(table, df):
+    """임시 파일에 쓴 뒤 교체하여, 쓰는 도중 다른 프로세스가 깨진 파일을 읽지 않도록 합니다."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = cache_path(table)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,106 @@
+# metrics.py
+# 영상 참여 지표 계산 커널입니다. 랭킹(ranking.py)과 상세 보기(app.py)가 같은 함수로 계산합니다.
+#
+# - to_typed_frame: 조회수/좋아요/댓글 수는 int64, 게시 시각은 datetime64(UTC), 카테고리/채널명은
+#   category 타입으로 바꿔 영상당 메모리를 줄이고 object 컬럼 연산을 피합니다.
+# - compute_engagement: numpy 배열 단위로 VPH, 좋아요율, 댓글율, 분당조회수를 한 번에 계산합니다.
+#   (상세 보기의 영상 1개도 길이 1 배열로 같은 경로를 탑니다)
+# - add_category_percentiles: 카테고리별 VPH/좋아요율 백분위(0~100)를 그룹 순위로 한 번에 계산합니다.
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+COUNT_COLUMNS = ['view_count', 'like_count', 'comment_count']
+CATEGORICAL_COLUMNS = ['category_id', 'name']
+# (백분위를 계산할 지표, 결과 컬럼)
+PERCENTILE_COLUMNS = [('VPH', 'vph_percentile'), ('like_rate', 'like_rate_percentile')]
+# 카테고리가 없는 영상(카테고리 수집 이전 데이터)을 묶는 값
+UNKNOWN_CATEGORY = 'unknown'
+
+
+def _to_int64(values):
+    return pd.to_numeric(values, errors='coerce').fillna(0).astype('int64')
+
+
+def to_typed_frame(df, copy=True):
+    """지표 계산에 쓰는 컬럼을 압축된 타입으로 바꾼 DataFrame을 반환합니다. (없는 컬럼은 건너뜀)"""
+    if copy:
+        df = df.copy()
+    for column in COUNT_COLUMNS + ['duration_sec']:
+        if column in df.columns and df[column].dtype != 'int64':
+            df[column] = _to_int64(df[column])
+    if 'published_at' in df.columns:
+        df['published_at'] = pd.to_datetime(df['published_at'], utc=True)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            values = df[column].fillna(UNKNOWN_CATEGORY) if column == 'category_id' else df[column]
+            df[column] = values.astype('category')
+    return df
+
+
+def compute_engagement(view_count, like_count, comment_count, duration_sec, published_at, now=None):
+    """
+    배열(또는 Series)로 참여 지표를 계산해 {컬럼: numpy 배열} dict로 반환합니다. (0으로 나누기 방지용 +1/+0.01 포함)
+    published_at은 UTC datetime64 배열이어야 합니다.
+    """
+    now = now or datetime.now(timezone.utc)
+    views = np.asarray(view_count, dtype=np.int64)
+    published = pd.DatetimeIndex(published_at)
+    hours_since_published = (pd.Timestamp(now) - published).total_seconds().to_numpy() / 3600
+    duration_min = np.asarray(duration_sec, dtype=np.float64) / 60
+    return {
+        'VPH': np.rint(views / (hours_since_published + 1)).astype(np.int64),
+        'like_rate': np.round(np.asarray(like_count, dtype=np.int64) / (views + 1) * 100, 2),
+        'comment_rate': np.round(np.asarray(comment_count, dtype=np.int64) / (views + 1) * 100, 2),
+        'views_per_minute': np.rint(views / (duration_min + 0.01)).astype(np.int64),
+    }
+
+
+def add_engagement(df, now=None):
+    """to_typed_frame 결과에 참여 지표 컬럼을 추가합니다. (제자리 수정 후 반환)"""
+    metrics = compute_engagement(df['view_count'], df['like_count'], df['comment_count'], df['duration_sec'],
+                                 df['published_at'], now)
+    for column, values in metrics.items():
+        df[column] = values
+    return df
+
+
+def engagement_for_row(row, now=None):
+    """영상 1개(dict)의 카운트를 정수로 바꾸고 참여 지표를 더한 새 dict를 반환합니다. (상세 보기의 DB 조회 경로)"""
+    row = dict(row)
+    for column in COUNT_COLUMNS + ['duration_sec']:
+        row[column] = int(_to_int64(pd.Series([row.get(column)])).iloc[0])
+    row['published_at'] = pd.to_datetime(row['published_at'], utc=True)
+    metrics = compute_engagement([row['view_count']], [row['like_count']], [row['comment_count']], [row['duration_sec']],
+                                 [row['published_at']], now)
+    row.update({column: values[0].item() for column, values in metrics.items()})
+    return row
+
+
+def add_category_percentiles(df, category_column='category_id'):
+    """카테고리 안에서의 지표 백분위(0~100, 클수록 상위) 컬럼을 추가합니다. (제자리 수정 후 반환)"""
+    grouped = df.groupby(category_column, observed=True, sort=False)
+    for metric, column in PERCENTILE_COLUMNS:
+        df[column] = (grouped[metric].rank(method='max', pct=True) * 100).round(1).astype('float32')
+    return df
+
+
+def percentile_in_category(reference_df, category_id, values):
+    """
+    reference_df(랭킹)의 같은 카테고리 영상 대비 values({지표: 값})의 백분위 dict를 반환합니다.
+    랭킹에 없는 영상(상세 보기의 DB 조회 경로)에 랭킹과 같은 기준의 백분위를 붙일 때 사용합니다.
+    """
+    if reference_df.empty or 'category_id' not in reference_df.columns:
+        return {}
+    peers = reference_df[reference_df['category_id'] == (category_id or UNKNOWN_CATEGORY)]
+    result = {}
+    for metric, column in PERCENTILE_COLUMNS:
+        if metric not in peers.columns or metric not in values:
+            continue
+        peer_values = np.sort(peers[metric].to_numpy())
+        # 자신을 포함한 모집단에서 값이 같거나 작은 영상 비율 (rank(method='max', pct=True)와 같은 기준)
+        at_or_below = np.searchsorted(peer_values, values[metric], side='right') + 1
+        result[column] = round(float(at_or_below / (len(peer_values) + 1) * 100), 1)
+    return result
@@ -0,0 +1,183 @@
+# momentum.py
+# video_stats 시계열로 영상별 모멘텀 지표를 계산해 videos 테이블에 반영하는 분석 모듈입니다.
+#
+# 모든 영상의 스냅샷을 하나의 DataFrame에 두고 video_id 그룹 연산으로 한 번에 계산합니다.
+# - view_velocity: 직전 스냅샷 대비 시간당 조회수 증가량
+# - view_acceleration: 직전 대비 velocity 변화량 (시간당)
+# - velocity_ma7: 최근 7일 velocity 이동 평균
+# - milestone_hours: 1K/10K/100K/1M 조회수 도달까지 걸린 시간 (게시 시각 기준, 스냅샷 사이는 선형 보간)
+# - momentum_score / viral_score / lifecycle_prediction: 위 지표로 만든 요약 점수
+#
+# 증분 실행: 마지막으로 처리한 stat_id를 로컬 상태 파일에 기록해 두고,
+# 그 이후 새 스냅샷이 들어온 영상을 먼저 찾은 뒤 그 영상들의 이력만 읽어 다시 계산해 저장합니다.
+# (읽는 양은 전체 이력 기간이 아니라 새 스냅샷이 생긴 영상 수에 비례)
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from bulk_writer import write_rows
+from db_loader import iter_table_batches, iter_table_frames, load_rows_by_keys
+
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.collector_cache', 'momentum_state.json')
+# 이동 평균(7일) 계산에 필요한 이력 범위 (하루 여유 포함)
+LOOKBACK_DAYS = 8
+MILESTONES = (1_000, 10_000, 100_000, 1_000_000)
+# 이력을 in_ 조건으로 나누어 읽을 때 한 번에 넣을 video_id 수 (URL 길이 제한)
+HISTORY_CHUNK_SIZE = 200
+
+STATS_DTYPES = {'stat_id': 'int64', 'view_count': 'int64', 'timestamp': 'datetime'}
+
+
+def compute_momentum(stats_df, published_at):
+    """
+    스냅샷 DataFrame(video_id, timestamp, view_count)과 video_id -> 게시 시각 Series로
+    영상별 최신 모멘텀 지표 DataFrame(video_id 인덱스)을 계산합니다.
+    """
+    df = stats_df[['video_id', 'timestamp', 'view_count']].sort_values(['video_id', 'timestamp'], kind='mergesort')
+    df = df.drop_duplicates(subset=['video_id', 'timestamp'], keep='last').reset_index(drop=True)
+    grouped = df.groupby('video_id', sort=False)
+
+    prev_views = grouped['view_count'].shift()
+    prev_time = grouped['timestamp'].shift()
+    dt_hours = (df['timestamp'] - prev_time).dt.total_seconds() / 3600
+    dt_hours = dt_hours.where(dt_hours > 0)
+
+    df['velocity'] = ((df['view_count'] - prev_views).clip(lower=0) / dt_hours).astype('float64')
+    df['acceleration'] = (df['velocity'] - df.groupby('video_id', sort=False)['velocity'].shift()) / dt_hours
+    # df는 (video_id, timestamp) 순으로 정렬되어 있으므로 그룹별 rolling 결과를 순서 그대로 붙일 수 있음
+    df['velocity_ma7'] = (
+        df.set_index('timestamp').groupby('video_id', sort=False)['velocity']
+        .rolling('7D').mean()
+        .to_numpy()
+    )
+
+    latest = df.groupby('video_id', sort=False).tail(1).set_index('video_id')
+    result = pd.DataFrame(index=latest.index)
+    result['view_velocity'] = latest['velocity'].fillna(0.0).round(2)
+    result['view_acceleration'] = latest['acceleration'].fillna(0.0).round(4)
+    result['velocity_ma7'] = latest['velocity_ma7'].fillna(latest['velocity']).fillna(0.0).round(2)
+
+    # 모멘텀: 평소(7일 평균) 대비 현재 속도 비율에 속도 규모(log)를 곱함
+    ratio = (result['view_velocity'] / (result['velocity_ma7'] + 1)).clip(upper=5)
+    result['momentum_score'] = (np.log10(result['view_velocity'] + 1) * ratio).round(4)
+    # 바이럴 점수: 시간당 조회수를 로그 스케일 0~100으로 변환 (시간당 100만 회 = 100)
+    result['viral_score'] = (np.log10(result['view_velocity'] + 1) / 6 * 100).clip(0, 100).round().astype(int)
+
+    snapshot_count = grouped.size().reindex(result.index)
+    result['lifecycle_prediction'] = np.select(
+        [
+            snapshot_count < 2,
+            result['view_velocity'] < 1,
+            (result['view_acceleration'] > 0) & (result['view_velocity'] >= result['velocity_ma7']),
+            result['view_velocity'] >= result['velocity_ma7'] * 0.5,
+        ],
+        ['new', 'dormant', 'rising', 'peaking'],
+        default='declining',
+    )
+
+    result['milestone_hours'] = _milestone_hours(df, prev_views, prev_time, published_at).reindex(result.index)
+    return result
+
+
+def _milestone_hours(df, prev_views, prev_time, published_at):
+    """직전 스냅샷과 현재 스냅샷 사이에서 마일스톤을 넘은 시점을 보간해 게시 후 경과 시간(시간)을 구합니다."""
+    published = df['video_id'].map(published_at)
+    columns = {}
+    for milestone in MILESTONES:
+        crossed = (prev_views < milestone) & (df['view_count'] >= milestone)
+        if not crossed.any():
+            continue
+        fraction = (milestone - prev_views[crossed]) / (df.loc[crossed, 'view_count'] - prev_views[crossed])
+        reached_at = prev_time[crossed] + (df.loc[crossed, 'timestamp'] - prev_time[crossed]) * fraction
+        hours = ((reached_at - published[crossed]).dt.total_seconds() / 3600).clip(lower=0).round(1)
+        columns[str(milestone)] = hours.groupby(df.loc[crossed, 'video_id']).first()
+
+    if not columns:
+        return pd.Series(dtype=object)
+    table = pd.DataFrame(columns)
+    return table.apply(lambda row: {k: float(v) for k, v in row.items() if pd.notna(v)}, axis=1)
+
+
+def _load_state():
+    try:
+        with open(STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp_path = STATE_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def run_momentum_update(client):
+    """
+    마지막 실행 이후 새 스냅샷이 생긴 영상의 모멘텀 지표를 계산해 videos 테이블에 일괄 반영합니다.
+    반영한 영상 수를 반환합니다.
+    """
+    state = _load_state()
+    last_stat_id = state.get('last_stat_id', 0)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=LOOKBACK_DAYS)).isoformat()
+
+    # 1. 마지막 실행 이후 들어온 스냅샷만 읽어 다시 계산할 영상을 찾음
+    updated_ids = set()
+    max_stat_id = last_stat_id
+    for rows in iter_table_batches(client, 'video_stats', ['video_id'], key='stat_id',
+                                   filters=lambda q: q.gte('timestamp', cutoff).gt('stat_id', last_stat_id)):
+        updated_ids.update(row['video_id'] for row in rows)
+        max_stat_id = max(max_stat_id, int(rows[-1]['stat_id']))
+    if not updated_ids:
+        print("마지막 실행 이후 새 스냅샷이 없습니다.")
+        return 0
+    updated_ids = sorted(updated_ids)
+
+    # 2. 그 영상들의 최근 이력만 읽음 (in_ 조건 묶음마다 stat_id 키셋 페이지네이션)
+    print(f"새 스냅샷이 생긴 영상 {len(updated_ids)}개의 최근 video_stats 이력을 불러옵니다...")
+    frames = []
+    for start in range(0, len(updated_ids), HISTORY_CHUNK_SIZE):
+        chunk = updated_ids[start:start + HISTORY_CHUNK_SIZE]
+        frames.extend(iter_table_frames(
+            client, 'video_stats', ['video_id', 'timestamp', 'view_count'], key='stat_id', dtypes=STATS_DTYPES,
+            filters=lambda q, chunk=chunk: q.gte('timestamp', cutoff).in_('video_id', chunk),
+        ))
+    stats_df = pd.concat(frames, ignore_index=True)
+
+    videos_df = load_rows_by_keys(
+        client, 'videos', ['published_at', 'milestone_hours'], key='video_id', keys=updated_ids,
+        dtypes={'published_at': 'datetime'},
+    ).set_index('video_id')
+    result = compute_momentum(stats_df, videos_df['published_at'])
+
+    # 이전 실행에서 기록된 마일스톤은 유지하고 새로 도달한 것만 추가
+    previous = videos_df['milestone_hours'].reindex(result.index)
+    result['milestone_hours'] = [
+        {**(old if isinstance(old, dict) else {}), **(new if isinstance(new, dict) else {})}
+        for old, new in zip(previous, result['milestone_hours'])
+    ]
+    result['momentum_updated_at'] = datetime.now(timezone.utc).isoformat()
+
+    rows = result.reset_index().to_dict(orient='records')
+    if not write_rows(client, 'videos', rows, on_conflict='video_id').ok:
+        # 다음 실행에서 같은 구간을 다시 계산하도록 high-water mark를 올리지 않음
+        print("일부 영상의 모멘텀 지표 저장에 실패했습니다.")
+        return 0
+
+    _save_state({'last_stat_id': max_stat_id})
+    print(f"{len(rows)}개 영상의 모멘텀 지표를 갱신했습니다.")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv()
+    run_momentum_update(create_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_ANON_KEY")))
@@ -0,0 +1,55 @@
+# ranking.py
+# 대시보드의 영상 랭킹 계산입니다. (Streamlit과 분리되어 있어 benchmark.py에서도 그대로 사용)
+
+import pandas as pd
+
+from metrics import UNKNOWN_CATEGORY, add_category_percentiles, add_engagement, to_typed_frame
+
+RANKING_COLUMNS = {
+    'video_id': 'video_id',
+    'channel_id': 'channel_id',
+    'category_id': 'category_id',
+    'title': '제목',
+    'name': '채널명',
+    'VPH': 'VPH',
+    'like_rate': '좋아요율(%)',
+    'comment_rate': '댓글율(%)',
+    'views_per_minute': '분당조회수',
+    'vph_percentile': 'VPH 백분위',
+    'like_rate_percentile': '좋아요율 백분위',
+    'like_count': '좋아요',
+    'comment_count': '댓글',
+    'view_count': '총조회수',
+    'published_at': '게시일',
+    'duration_sec': '영상길이(초)',
+    'tags': '태그',
+    'thumbnail_url': '썸네일URL',
+}
+
+
+def build_video_ranking(videos_df, stats_df, channels_df, now=None):
+    """
+    영상/최신 통계/채널 DataFrame을 합쳐 지표와 카테고리 내 백분위를 계산하고
+    VPH 내림차순 랭킹(1부터 시작하는 인덱스)을 반환합니다.
+    """
+    if videos_df.empty or stats_df.empty or channels_df.empty:
+        return pd.DataFrame()
+
+    # 1. 모든 DataFrame 병합 후 지표 계산에 쓰는 컬럼을 압축된 타입으로 변환
+    df = pd.merge(videos_df, stats_df, on='video_id')
+    df = pd.merge(df, channels_df, on='channel_id')
+    if 'category_id' not in df.columns:  # 카테고리 컬럼이 생기기 전의 캐시
+        df['category_id'] = UNKNOWN_CATEGORY
+    df = to_typed_frame(df, copy=False)
+
+    # 2. 참여 지표와 카테고리 내 백분위 계산 (metrics.py, 상세 보기와 같은 커널)
+    add_engagement(df, now)
+    add_category_percentiles(df)
+
+    # 3. 화면에 표시할 컬럼 선택 및 이름 변경
+    result_df = df[list(RANKING_COLUMNS)].rename(columns=RANKING_COLUMNS)
+
+    # 4. VPH 기준으로 내림차순 정렬 후 인덱스 리셋 (순위 표시용)
+    result_df = result_df.sort_values(by='VPH', ascending=False).reset_index(drop=True)
+    result_df.index += 1
+    return result_df
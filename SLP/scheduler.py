@@ -0,0 +1,172 @@
+# scheduler.py
+# 수집기 데몬 모드에서 사용하는 프로세스 내 스케줄러와 영상 추적 우선순위 큐입니다.
+#
+# - IntervalScheduler: 일정 주기로 반복 실행할 작업들을 다음 실행 시각 순으로 돌립니다.
+# - TrackingQueue: 추적 중인 영상마다 다음 스냅샷 시각을 관리합니다.
+#   게시 후 48시간 이내 영상은 매시간, 그 이후는 하루에 한 번 스냅샷을 찍고,
+#   한 번에 처리할 수 있는 양(API 예산)이 모자라면 조회수 증가 속도가 빠른 영상부터 처리합니다.
+
+import heapq
+import time
+from datetime import datetime, timezone
+
+import telemetry
+
+HOUR_SEC = 3600
+DAY_SEC = 86400
+
+
+class IntervalScheduler:
+    """
+    (이름, 주기, 함수) 작업들을 주기마다 실행하는 단순한 단일 스레드 스케줄러입니다.
+    주기 대신 '다음 실행까지 남은 초'를 반환하는 함수를 주면 매번 그 값으로 예약합니다. (예: 매일 특정 시각)
+    """
+
+    def __init__(self):
+        self._jobs = []  # [다음 실행 시각, 순번, 이름, 주기(초) 또는 남은 초 함수, 함수] 힙
+
+    def add_job(self, name, interval_sec, func, run_immediately=True):
+        if run_immediately:
+            first_run = time.time()
+        else:
+            first_run = time.time() + (interval_sec() if callable(interval_sec) else interval_sec)
+        heapq.heappush(self._jobs, [first_run, len(self._jobs), name, interval_sec, func])
+
+    def run_forever(self, stop_event=None):
+        """stop_event(threading.Event)가 설정될 때까지 작업을 실행합니다. 작업 중 예외는 기록 후 계속 진행합니다."""
+        while self._jobs and not (stop_event and stop_event.is_set()):
+            next_run, seq, name, interval_sec, func = self._jobs[0]
+            wait = next_run - time.time()
+            if wait > 0:
+                if stop_event:
+                    stop_event.wait(wait)
+                else:
+                    time.sleep(wait)
+                continue
+
+            heapq.heappop(self._jobs)
+            started = time.time()
+            try:
+                with telemetry.span('stage', stage=name):
+                    func()
+            except Exception as e:
+                print(f"[스케줄러] 작업 '{name}' 실행 중 오류 발생: {e}")
+            print(f"[스케줄러] 작업 '{name}' 완료 ({time.time() - started:.1f}초)")
+            # 작업이 오래 걸려도 밀린 실행을 몰아서 하지 않도록 현재 시각 기준으로 다음 실행을 잡음
+            if callable(interval_sec):
+                following = time.time() + interval_sec()
+            else:
+                following = max(next_run + interval_sec, time.time())
+            heapq.heappush(self._jobs, [following, seq, name, interval_sec, func])
+
+
+def _to_epoch(value):
+    """ISO 8601 문자열, datetime, epoch 초를 epoch 초로 변환합니다."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TrackingQueue:
+    """
+    추적 중인 영상의 다음 스냅샷 시각을 관리하는 우선순위 큐입니다.
+
+    - hourly_window_hours: 게시 후 이 시간 동안은 hourly_interval 간격으로 스냅샷
+    - daily_interval: 그 이후의 스냅샷 간격
+    - max_age_days: 게시 후 이 기간이 지나면 추적 중단
+    """
+
+    def __init__(self, hourly_window_hours=48, hourly_interval=HOUR_SEC, daily_interval=DAY_SEC, max_age_days=14):
+        self.hourly_window_sec = hourly_window_hours * HOUR_SEC
+        self.hourly_interval = hourly_interval
+        self.daily_interval = daily_interval
+        self.max_age_sec = max_age_days * DAY_SEC
+        self._heap = []  # (다음 스냅샷 시각, -속도, 버전, video_id)
+        self._videos = {}  # video_id -> {'published_at', 'view_count', 'snapshot_at', 'velocity', 'version'}
+
+    def __len__(self):
+        return len(self._videos)
+
+    def __contains__(self, video_id):
+        return video_id in self._videos
+
+    def track(self, video_id, published_at, view_count=None, snapshot_at=None):
+        """영상을 추적 대상에 추가합니다. 이미 추적 중이면 무시합니다. 마지막 스냅샷 시각이 없으면 즉시 대상이 됩니다."""
+        if video_id in self._videos:
+            return
+        published_epoch = _to_epoch(published_at)
+        if published_epoch is not None and time.time() - published_epoch > self.max_age_sec:
+            return
+        snapshot_epoch = _to_epoch(snapshot_at)
+        self._videos[video_id] = {
+            'published_at': published_epoch,
+            'view_count': int(view_count) if view_count is not None else None,
+            'snapshot_at': snapshot_epoch,
+            'velocity': 0.0,
+            'version': 0,
+        }
+        due = self._next_due(self._videos[video_id], snapshot_epoch) if snapshot_epoch else time.time()
+        self._push(video_id, due)
+
+    def untrack(self, video_id):
+        self._videos.pop(video_id, None)
+
+    def pop_due(self, limit, now=None):
+        """스냅샷 시각이 된 영상 중 조회수 속도가 빠른 순으로 최대 limit개의 video_id를 꺼냅니다."""
+        now = now or time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, neg_velocity, version, video_id = heapq.heappop(self._heap)
+            entry = self._videos.get(video_id)
+            if entry is None or entry['version'] != version:
+                continue  # 제거되었거나 재예약된 오래된 항목
+            due.append((neg_velocity, video_id))
+
+        due.sort()
+        selected = [video_id for _, video_id in due[:limit]]
+        # 예산을 넘어 이번에 처리하지 못한 영상은 그대로 다시 대기열에 넣음
+        for _, video_id in due[limit:]:
+            self._push(video_id, now)
+        return selected
+
+    def retry(self, video_ids, now=None):
+        """pop_due로 꺼냈지만 스냅샷을 찍지 못한 영상을 다음 점검 때 다시 꺼내도록 대기열에 넣습니다."""
+        now = now or time.time()
+        for video_id in video_ids:
+            if video_id in self._videos:
+                self._push(video_id, now)
+
+    def record_snapshot(self, video_id, view_count, now=None):
+        """새 스냅샷을 반영해 조회수 속도(시간당 증가량)를 갱신하고 다음 스냅샷 시각을 예약합니다."""
+        entry = self._videos.get(video_id)
+        if entry is None:
+            return
+        now = now or time.time()
+        view_count = int(view_count)
+        if entry['view_count'] is not None and entry['snapshot_at']:
+            elapsed_hours = max((now - entry['snapshot_at']) / HOUR_SEC, 1 / 60)
+            entry['velocity'] = max(view_count - entry['view_count'], 0) / elapsed_hours
+        entry['view_count'] = view_count
+        entry['snapshot_at'] = now
+
+        if entry['published_at'] is not None and now - entry['published_at'] > self.max_age_sec:
+            self.untrack(video_id)
+            return
+        self._push(video_id, self._next_due(entry, now))
+
+    def _next_due(self, entry, last_snapshot):
+        published_at = entry['published_at']
+        if published_at is not None and last_snapshot - published_at < self.hourly_window_sec:
+            return last_snapshot + self.hourly_interval
+        return last_snapshot + self.daily_interval
+
+    def _push(self, video_id, due):
+        entry = self._videos[video_id]
+        entry['version'] += 1
+        heapq.heappush(self._heap, (due, -entry['velocity'], entry['version'], video_id))
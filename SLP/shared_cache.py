@@ -0,0 +1,224 @@
+# shared_cache.py
+# 여러 Streamlit 세션/레플리카가 함께 쓰는 stale-while-revalidate 캐시입니다.
+#
+# - 값은 공유 백엔드(기본: 로컬 SQLite 파일)에 저장되어 같은 호스트의 모든 레플리카가 함께 씁니다.
+# - 사용자 요청은 항상 저장된 값을 바로 받고, 만료가 가까워지면 백그라운드 스레드가 미리 갱신합니다.
+# - 갱신은 백엔드 잠금으로 한 레플리카만 수행하고, 나머지는 그 결과를 읽어 갑니다.
+# - 공유 캐시가 완전히 비어 있는 최초 1회만 요청이 로딩을 기다립니다.
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import telemetry
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dashboard_cache', 'shared_cache.sqlite3')
+
+
+class MemoryCacheBackend:
+    """단일 프로세스용 백엔드입니다. (테스트나 레플리카가 하나일 때)"""
+
+    def __init__(self):
+        self._entries = {}
+        self._locks = {}
+        self._mutex = threading.Lock()
+
+    def stored_at(self, key):
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value):
+        stored_at = time.time()
+        self._entries[key] = (stored_at, value)
+        return stored_at
+
+    def try_lock(self, name, owner, ttl_sec):
+        with self._mutex:
+            current = self._locks.get(name)
+            if current and current[0] != owner and current[1] > time.time():
+                return False
+            self._locks[name] = (owner, time.time() + ttl_sec)
+            return True
+
+    def unlock(self, name, owner):
+        with self._mutex:
+            if self._locks.get(name, (None,))[0] == owner:
+                del self._locks[name]
+
+
+class SQLiteCacheBackend:
+    """같은 호스트의 여러 프로세스가 공유하는 SQLite 파일 백엔드입니다. 값은 pickle로 저장합니다."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, stored_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, owner TEXT, expires_at REAL)")
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3 연결은 스레드 간 공유하지 않으므로 작업마다 새로 열고 닫음
+        # (sqlite3.Connection의 with 문은 트랜잭션만 끝내고 연결은 닫지 않아 파일 핸들이 쌓임)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def stored_at(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT stored_at FROM entries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT stored_at, value FROM entries WHERE key = ?", (key,)).fetchone()
+        return (row[0], pickle.loads(row[1])) if row else None
+
+    def set(self, key, value):
+        stored_at = time.time()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)", (key, payload, stored_at))
+        return stored_at
+
+    def try_lock(self, name, owner, ttl_sec):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT owner, expires_at FROM locks WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("INSERT OR REPLACE INTO locks (name, owner, expires_at) VALUES (?, ?, ?)", (name, owner, now + ttl_sec))
+            conn.execute("COMMIT")
+            return True
+
+    def unlock(self, name, owner):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+
+def make_backend():
+    """환경 변수 SHARED_CACHE_BACKEND(sqlite|memory)와 SHARED_CACHE_PATH로 백엔드를 만듭니다."""
+    if os.environ.get("SHARED_CACHE_BACKEND", "sqlite") == "memory":
+        return MemoryCacheBackend()
+    return SQLiteCacheBackend(os.environ.get("SHARED_CACHE_PATH", DEFAULT_DB_PATH))
+
+
+class SWRCache:
+    """
+    loader()의 결과를 백엔드에 보관하는 stale-while-revalidate 캐시입니다.
+
+    - fresh_sec: 값이 신선하다고 보는 시간
+    - refresh_ahead_sec: 만료 이만큼 전부터 백그라운드 갱신 시작
+    - lock_ttl_sec: 갱신 중인 레플리카가 죽었을 때 잠금이 풀리는 시간
+    """
+
+    def __init__(self, backend, key, loader, fresh_sec=600, refresh_ahead_sec=120, lock_ttl_sec=300):
+        self.backend = backend
+        self.key = key
+        self.loader = loader
+        self.fresh_sec = fresh_sec
+        self.refresh_ahead_sec = refresh_ahead_sec
+        self.lock_ttl_sec = lock_ttl_sec
+        self._owner = uuid.uuid4().hex
+        self._local = None  # (stored_at, value): 백엔드 값을 매번 역직렬화하지 않도록 보관
+        self._refresh_guard = threading.Lock()
+        self._refresher = None
+
+    @property
+    def version(self):
+        """현재 프로세스가 들고 있는 값의 저장 시각 (값이 바뀌었는지 판단하는 데 사용)"""
+        return self._local[0] if self._local else None
+
+    def get(self):
+        """캐시된 값을 즉시 반환합니다. 갱신이 필요하면 백그라운드에서 시작만 하고 기다리지 않습니다."""
+        entry = self._read()
+        if entry is None:
+            telemetry.record_cache(self.key, 'miss')
+            entry = self._cold_load()
+        elif time.time() - entry[0] >= self.fresh_sec - self.refresh_ahead_sec:
+            telemetry.record_cache(self.key, 'stale')
+            threading.Thread(target=self.refresh, daemon=True).start()
+        else:
+            telemetry.record_cache(self.key, 'hit')
+        return entry[1]
+
+    def refresh(self, raise_errors=False):
+        """
+        다른 스레드/레플리카가 갱신 중이 아니면 loader를 실행해 백엔드 값을 교체합니다.
+        갱신했으면 True, 다른 곳에서 갱신 중이거나 실패했으면 False를 반환합니다.
+        """
+        if not self._refresh_guard.acquire(blocking=False):
+            return False
+        try:
+            if not self.backend.try_lock(self.key, self._owner, self.lock_ttl_sec):
+                return False
+            try:
+                started = time.time()
+                with telemetry.span('cache.refresh', cache=self.key):
+                    value = self.loader()
+                self._local = (self.backend.set(self.key, value), value)
+                print(f"[공유 캐시] '{self.key}' 갱신 완료 ({time.time() - started:.1f}초)")
+                return True
+            finally:
+                self.backend.unlock(self.key, self._owner)
+        except Exception as e:
+            if raise_errors:
+                raise
+            # 갱신에 실패하면 기존 값을 계속 제공
+            print(f"[공유 캐시] '{self.key}' 갱신 실패: {e}")
+            return False
+        finally:
+            self._refresh_guard.release()
+
+    def start_background_refresher(self, check_interval_sec=30):
+        """만료 전에 값을 미리 갱신하는 데몬 스레드를 시작합니다. (프로세스당 1회)"""
+        if self._refresher is not None:
+            return
+
+        def loop():
+            while True:
+                stored_at = self.backend.stored_at(self.key)
+                if stored_at is None or time.time() - stored_at >= self.fresh_sec - self.refresh_ahead_sec:
+                    self.refresh()
+                time.sleep(check_interval_sec)
+
+        self._refresher = threading.Thread(target=loop, name=f"swr-refresher-{self.key}", daemon=True)
+        self._refresher.start()
+
+    def _read(self):
+        stored_at = self.backend.stored_at(self.key)
+        if stored_at is None:
+            return self._local
+        if self._local is None or self._local[0] != stored_at:
+            entry = self.backend.get(self.key)
+            if entry is not None:
+                self._local = entry
+        return self._local
+
+    def _cold_load(self):
+        """공유 캐시가 비어 있을 때: 직접 로드하거나, 다른 레플리카가 로드 중이면 결과를 기다립니다."""
+        deadline = time.time() + self.lock_ttl_sec
+        while time.time() < deadline:
+            if self.refresh(raise_errors=True):
+                return self._local
+            entry = self._read()
+            if entry is not None:
+                return entry
+            time.sleep(0.5)
+        # 잠금을 가진 레플리카가 응답하지 않으면 잠금 없이 직접 로드
+        value = self.loader()
+        self._local = (self.backend.set(self.key, value), value)
+        return self._local
@@ -0,0 +1,239 @@
+# spool.py
+# 수집 데이터를 DB에 쓰기 전에 먼저 기록하는 로컬 write-ahead 스풀(SQLite)입니다.
+#
+# - 수집 스레드는 페이지가 도착할 때마다 정규화된 행을 스풀에 추가만 하고 바로 다음 페이지를 받습니다.
+# - SpoolFlusher가 별도 스레드에서 스풀을 일정 크기씩 읽어 Supabase에 쓰고, 테이블별로
+#   마지막으로 저장이 확인된 오프셋(ack)을 기록합니다. 중간에 프로세스가 죽거나 DB가 내려가도
+#   다음 실행은 그 오프셋 이후부터 이어서 씁니다.
+# - 완료된 (국가, 카테고리) 수집 작업을 실행 키(run_key)별로 기록해, 같은 실행을 다시 돌리면
+#   이미 받은 차트는 API 할당량을 다시 쓰지 않고 스풀에서 읽습니다.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from bulk_writer import write_rows
+
+DEFAULT_SPOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.collector_cache', 'spool.sqlite3')
+
+
+class WriteAheadSpool:
+    """추가 전용 레코드 로그입니다. 레코드마다 전역 오프셋(자동 증가)이 붙습니다."""
+
+    def __init__(self, path=DEFAULT_SPOOL_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "offset INTEGER PRIMARY KEY AUTOINCREMENT, run_key TEXT, table_name TEXT, row TEXT, created_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_records_table ON records (table_name, offset)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_records_run ON records (run_key, table_name)")
+            conn.execute("CREATE TABLE IF NOT EXISTS acks (table_name TEXT PRIMARY KEY, offset INTEGER)")
+            conn.execute("CREATE TABLE IF NOT EXISTS tasks (run_key TEXT, task TEXT, done_at REAL, PRIMARY KEY (run_key, task))")
+            conn.execute("CREATE TABLE IF NOT EXISTS runs (run_key TEXT PRIMARY KEY, snapshot_at TEXT)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dead_letters ("
+                "offset INTEGER, table_name TEXT, row TEXT, error TEXT, created_at REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3 연결은 스레드 간 공유하지 않으므로 작업마다 새로 열고 닫음
+        # (sqlite3.Connection의 with 문은 트랜잭션만 끝내고 연결은 닫지 않아 파일 핸들이 쌓임)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def append(self, run_key, rows_by_table):
+        """{테이블명: 행 목록}을 한 트랜잭션으로 추가합니다. (한 페이지의 videos/channels/stats가 함께 기록됨)"""
+        now = time.time()
+        records = [
+            (run_key, table, json.dumps(row, ensure_ascii=False, default=str), now)
+            for table, rows in rows_by_table.items() for row in rows
+        ]
+        if not records:
+            return
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO records (run_key, table_name, row, created_at) VALUES (?, ?, ?, ?)", records)
+            conn.execute("COMMIT")
+
+    def mark_task_done(self, run_key, task):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO tasks (run_key, task, done_at) VALUES (?, ?, ?)", (run_key, task, time.time()))
+
+    def completed_tasks(self, run_key):
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT task FROM tasks WHERE run_key = ?", (run_key,))}
+
+    def run_snapshot_at(self, run_key, default):
+        """
+        run_key 실행의 스냅샷 시각을 반환합니다. 처음 호출되면 default로 정해 기록합니다.
+        같은 스풀을 쓰는 워커 프로세스와 재실행이 모두 같은 시각으로 통계를 기록하게 하기 위함입니다.
+        """
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO runs (run_key, snapshot_at) VALUES (?, ?)", (run_key, default))
+            return conn.execute("SELECT snapshot_at FROM runs WHERE run_key = ?", (run_key,)).fetchone()[0]
+
+    def run_rows(self, run_key, table):
+        """run_key 실행에서 스풀에 기록된 table 행을 기록 순서대로 반환합니다. (저장 여부와 무관)"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT row FROM records WHERE run_key = ? AND table_name = ? ORDER BY offset", (run_key, table)
+            )
+            return [json.loads(row[0]) for row in cursor]
+
+    def last_offset(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(offset), 0) FROM records").fetchone()[0]
+
+    def read_pending(self, table, upto, limit):
+        """ack 이후 upto 이하 오프셋의 table 레코드를 최대 limit개 [(오프셋, 행)]로 반환합니다."""
+        with self._connect() as conn:
+            acked = conn.execute("SELECT offset FROM acks WHERE table_name = ?", (table,)).fetchone()
+            cursor = conn.execute(
+                "SELECT offset, row FROM records WHERE table_name = ? AND offset > ? AND offset <= ? ORDER BY offset LIMIT ?",
+                (table, acked[0] if acked else 0, upto, limit),
+            )
+            return [(offset, json.loads(row)) for offset, row in cursor]
+
+    def pending_count(self):
+        """아직 DB 저장이 확인되지 않은 레코드 수입니다."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM records r LEFT JOIN acks a ON a.table_name = r.table_name "
+                "WHERE r.offset > COALESCE(a.offset, 0)"
+            ).fetchone()[0]
+
+    def ack(self, table, offset, dead_rows=(), error=None):
+        """table을 offset까지 저장 완료로 기록합니다. 끝내 저장하지 못한 행은 dead_letters로 옮깁니다."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO dead_letters (offset, table_name, row, error, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(row_offset, table, json.dumps(row, ensure_ascii=False, default=str), error, now) for row_offset, row in dead_rows],
+            )
+            conn.execute("INSERT OR REPLACE INTO acks (table_name, offset) VALUES (?, ?)", (table, offset))
+            conn.execute("COMMIT")
+
+    def compact(self, keep_days=3):
+        """저장이 확인되었고 keep_days보다 오래된 레코드와 작업 기록을 지웁니다."""
+        cutoff = time.time() - keep_days * 86400
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute(
+                "DELETE FROM records WHERE created_at < ? AND offset <= "
+                "COALESCE((SELECT offset FROM acks WHERE acks.table_name = records.table_name), 0)",
+                (cutoff,),
+            ).rowcount
+            conn.execute("DELETE FROM tasks WHERE done_at < ?", (cutoff,))
+            conn.execute(
+                "DELETE FROM runs WHERE run_key NOT IN (SELECT run_key FROM tasks) "
+                "AND run_key NOT IN (SELECT DISTINCT run_key FROM records)"
+            )
+            conn.execute("COMMIT")
+        return deleted
+
+
+class SpoolFlusher:
+    """
+    스풀에 쌓인 레코드를 tables 순서(외래키 순서)대로 DB에 씁니다.
+
+    - tables: [(테이블명, on_conflict 키 또는 None, 증분 여부)] (None이면 insert)
+    - fingerprint_cache: 주어지면 증분 테이블은 새로 등장했거나 바뀐 행만 씀 (on_conflict가 핑거프린트 키)
+    - start()/stop()으로 백그라운드 스레드에서 interval_sec마다 비우고, flush()로 즉시 비울 수 있음
+    - DB가 거부한 행(write_rows가 한 행 단위까지 나눠 보고도 실패한 행)은 dead letter로 옮기고 진행
+    - DB 장애(WriteStats.unavailable)면 배치를 ack하지 않고 다음 flush에서 다시 씀
+    """
+
+    def __init__(self, spool, client, tables, fingerprint_cache=None, batch_size=2000, interval_sec=5.0):
+        self.spool = spool
+        self.client = client
+        self.tables = tables
+        self.fingerprint_cache = fingerprint_cache
+        self.batch_size = batch_size
+        self.interval_sec = interval_sec
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def flush(self):
+        """
+        지금까지 기록된 레코드를 모두 씁니다. 모두 저장(또는 dead letter 처리)했으면 True,
+        DB 오류로 중단했으면 False를 반환합니다. (남은 레코드는 다음 flush에서 이어서 씀)
+        """
+        with self._flush_lock:
+            # 이번 패스의 범위를 고정: 외래키 순서를 지키려면 부모 테이블이 먼저 같은 범위까지 저장되어야 함
+            upto = self.spool.last_offset()
+            fingerprints_changed = False
+            try:
+                for table, on_conflict, incremental in self.tables:
+                    fingerprint_key = on_conflict if incremental and self.fingerprint_cache is not None else None
+                    while True:
+                        records = self.spool.read_pending(table, upto, self.batch_size)
+                        if not records:
+                            break
+                        if not self._write_batch(table, on_conflict, fingerprint_key, records):
+                            return False
+                        fingerprints_changed = fingerprints_changed or fingerprint_key is not None
+                return True
+            finally:
+                if fingerprints_changed:
+                    self.fingerprint_cache.save()
+
+    def _write_batch(self, table, on_conflict, fingerprint_key, records):
+        rows = [row for _, row in records]
+        rows_to_write = rows
+        if fingerprint_key:
+            rows_to_write = self.fingerprint_cache.changed_rows(table, rows, fingerprint_key)
+
+        stats = write_rows(self.client, table, rows_to_write, on_conflict=on_conflict)
+        if stats.unavailable:
+            # DB 장애: 배치 전체를 ack하지 않고 남겨 둠 (upsert/중복 제거로 이미 쓴 행을 다시 써도 안전)
+            print(f"[스풀] {table} 저장 실패 (DB 장애), {len(records)}행을 스풀에 남겨 둡니다.")
+            return False
+
+        # DB가 거부한 행(한 행씩 나눠 보내도 실패한 행)만 dead letter로 옮기고 나머지는 진행
+        failed_ids = {id(row) for row in stats.failed_rows}
+        dead_rows = [(offset, row) for offset, row in records if id(row) in failed_ids]
+        self.spool.ack(table, records[-1][0], dead_rows=dead_rows, error="write failed" if dead_rows else None)
+
+        if fingerprint_key:
+            saved = [row for row in rows_to_write if id(row) not in failed_ids]
+            self.fingerprint_cache.update(table, saved, fingerprint_key)
+            self.fingerprint_cache.touch(table, [row[fingerprint_key] for row in rows])
+        return True
+
+    def start(self):
+        """백그라운드 스레드에서 주기적으로 flush를 시작합니다."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+
+        def loop():
+            while not self._stop_event.wait(self.interval_sec):
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[스풀] 백그라운드 저장 중 오류 발생: {e}")
+
+        self._thread = threading.Thread(target=loop, name="spool-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """백그라운드 스레드를 멈추고 남은 레코드를 마지막으로 한 번 씁니다. flush 결과를 반환합니다."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        return self.flush()
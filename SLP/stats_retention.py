@@ -0,0 +1,76 @@
+# stats_retention.py
+# video_stats 파티션/집계/보관 기간을 관리하는 유지보수 작업입니다.
+#
+# 실제 작업은 DB 함수 maintain_video_stats(create_tables.py)가 한 번의 호출로 수행합니다.
+# - 앞으로 쓸 일 단위 파티션을 미리 만듦
+# - 끝난 날짜의 원본 스냅샷을 video_stats_daily로, 끝난 주를 video_stats_weekly로 집계
+# - 원본 보관 기간이 지난 날짜 파티션은 파티션째 삭제, 일 집계 보관 기간이 지난 행은 삭제 (주 집계는 계속 보관)
+# 따라서 원본 테이블 크기는 보관 기간만큼으로 일정하게 유지되고, 긴 기간 추이는 집계 테이블에서 읽습니다.
+#
+# maintain_video_stats는 데이터를 삭제하므로 service_role에만 실행 권한이 있습니다. (anon 키로는 호출 불가)
+# SUPABASE_DB_URL(Postgres DSN)이 있으면 직접 연결해 호출하고, 없으면 SUPABASE_SERVICE_ROLE_KEY로 RPC 호출합니다.
+
+import os
+
+import telemetry
+
+# 원본(매시간) 스냅샷 보관 기간. 모멘텀 계산(최근 8일)이 원본을 읽으므로 DB 함수에서 최소 14일로 제한
+RAW_RETENTION_DAYS = int(os.environ.get("STATS_RAW_RETENTION_DAYS", "30"))
+# 일 단위 집계 보관 기간
+DAILY_RETENTION_DAYS = int(os.environ.get("STATS_DAILY_RETENTION_DAYS", "365"))
+# 미리 만들어 둘 파티션 일수 (이 기간 안에 다시 실행되지 않으면 스냅샷은 기본 파티션에 쌓였다가 다음 실행에서 옮겨짐)
+PARTITIONS_AHEAD_DAYS = int(os.environ.get("STATS_PARTITIONS_AHEAD_DAYS", "7"))
+
+
+def _call_with_db_url(db_url, params):
+    import psycopg
+
+    with psycopg.connect(db_url) as conn:
+        row = conn.execute(
+            "SELECT maintain_video_stats(%(raw_retention_days)s, %(daily_retention_days)s, %(days_ahead)s)", params
+        ).fetchone()
+    return row[0] if row else None
+
+
+def get_service_client():
+    """SUPABASE_SERVICE_ROLE_KEY로 만든 Supabase 클라이언트를 반환합니다. (키가 없으면 None)"""
+    service_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not service_key:
+        return None
+    from supabase import create_client
+    return create_client(os.environ["SUPABASE_URL"], service_key)
+
+
+def run_stats_maintenance(client=None):
+    """
+    maintain_video_stats를 호출하고 결과(생성/삭제한 파티션 수, 집계한 행 수)를 dict로 반환합니다.
+    client는 service_role 키로 만든 클라이언트여야 하며, 주지 않으면 SUPABASE_DB_URL 또는 service_role 키를 사용합니다.
+    둘 다 없으면 건너뛰고 빈 dict를 반환합니다.
+    """
+    params = {
+        'raw_retention_days': RAW_RETENTION_DAYS,
+        'daily_retention_days': DAILY_RETENTION_DAYS,
+        'days_ahead': PARTITIONS_AHEAD_DAYS,
+    }
+    db_url = os.environ.get("SUPABASE_DB_URL")
+    if client is None and not db_url:
+        client = get_service_client()
+        if client is None:
+            print("video_stats 보관 관리 건너뜀: SUPABASE_DB_URL 또는 SUPABASE_SERVICE_ROLE_KEY가 필요합니다.")
+            return {}
+    with telemetry.span('db.maintenance', table='video_stats'):
+        if client is None:
+            result = _call_with_db_url(db_url, params) or {}
+        else:
+            result = client.rpc('maintain_video_stats', params).execute().data or {}
+    print(f"video_stats 보관 관리 완료: 파티션 {result.get('partitions_created', 0)}개 생성 / "
+          f"{result.get('partitions_dropped', 0)}개 삭제, 일 집계 {result.get('daily_rows', 0):,}행, "
+          f"주 집계 {result.get('weekly_rows', 0):,}행, 만료된 일 집계 {result.get('daily_rows_deleted', 0):,}행 삭제")
+    return result
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    run_stats_maintenance()
@@ -0,0 +1,234 @@
+# telemetry.py
+# 수집기/대시보드 공용 계측 모듈입니다.
+#
+# - span(name, **labels): 구간 소요 시간을 기록하는 컨텍스트 매니저 (API 호출, 정규화, DB 쓰기 등)
+#   observe(name, elapsed_sec, **labels): 이미 측정한 소요 시간을 같은 형식으로 기록
+# - count(name, value, **labels): 행 수, 바이트, quota unit 같은 누적 카운터
+# - record_cache(cache, result): 캐시 조회 결과(hit/stale/miss) 카운터 → 적중률 계산
+# - 이벤트는 환경 변수 TELEMETRY_JSON_LOG(파일 경로 또는 'stderr')가 설정되면 JSON 한 줄씩 기록
+# - render_prometheus(): Prometheus 텍스트 형식, start_metrics_server(port): /metrics HTTP 엔드포인트 (선택)
+# - run_report()/write_run_report(): 실행 1회의 구간별 통계와 카운터 요약
+#
+# 기록은 프로세스 메모리에만 쌓이며 외부 의존성이 없습니다.
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+METRIC_PREFIX = 'searchlight'
+
+_lock = threading.Lock()
+_counters = {}  # (이름, 레이블 튜플) -> 값
+_spans = {}  # (이름, 레이블 튜플) -> [횟수, 합계, 최댓값, 오류 횟수]
+_started_at = time.time()
+_log_file = None
+_log_lock = threading.Lock()
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _log_target():
+    global _log_file
+    target = os.environ.get("TELEMETRY_JSON_LOG")
+    if not target:
+        return None
+    if target == 'stderr':
+        return sys.stderr
+    if _log_file is None:
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        _log_file = open(target, 'a', encoding='utf-8', buffering=1)
+    return _log_file
+
+
+def log_event(event, **fields):
+    """이벤트 하나를 JSON 한 줄로 기록합니다. (TELEMETRY_JSON_LOG가 없으면 아무것도 하지 않음)"""
+    target = _log_target()
+    if target is None:
+        return
+    record = {'ts': datetime.now(timezone.utc).isoformat(), 'event': event, **fields}
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _log_lock:
+        target.write(line + '\n')
+
+
+def count(name, value=1, **labels):
+    """카운터 name을 value만큼 늘립니다."""
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def record_cache(cache, result):
+    """캐시 조회 결과를 기록합니다. result: 'hit'(신선), 'stale'(오래된 값 반환), 'miss'(직접 로드)"""
+    count('cache_requests', cache=cache, result=result)
+
+
+@contextmanager
+def span(name, **labels):
+    """
+    블록의 소요 시간을 기록합니다. 블록에서 예외가 나면 오류로 집계하고 예외는 그대로 전달합니다.
+    with 블록 안에서 반환된 dict에 값을 넣으면 JSON 로그에 함께 기록됩니다. (예: rows 수)
+    """
+    fields = {}
+    started = time.perf_counter()
+    error = None
+    try:
+        yield fields
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        observe(name, time.perf_counter() - started, error=error, fields=fields, **labels)
+
+
+def observe(name, elapsed_sec, error=None, fields=None, **labels):
+    """이미 측정한 소요 시간을 구간 name으로 기록합니다. (span을 쓰기 어려운 곳에서 사용)"""
+    key = (name, _label_key(labels))
+    with _lock:
+        stats = _spans.setdefault(key, [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += elapsed_sec
+        stats[2] = max(stats[2], elapsed_sec)
+        if error is not None:
+            stats[3] += 1
+    log_event('span', name=name, duration_ms=round(elapsed_sec * 1000, 2), ok=error is None,
+              error=repr(error) if error is not None else None, **labels, **(fields or {}))
+
+
+def reset():
+    """기록을 모두 지웁니다. (데몬에서 주기별 보고서를 만들 때)"""
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+        _started_at = time.time()
+
+
+def run_report():
+    """현재까지의 구간 통계, 카운터, 캐시 적중률을 dict로 반환합니다."""
+    with _lock:
+        spans = [
+            {'name': name, **dict(labels), 'count': stats[0], 'total_sec': round(stats[1], 3),
+             'avg_ms': round(stats[1] / stats[0] * 1000, 2), 'max_ms': round(stats[2] * 1000, 2), 'errors': stats[3]}
+            for (name, labels), stats in _spans.items()
+        ]
+        counters = [{'name': name, **dict(labels), 'value': value} for (name, labels), value in _counters.items()]
+        started_at = _started_at
+
+    cache_totals = {}
+    for counter in counters:
+        if counter['name'] == 'cache_requests':
+            totals = cache_totals.setdefault(counter['cache'], {'hit': 0, 'stale': 0, 'miss': 0})
+            totals[counter['result']] = totals.get(counter['result'], 0) + counter['value']
+    cache_hit_rates = {
+        cache: round((totals['hit'] + totals['stale']) / max(sum(totals.values()), 1), 4) for cache, totals in cache_totals.items()
+    }
+    return {
+        'started_at': datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+        'elapsed_sec': round(time.time() - started_at, 3),
+        'spans': sorted(spans, key=lambda entry: entry['total_sec'], reverse=True),
+        'counters': sorted(counters, key=lambda entry: entry['name']),
+        'cache_hit_rates': cache_hit_rates,
+    }
+
+
+def format_report(report):
+    """run_report() 결과를 사람이 읽기 쉬운 여러 줄 문자열로 만듭니다."""
+    lines = [f"실행 시간: {report['elapsed_sec']:.1f}초", "구간별 소요 시간 (합계 순):"]
+    for entry in report['spans']:
+        labels = ', '.join(f"{k}={v}" for k, v in entry.items() if k not in ('name', 'count', 'total_sec', 'avg_ms', 'max_ms', 'errors'))
+        lines.append(f"  {entry['name']}{f' [{labels}]' if labels else ''}: {entry['count']}회, 합계 {entry['total_sec']:.2f}초, "
+                     f"평균 {entry['avg_ms']:.1f}ms, 최대 {entry['max_ms']:.1f}ms, 오류 {entry['errors']}회")
+    lines.append("카운터:")
+    for entry in report['counters']:
+        labels = ', '.join(f"{k}={v}" for k, v in entry.items() if k not in ('name', 'value'))
+        lines.append(f"  {entry['name']}{f' [{labels}]' if labels else ''}: {entry['value']:,}")
+    for cache, rate in report['cache_hit_rates'].items():
+        lines.append(f"캐시 적중률 {cache}: {rate * 100:.1f}%")
+    return '\n'.join(lines)
+
+
+def write_run_report(directory):
+    """run_report()를 directory/run-<시각>.json으로 저장하고 경로를 반환합니다."""
+    report = run_report()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"run-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    log_event('run_report', path=path, elapsed_sec=report['elapsed_sec'])
+    return path
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_prometheus():
+    """모든 카운터와 구간 통계를 Prometheus 텍스트 노출 형식으로 반환합니다."""
+    with _lock:
+        counters = list(_counters.items())
+        spans = list(_spans.items())
+    lines = []
+    for name in sorted({name for (name, _), _ in counters}):
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+        for (counter_name, labels), value in counters:
+            if counter_name == name:
+                lines.append(f"{METRIC_PREFIX}_{name}_total{_format_labels(labels)} {value}")
+    if spans:
+        lines.append(f"# TYPE {METRIC_PREFIX}_span_seconds summary")
+        for (name, labels), stats in spans:
+            span_labels = (('span', name),) + labels
+            lines.append(f"{METRIC_PREFIX}_span_seconds_count{_format_labels(span_labels)} {stats[0]}")
+            lines.append(f"{METRIC_PREFIX}_span_seconds_sum{_format_labels(span_labels)} {stats[1]:.6f}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_span_errors_total counter")
+        for (name, labels), stats in spans:
+            lines.append(f"{METRIC_PREFIX}_span_errors_total{_format_labels((('span', name),) + labels)} {stats[3]}")
+    return '\n'.join(lines) + '\n'
+
+
+_metrics_server = None
+
+
+def start_metrics_server(port):
+    """/metrics에서 render_prometheus()를 제공하는 HTTP 서버를 데몬 스레드로 시작합니다. (프로세스당 1회)"""
+    global _metrics_server
+    if _metrics_server is not None:
+        return _metrics_server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    _metrics_server = ThreadingHTTPServer(('0.0.0.0', int(port)), MetricsHandler)
+    threading.Thread(target=_metrics_server.serve_forever, name='metrics-server', daemon=True).start()
+    print(f"Prometheus 지표 엔드포인트: http://0.0.0.0:{port}/metrics")
+    return _metrics_server
+
+
+def start_metrics_server_from_env():
+    """환경 변수 METRICS_PORT가 설정되어 있으면 지표 서버를 시작합니다."""
+    port = os.environ.get("METRICS_PORT")
+    if port:
+        return start_metrics_server(port)
+    return None
@@ -0,0 +1,73 @@
+# video_store.py
+# 랭킹 DataFrame으로 만든 영상 상세 정보 인메모리 저장소입니다.
+#
+# fetch_video_ranking이 이미 계산한 지표(VPH, 좋아요율 등)를 video_id로 바로 찾을 수 있도록
+# 랭킹 로드 시 한 번 인덱스를 만들어 두고, 상세 보기 요청은 DB 왕복 없이 O(1)로 응답합니다.
+
+import numpy as np
+
+from metrics import percentile_in_category
+
+# 랭킹 DataFrame 컬럼명 -> 상세 정보(dict) 키
+RANKING_TO_DETAIL_KEYS = {
+    'video_id': 'video_id',
+    'channel_id': 'channel_id',
+    'category_id': 'category_id',
+    '제목': 'title',
+    '채널명': 'name',
+    'VPH': 'VPH',
+    '좋아요율(%)': 'like_rate',
+    '댓글율(%)': 'comment_rate',
+    '분당조회수': 'views_per_minute',
+    'VPH 백분위': 'vph_percentile',
+    '좋아요율 백분위': 'like_rate_percentile',
+    '좋아요': 'like_count',
+    '댓글': 'comment_count',
+    '총조회수': 'view_count',
+    '게시일': 'published_at',
+    '영상길이(초)': 'duration_sec',
+    '태그': 'tags',
+    '썸네일URL': 'thumbnail_url',
+}
+
+
+class VideoDetailStore:
+    """
+    video_id -> 랭킹 행 위치 인덱스를 가진 상세 정보 저장소입니다.
+    상세 dict는 처음 조회될 때 만들어 보관하며, 상위 prefetch_top_n개는 생성 시 미리 만들어 둡니다.
+    """
+
+    def __init__(self, ranking_df, prefetch_top_n=50):
+        columns = [column for column in RANKING_TO_DETAIL_KEYS if column in ranking_df.columns]
+        self._frame = ranking_df[columns].rename(columns=RANKING_TO_DETAIL_KEYS).reset_index(drop=True)
+        self._details = {}
+        if 'video_id' not in self._frame.columns:  # 랭킹이 비어 있는 경우
+            self._positions = {}
+            return
+        self._positions = {video_id: position for position, video_id in enumerate(self._frame['video_id'])}
+        for video_id in self._frame['video_id'].iloc[:prefetch_top_n]:
+            self.get(video_id)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, video_id):
+        return video_id in self._positions
+
+    def get(self, video_id):
+        """video_id의 상세 정보 dict를 반환합니다. 랭킹에 없는 영상이면 None을 반환합니다."""
+        details = self._details.get(video_id)
+        if details is not None:
+            return details
+        position = self._positions.get(video_id)
+        if position is None:
+            return None
+        row = self._frame.iloc[position]
+        # numpy 스칼라는 파이썬 기본 타입으로 변환 (Timestamp, 리스트 등은 그대로)
+        details = {key: (value.item() if isinstance(value, np.generic) else value) for key, value in row.items()}
+        self._details[video_id] = details
+        return details
+
+    def category_percentiles(self, category_id, values):
+        """랭킹에 없는 영상의 지표(values)를 랭킹의 같은 카테고리 영상과 비교한 백분위 dict를 반환합니다."""
+        return percentile_in_category(self._frame, category_id, values)